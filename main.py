@@ -8,6 +8,7 @@ Newsletter Crawler 主入口程序
 2. 检查空内容
 3. 重新爬取问题文章
 4. 上传到OSS
+5. 导出列式特征数据
 """
 
 import argparse
@@ -31,6 +32,10 @@ def run_crawler(args):
     """运行爬虫"""
     # 直接调用爬虫
     from src.newsletter_system.crawler.newsletter_crawler import NewsletterCrawler, CrawlerConfig
+    from src.newsletter_system.utils.file_utils import parse_size
+    
+    # config.json 中的文件设置（图片大小上限）
+    file_settings = (load_json('config.json') or {}).get('file_settings', {})
     
     config = CrawlerConfig(
         output_dir=args.output,
@@ -39,7 +44,17 @@ def run_crawler(args):
         batch_size=args.batch_size,
         api_delay=args.api_delay,
         article_delay=args.article_delay,
-        enable_resume=not args.no_resume
+        enable_resume=not args.no_resume,
+        incremental_sync=args.incremental,
+        fetch_mode=args.fetch_mode,
+        browser_shards=args.browser_shards,
+        verify_images=args.verify_images,
+        image_store=args.image_store,
+        conditional_requests=not args.no_revalidate,
+        revalidate_pages=args.revalidate_pages,
+        output_compression='gzip' if args.gzip_output else None,
+        columnar_export=args.export_features,
+        max_image_size=parse_size(file_settings.get('max_image_size', '10MB'))
     )
     
     async def run():
@@ -61,6 +76,28 @@ def run_crawler(args):
     asyncio.run(run())
 
 
+def export_features(args):
+    """由已有的处理结果导出列式特征数据"""
+    from src.newsletter_system.crawler.columnar_export import export_records
+    from src.newsletter_system.crawler.newsletter_crawler import RECOMMENDATION_FIELDS
+    from src.newsletter_system.utils.file_utils import iter_json_records
+    
+    data_dir = Path(args.output) / "data"
+    source = next((data_dir / name for name in ("processed_articles.jsonl", "processed_articles.jsonl.gz",
+                                                "processed_articles.json")
+                   if (data_dir / name).exists()), None)
+    if source is None:
+        logger.error(f"No processed articles found in {data_dir}")
+        return
+    
+    stats = export_records(iter_json_records(source), data_dir / "features", RECOMMENDATION_FIELDS,
+                           export_format=args.format, part_rows=args.part_rows)
+    print(f"\n✅ 导出完成!")
+    print(f"  来源: {source}")
+    print(f"  格式: {stats['format']}，{stats['rows']} 行，{stats['parts']} 个分片")
+    print(f"  目录: {stats['directory']}")
+
+
 def upload_to_oss(args):
     """上传到OSS"""
     # 加载配置
@@ -119,6 +156,9 @@ def main():
   
   # 爬取并上传
   python main.py crawl && python main.py upload
+  
+  # 由已有结果导出列式特征数据
+  python main.py export
         """
     )
     
@@ -133,6 +173,19 @@ def main():
     crawl_parser.add_argument('--api-delay', type=float, default=1.0, help='API延迟(秒)')
     crawl_parser.add_argument('--article-delay', type=float, default=0.5, help='文章延迟(秒)')
     crawl_parser.add_argument('--no-resume', action='store_true', help='不使用断点续传')
+    crawl_parser.add_argument('--incremental', action='store_true', help='增量同步文章列表（基于水位线）')
+    crawl_parser.add_argument('--fetch-mode', choices=['browser', 'http_first'], default='browser',
+                              help='正文获取方式：browser 或 http_first（HTTP 直取，浏览器兜底）')
+    crawl_parser.add_argument('--browser-shards', type=int, default=1, help='独立浏览器进程数（每个分片各有页面池）')
+    crawl_parser.add_argument('--verify-images', action='store_true', help='启动时并行校验已下载图片的hash（不符的重新下载）')
+    crawl_parser.add_argument('--image-store', action='store_true', help='图片按内容去重存储（images/by-hash），文章目录以硬链接引用')
+    crawl_parser.add_argument('--no-revalidate', action='store_true', help='不发条件请求（忽略上次记录的 ETag/Last-Modified）')
+    crawl_parser.add_argument('--revalidate-pages', action='store_true',
+                              help='页面也发条件请求（每篇文章在 data/page_cache 多存一份正文 HTML）')
+    crawl_parser.add_argument('--gzip-output', action='store_true', help='增量输出的 JSONL 使用 gzip 压缩（*.jsonl.gz）')
+    crawl_parser.add_argument('--export-features', nargs='?', const='auto', default=None,
+                              choices=['auto', 'parquet', 'npz'],
+                              help='同时导出列式特征数据到 data/features（默认 auto：有 pyarrow 用 Parquet，否则 npz）')
     crawl_parser.add_argument('--output', default='crawled_data', help='输出目录')
     
     # 上传命令
@@ -145,6 +198,13 @@ def main():
     upload_parser.add_argument('--endpoint', dest='endpoint', default=None, help='覆盖配置中的endpoint/base_url')
     upload_parser.add_argument('--public-base-url', dest='public_base_url', default=None, help='覆盖配置中的public_base_url')
     
+    # 导出命令
+    export_parser = subparsers.add_parser('export', help='导出列式特征数据')
+    export_parser.add_argument('--output', default='crawled_data', help='数据目录')
+    export_parser.add_argument('--format', choices=['auto', 'parquet', 'npz'], default='auto',
+                               help='导出格式（auto：有 pyarrow 用 Parquet，否则 npz）')
+    export_parser.add_argument('--part-rows', type=int, default=1000, help='每个分片的行数')
+    
     # 解析参数
     args = parser.parse_args()
     
@@ -152,12 +212,17 @@ def main():
         parser.print_help()
         sys.exit(1)
     
+    if args.command == 'crawl' and args.incremental and args.no_resume:
+        crawl_parser.error('--incremental 只处理新文章，不能与 --no-resume 同时使用')
+    
     # 执行对应命令
     try:
         if args.command == 'crawl':
             run_crawler(args)
         elif args.command == 'upload':
             upload_to_oss(args)
+        elif args.command == 'export':
+            export_features(args)
         else:
             parser.print_help()
             sys.exit(1)
@@ -24,6 +24,7 @@ from typing import Dict, List, Optional, Any
 import logging
 
 from .newsletter_crawler import NewsletterCrawler, CrawlerConfig
+from .retry import RetryRule, RetryableError, parse_retry_after
 
 # 尝试导入可选依赖
 try:
@@ -46,274 +47,53 @@ logger = logging.getLogger(__name__)
 class AntiDetectCrawler(NewsletterCrawler):
     """增强反爬虫检测的爬虫"""
     
-    def __init__(self, config: CrawlerConfig):
-        super().__init__(config)
-        self.user_agents = [
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        ]
-        self.viewport_sizes = [
-            {'width': 1920, 'height': 1080},
-            {'width': 1366, 'height': 768},
-            {'width': 1440, 'height': 900},
-            {'width': 1536, 'height': 864},
-            {'width': 1600, 'height': 900}
-        ]
+    # 反爬模式的重试规则：更多尝试、更长退避（对应原先限流 30-60 秒、反爬 20-40 秒、超时 10-20 秒、其他错误 5-10 秒）
+    RENDER_RETRY_RULES = {
+        'throttled': RetryRule(max_attempts=6, base_delay=30.0, max_delay=90.0),
+        'challenge': RetryRule(max_attempts=6, base_delay=20.0, max_delay=60.0),
+        'no_content': RetryRule(max_attempts=6, base_delay=6.0, max_delay=60.0),
+        'timeout': RetryRule(max_attempts=6, base_delay=10.0, max_delay=60.0),
+        'connection': RetryRule(max_attempts=6, base_delay=5.0, max_delay=60.0),
+        'other': RetryRule(max_attempts=6, base_delay=5.0, max_delay=60.0),
+    }
+    
+    async def _load_article_once(self, article_url: str, page: Page) -> str:
+        """单次尝试（增强版）：随机延迟与请求头、DOM 就绪后模拟浏览，再抽取正文（人机校验页由基类在没有正文时识别）
         
-    async def __aenter__(self):
-        """异步上下文管理器入口 - 增强版"""
-        await super().__aenter__()
+        重试、退避与预算由基类的 retry_policy 按 RENDER_RETRY_RULES 统一处理，不再自行递归，
+        也不再调用父类的整套重试流程（那会让尝试次数成倍增加）。
+        """
+        # 随机延迟（模拟人类行为）
+        await asyncio.sleep(random.uniform(1.5, 4.0))
         
-        # 重新初始化浏览器，使用更多反爬措施
-        if self.browser:
-            await self.browser.close()
-            
-        if self.playwright:
-            # 使用增强的浏览器配置（简化参数避免冲突）
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,  # 可以设置为 False 用于调试
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                    '--window-size=1920,1080',
-                ]
-            )
-            
-            # 重新创建页面池，使用反检测措施
-            self.page_pool = []
-            for i in range(min(self.config.max_concurrent_articles, 3)):
-                context = await self.browser.new_context(
-                    viewport=random.choice(self.viewport_sizes),
-                    user_agent=random.choice(self.user_agents),
-                    locale='en-US',
-                    timezone_id='America/New_York',
-                    permissions=['geolocation'],
-                    geolocation={'latitude': 40.7128, 'longitude': -74.0060},
-                    color_scheme='light',
-                    device_scale_factor=1.0,
-                    has_touch=False,
-                    is_mobile=False,
-                    java_script_enabled=True,
-                    bypass_csp=True,
-                    ignore_https_errors=True,
-                    extra_http_headers={
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.9,zh-CN;q=0.8,zh;q=0.7',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                        'Sec-Fetch-Dest': 'document',
-                        'Sec-Fetch-Mode': 'navigate',
-                        'Sec-Fetch-Site': 'none',
-                        'Sec-Fetch-User': '?1',
-                        'Cache-Control': 'max-age=0',
-                    }
-                )
-                
-                page = await context.new_page()
-                
-                # 应用stealth插件（如果可用）
-                if STEALTH_AVAILABLE:
-                    await stealth_async(page)
-                
-                # 注入反检测脚本
-                await self.inject_anti_detection_scripts(page)
-                
-                self.page_pool.append(page)
-                
-        return self
+        # 随机化请求头（避免 None 值）
+        headers = self.build_random_headers()
+        await page.set_extra_http_headers(headers)
         
-    async def inject_anti_detection_scripts(self, page: Page):
-        """注入反检测脚本"""
-        scripts = [
-            # 移除 webdriver 标记
-            """
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-            """,
-            
-            # 修改 navigator.plugins
-            """
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [
-                    {0: {type: "application/x-google-chrome-pdf", suffixes: "pdf"}},
-                    {0: {type: "application/pdf", suffixes: "pdf"}}
-                ]
-            });
-            """,
-            
-            # 修改 navigator.languages
-            """
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['en-US', 'en']
-            });
-            """,
-            
-            # 修改 chrome 对象
-            """
-            window.chrome = {
-                runtime: {},
-                loadTimes: function() {},
-                csi: function() {},
-                app: {}
-            };
-            """,
-            
-            # 修改权限查询
-            """
-            const originalQuery = window.navigator.permissions.query;
-            window.navigator.permissions.query = (parameters) => (
-                parameters.name === 'notifications' ?
-                    Promise.resolve({ state: Notification.permission }) :
-                    originalQuery(parameters)
-            );
-            """,
-            
-            # 修改 WebGL 指纹
-            """
-            const getParameter = WebGLRenderingContext.prototype.getParameter;
-            WebGLRenderingContext.prototype.getParameter = function(parameter) {
-                if (parameter === 37445) {
-                    return 'Intel Inc.';
-                }
-                if (parameter === 37446) {
-                    return 'Intel Iris OpenGL Engine';
-                }
-                return getParameter.apply(this, arguments);
-            };
-            """,
-            
-            # 隐藏自动化特征
-            """
-            Object.defineProperty(document, 'hidden', {
-                get: () => false
-            });
-            Object.defineProperty(document, 'visibilityState', {
-                get: () => 'visible'
-            });
-            """
-        ]
+        # 导航到页面（增加超时时间）
+        await self.rate_limiter.acquire(article_url)
+        response = await page.goto(
+            article_url, 
+            wait_until='domcontentloaded',  # 改为等待DOM加载完成
+            timeout=60000  # 增加超时时间到60秒
+        )
         
-        for script in scripts:
-            try:
-                await page.add_init_script(script)
-            except Exception as e:
-                logger.debug(f"Script injection warning: {e}")
-    
-    async def get_article_content_with_page(self, article_url: str, page: Page, retry_count: int = 0) -> Optional[str]:
-        """增强版文章内容获取，包含更多反爬策略"""
-        max_retries = 5  # 增加重试次数
-        base_delay = 3.0  # 增加基础延迟
+        # 检查响应状态
+        if response and response.status == 429:
+            logger.warning(f"收到429状态码（限流）: {article_url}")
+            self.concurrency.record_throttle('http_429')
+            response_headers = getattr(response, 'headers', None) or {}
+            raise RetryableError(f"HTTP 429: {article_url}", 'throttled',
+                                 retry_after=parse_retry_after(response_headers.get('retry-after')))
         
-        try:
-            # 随机延迟（模拟人类行为）
-            random_delay = random.uniform(1.5, 4.0)
-            await asyncio.sleep(random_delay)
-            
-            # 如果是重试，使用更长的指数退避延迟
-            if retry_count > 0:
-                delay = base_delay * (2 ** retry_count) + random.uniform(0, 3)
-                logger.info(f"重试 {retry_count}/{max_retries}，等待 {delay:.1f} 秒...")
-                await asyncio.sleep(delay)
-            
-            # 随机化请求头（避免 None 值）
-            headers = self.build_random_headers()
-            await page.set_extra_http_headers(headers)
-            
-            # 导航到页面（增加超时时间）
-            response = await page.goto(
-                article_url, 
-                wait_until='domcontentloaded',  # 改为等待DOM加载完成
-                timeout=60000  # 增加超时时间到60秒
-            )
-            
-            # 检查响应状态
-            if response and response.status == 429:
-                logger.warning(f"收到429状态码（限流）: {article_url}")
-                if retry_count < max_retries:
-                    # 限流时等待更长时间（30-60秒）
-                    wait_time = random.uniform(30, 60)
-                    logger.info(f"限流等待 {wait_time:.1f} 秒...")
-                    await asyncio.sleep(wait_time)
-                    return await self.get_article_content_with_page(article_url, page, retry_count + 1)
-                else:
-                    logger.error(f"超过最大重试次数，限流持续: {article_url}")
-                    return None
-            
-            # 等待一段时间让页面完全加载
-            await asyncio.sleep(random.uniform(2, 4))
-            
-            # 模拟人类行为：随机滚动
-            await self.simulate_human_behavior(page)
-            
-            # 检查页面内容
-            page_content = await page.content()
-            
-            # 检查各种反爬标记
-            anti_bot_indicators = [
-                'Too Many Requests',
-                '429',
-                'rate limit',
-                'Access Denied',
-                'Forbidden',
-                'Please verify you are human',
-                'Cloudflare',
-                'CAPTCHA',
-                'cf-browser-verification'
-            ]
-            
-            for indicator in anti_bot_indicators:
-                if indicator.lower() in page_content.lower():
-                    logger.warning(f"检测到反爬标记 '{indicator}': {article_url}")
-                    if retry_count < max_retries:
-                        # 遇到反爬时等待更长时间
-                        wait_time = random.uniform(20, 40)
-                        logger.info(f"反爬等待 {wait_time:.1f} 秒...")
-                        await asyncio.sleep(wait_time)
-                        
-                        # 可能需要刷新页面或使用新的页面
-                        if retry_count > 2:
-                            # 尝试刷新页面
-                            await page.reload(wait_until='domcontentloaded')
-                            await asyncio.sleep(random.uniform(3, 5))
-                        
-                        return await self.get_article_content_with_page(article_url, page, retry_count + 1)
-                    else:
-                        logger.error(f"超过最大重试次数，仍被检测: {article_url}")
-                        return None
-            
-            # 尝试获取内容（使用父类的逻辑）
-            content = await super().get_article_content_with_page(article_url, page, 0)
-            
-            if content:
-                return content
-            elif retry_count < max_retries:
-                logger.warning(f"未获取到有效内容，重试: {article_url}")
-                return await self.get_article_content_with_page(article_url, page, retry_count + 1)
-            else:
-                logger.error(f"无法获取内容: {article_url}")
-                return None
-                
-        except asyncio.TimeoutError:
-            logger.error(f"获取文章超时: {article_url}")
-            if retry_count < max_retries:
-                # 超时后等待一段时间
-                await asyncio.sleep(random.uniform(10, 20))
-                return await self.get_article_content_with_page(article_url, page, retry_count + 1)
-        except Exception as e:
-            logger.error(f"获取文章内容失败 {article_url}: {e}")
-            if retry_count < max_retries:
-                await asyncio.sleep(random.uniform(5, 10))
-                return await self.get_article_content_with_page(article_url, page, retry_count + 1)
+        # 等待一段时间让页面完全加载
+        await asyncio.sleep(random.uniform(2, 4))
         
-        return None
+        # 模拟人类行为：随机滚动
+        await self.simulate_human_behavior(page)
+        
+        # 在当前页面上抽取正文（不再重新导航）；没有正文时再按标题/校验表单/状态码判断是否为人机校验页
+        return await self._extract_article_from_page(article_url, page, response.status if response else None)
 
     def build_random_headers(self) -> Dict[str, str]:
         """构建随机请求头（不包含 None 值），便于测试与复用"""
@@ -378,8 +158,8 @@ class AntiDetectCrawler(NewsletterCrawler):
             
             logger.info(f"处理批次 {batch_idx + 1}/{total_batches}")
             
-            # 处理批次
-            for article in batch:
+            async def handle_article(article):
+                nonlocal processed_count, failed_count
                 # 检查是否已处理（统一为 int 类型）
                 raw_id = article.get('id')
                 try:
@@ -389,35 +169,38 @@ class AntiDetectCrawler(NewsletterCrawler):
                 if (article_id_int is not None) and (article_id_int in self.progress.processed_articles):
                     logger.info(f"跳过已处理文章: {article_id_int}")
                     stats['skipped_articles'] += 1
-                    continue
-
-                # 随机选择一个页面
-                page = random.choice(self.page_pool)
-                result = await self.process_article_with_page(article, page)
-
-                if result:
-                    processed_count += 1
-                    stats['processed_articles'] += 1
-                    if article_id_int is not None:
-                        self.progress.processed_articles.add(article_id_int)
-                else:
-                    failed_count += 1
-                    stats['failed_articles'] += 1
-                    if article_id_int is not None:
-                        self.progress.failed_articles[article_id_int] = "Processing failed"
-
-                # 保存进度
-                if self.config.enable_resume:
-                    self.progress.save(self.progress_file)
-
-                # 智能延迟：失败后等待更长时间
-                if not result:
-                    delay = random.uniform(10, 20)
-                    logger.info(f"失败后延迟 {delay:.1f} 秒...")
-                else:
-                    delay = random.uniform(3, 8)
+                    return
+
+                # 同时在途的文章数由自适应控制器决定（被限流时收缩并统一退避）
+                async with self.concurrency.slot():
+                    await self.concurrency.wait_backoff()
+                    # 只在渲染时从页面池独占借出页面，拿到正文即归还
+                    result = await self.process_article(article)
+
+                    # 成功时 _write_article 已标记为已处理（并写入日志），这里只记录失败
+                    if result:
+                        processed_count += 1
+                        stats['processed_articles'] += 1
+                    else:
+                        failed_count += 1
+                        stats['failed_articles'] += 1
+                        if article_id_int is not None:
+                            self.progress.mark_failed(article_id_int, "Processing failed")
+
+                    # 保存进度（追加日志，只写本篇的事件）
+                    self.progress.checkpoint()
+
+                    # 智能延迟：失败后等待更长时间
+                    if not result:
+                        delay = random.uniform(10, 20)
+                        logger.info(f"失败后延迟 {delay:.1f} 秒...")
+                    else:
+                        delay = random.uniform(3, 8)
 
-                await asyncio.sleep(delay)
+                    await asyncio.sleep(delay)
+            
+            # 处理批次
+            await asyncio.gather(*(handle_article(article) for article in batch))
             
             # 批次间延迟（更长）
             if batch_idx < total_batches - 1:
@@ -425,6 +208,8 @@ class AntiDetectCrawler(NewsletterCrawler):
                 logger.info(f"批次间延迟 {batch_delay:.1f} 秒...")
                 await asyncio.sleep(batch_delay)
         
+        stats['concurrency'] = self.concurrency.stats()
+        stats['retries'] = self.retry_policy.stats()
         return stats
 
 
@@ -439,4 +224,5 @@ class EnhancedCrawlerConfig(CrawlerConfig):
     min_delay: float = 3.0
     max_delay: float = 10.0
     batch_delay: float = 20.0
-    rate_limit_delay: float = 60.0
\ No newline at end of file
+    rate_limit_delay: float = 60.0
+    concurrency_initial: Optional[int] = 1  # 反爬模式从串行开始，健康时再逐步放开
\ No newline at end of file
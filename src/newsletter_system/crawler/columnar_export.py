@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+爬取结果的列式导出（推荐/分析用）。
+
+职责概览：
+- 每篇文章一行：推荐字段（`NewsletterCrawler.recommendation_fields`）加派生数值特征
+  （发布时间戳、点赞总数、标签数、图片数、正文长度等），嵌套的 `reactions` / `postTags`
+  只在导出时解析一次，原值以紧凑 JSON 字符串单独成列。
+- 增量追加：行先在内存中缓冲，每满 `part_rows` 行写成一个新的分片文件（`part-00001.parquet`
+  或 `part-00001.npz`，临时文件 + 原子替换），已有分片从不改写。
+- 格式：安装了 pyarrow 时写 Parquet；否则写 NumPy `.npz`（标准库直接编码 `.npy`，不依赖 numpy，
+  `numpy.load` 可直接读取）。
+- 列裁剪：`read_columns()` 只读取请求的列（Parquet 列块 / npz 中单独的 `.npy` 成员），
+  不会解析标题、描述等文本列；同一文章出现在多个分片时默认只保留最后一次。
+
+缺失值：整数列为 -1，浮点列为 NaN，布尔列为 False，字符串列为空串。
+
+使用示例：
+    exporter = ColumnarExporter(data_dir / "features", fields=crawler.recommendation_fields)
+    exporter.append(article_features(article_data, crawler.recommendation_fields))
+    exporter.close()
+    columns = read_columns(data_dir / "features", ['id', 'reaction_count'])
+"""
+
+import ast
+import json
+import logging
+import math
+import os
+import re
+import struct
+import sys
+import zipfile
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# 已知推荐字段的列类型；其余字段按字符串保存（非字符串值转为 JSON）
+FIELD_KINDS = {'id': 'int64', 'wordcount': 'int64'}
+
+# 派生特征列
+DERIVED_COLUMNS: List[Tuple[str, str]] = [
+    ('post_timestamp', 'float64'),   # post_date 对应的 Unix 时间戳（秒）
+    ('reaction_count', 'int64'),     # reactions 各项之和
+    ('tag_count', 'int64'),
+    ('tag_slugs', 'string'),         # 标签 slug，逗号分隔（slug 不含逗号）
+    ('image_count', 'int64'),        # 本地图片数
+    ('has_cover', 'bool'),
+    ('title_length', 'int64'),
+    ('markdown_length', 'int64'),    # 正文 Markdown 字符数
+]
+
+MISSING = {'int64': -1, 'float64': math.nan, 'bool': False, 'string': ''}
+
+FORMATS = ('parquet', 'npz')
+PART_PATTERN = re.compile(r'^part-(\d+)\.(parquet|npz)$')
+
+
+def resolve_format(export_format: str) -> str:
+    """'auto' 在安装了 pyarrow 时为 Parquet，否则为 npz"""
+    if export_format == 'auto':
+        return 'parquet' if PYARROW_AVAILABLE else 'npz'
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown columnar export format: {export_format}")
+    if export_format == 'parquet' and not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+    return export_format
+
+
+def schema_for(fields: Sequence[str]) -> List[Tuple[str, str]]:
+    """推荐字段 + 派生特征的列定义 [(列名, 类型)]"""
+    derived_names = {name for name, _ in DERIVED_COLUMNS}
+    columns = [(name, FIELD_KINDS.get(name, 'string')) for name in fields if name not in derived_names]
+    return columns + DERIVED_COLUMNS
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return MISSING['int64']
+
+
+def _to_string(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _timestamp(post_date: Any) -> float:
+    if not isinstance(post_date, str) or not post_date:
+        return math.nan
+    try:
+        return datetime.fromisoformat(post_date.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return math.nan
+
+
+def article_features(article_data: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """由处理后的文章数据生成一行（推荐字段 + 派生特征）"""
+    row = {}
+    for name, kind in schema_for(fields):
+        if kind == 'int64':
+            row[name] = _to_int(article_data.get(name))
+        elif name in article_data:
+            row[name] = _to_string(article_data.get(name))
+
+    reactions = article_data.get('reactions')
+    tags = article_data.get('postTags')
+    tags = tags if isinstance(tags, list) else []
+    slugs = [tag.get('slug') or '' for tag in tags if isinstance(tag, dict)]
+    title = article_data.get('title')
+    row.update({
+        'post_timestamp': _timestamp(article_data.get('post_date')),
+        'reaction_count': (sum(value for value in reactions.values() if isinstance(value, (int, float)))
+                           if isinstance(reactions, dict) else 0),
+        'tag_count': len(tags),
+        'tag_slugs': ','.join(slug for slug in slugs if slug),
+        'image_count': len(article_data.get('local_images') or []),
+        'has_cover': bool(article_data.get('cover_image')),
+        'title_length': len(title) if isinstance(title, str) else 0,
+        'markdown_length': len(article_data.get('content_markdown') or ''),
+    })
+    return row
+
+
+# ---------------------------------------------------------------------------
+# .npy 编解码（标准库实现，格式见 numpy.lib.format，版本 1.0）
+# ---------------------------------------------------------------------------
+
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+def _encode_npy(values: List[Any], kind: str) -> bytes:
+    if kind == 'string':
+        width = max(1, max((len(value) for value in values), default=0))
+        descr = f'<U{width}'
+        # UTF-32 定长，每个字符 4 字节，不足补零
+        data = b''.join(value.encode('utf-32-le', 'surrogatepass').ljust(width * 4, b'\0') for value in values)
+    elif kind == 'bool':
+        descr = '|b1'
+        data = bytes(1 if value else 0 for value in values)
+    else:
+        descr = '<i8' if kind == 'int64' else '<f8'
+        numbers = array('q' if kind == 'int64' else 'd', values)
+        if sys.byteorder == 'big':
+            numbers.byteswap()
+        data = numbers.tobytes()
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({len(values)},), }}"
+    # 头部补空格并以换行结尾，使数据起始位置按 64 字节对齐
+    padding = 64 - (len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = (header + ' ' * (padding % 64) + '\n').encode('latin1')
+    return NPY_MAGIC + struct.pack('<H', len(header)) + header + data
+
+
+def _decode_npy(data: bytes) -> List[Any]:
+    if data[:6] != NPY_MAGIC[:6]:
+        raise ValueError("Not a .npy file")
+    major = data[6]
+    if major == 1:
+        (header_length,), start = struct.unpack('<H', data[8:10]), 10
+    else:
+        (header_length,), start = struct.unpack('<I', data[8:12]), 12
+    header = ast.literal_eval(data[start:start + header_length].decode('latin1'))
+    body = data[start + header_length:]
+    descr, (count,) = header['descr'], header['shape']
+    if descr.startswith('<U'):
+        width = int(descr[2:]) * 4
+        return [body[i * width:(i + 1) * width].decode('utf-32-le', 'surrogatepass').rstrip('\0')
+                for i in range(count)]
+    if descr == '|b1':
+        return [bool(value) for value in body[:count]]
+    if descr in ('<i8', '<f8'):
+        numbers = array('q' if descr == '<i8' else 'd')
+        numbers.frombytes(body[:count * 8])
+        if sys.byteorder == 'big':
+            numbers.byteswap()
+        return numbers.tolist()
+    raise ValueError(f"Unsupported .npy dtype: {descr}")
+
+
+# ---------------------------------------------------------------------------
+# 分片读写
+# ---------------------------------------------------------------------------
+
+PARQUET_TYPES = {}
+if PYARROW_AVAILABLE:
+    PARQUET_TYPES = {'int64': pa.int64(), 'float64': pa.float64(), 'bool': pa.bool_(), 'string': pa.string()}
+
+
+def _write_part(path: Path, schema: List[Tuple[str, str]], columns: Dict[str, List[Any]]):
+    tmp_path = path.with_name(path.name + '.tmp')
+    if path.suffix == '.parquet':
+        table = pa.table({name: pa.array(columns[name], type=PARQUET_TYPES[kind]) for name, kind in schema})
+        pq.write_table(table, tmp_path)
+    else:
+        with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, kind in schema:
+                archive.writestr(f'{name}.npy', _encode_npy(columns[name], kind))
+    os.replace(tmp_path, path)
+
+
+def _read_part(path: Path, columns: Optional[Sequence[str]]) -> Dict[str, List[Any]]:
+    """读取一个分片中请求的列；分片中没有的列以 None 填充"""
+    if path.suffix == '.parquet':
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("Reading Parquet parts requires pyarrow: pip install pyarrow")
+        available = pq.read_schema(path).names
+        wanted = available if columns is None else [name for name in columns if name in available]
+        result = pq.read_table(path, columns=wanted).to_pydict()
+        rows = pq.read_metadata(path).num_rows
+    else:
+        with zipfile.ZipFile(path) as archive:
+            available = [name[:-4] for name in archive.namelist() if name.endswith('.npy')]
+            wanted = available if columns is None else [name for name in columns if name in available]
+            result = {name: _decode_npy(archive.read(f'{name}.npy')) for name in wanted}
+            if result:
+                rows = len(next(iter(result.values())))
+            else:
+                rows = len(_decode_npy(archive.read(f'{available[0]}.npy'))) if available else 0
+    for name in columns or ():
+        result.setdefault(name, [None] * rows)
+    return result
+
+
+def list_parts(directory: Path) -> List[Path]:
+    """按写入顺序列出分片文件"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    parts = []
+    for path in directory.iterdir():
+        match = PART_PATTERN.match(path.name)
+        if match:
+            parts.append((int(match.group(1)), path))
+    return [path for _, path in sorted(parts)]
+
+
+def read_columns(directory: Path, columns: Optional[Sequence[str]] = None,
+                 latest_only: bool = True) -> Dict[str, List[Any]]:
+    """
+    按列读取全部分片，只解码请求的列（None 为全部列）。
+
+    latest_only 时同一 id 只保留最后写入的一行（重新处理过的文章），为此会额外读取 id 列。
+    """
+    requested = list(columns) if columns is not None else None
+    to_read = requested
+    if latest_only and requested is not None and 'id' not in requested:
+        to_read = requested + ['id']
+
+    merged: Dict[str, List[Any]] = {}
+    total = 0
+    for path in list_parts(directory):
+        part = _read_part(path, to_read)
+        rows = len(next(iter(part.values()))) if part else 0
+        # 列集合在分片之间变化时（推荐字段调整过），缺少的部分以 None 填充
+        for name in part:
+            merged.setdefault(name, [None] * total)
+        for name, values in merged.items():
+            values.extend(part.get(name, [None] * rows))
+        total += rows
+
+    if latest_only and merged.get('id'):
+        last_row = {row_id: index for index, row_id in enumerate(merged['id'])}
+        if len(last_row) < len(merged['id']):
+            keep = sorted(last_row.values())
+            merged = {name: [values[index] for index in keep] for name, values in merged.items()}
+    if requested is not None:
+        merged = {name: merged.get(name, []) for name in requested}
+    return merged
+
+
+class ColumnarExporter:
+    """按行缓冲、按分片追加写出的列式导出器"""
+
+    def __init__(self, directory: Path, fields: Sequence[str], export_format: str = 'auto',
+                 part_rows: int = 1000):
+        self.directory = Path(directory)
+        self.format = resolve_format(export_format)
+        self.schema = schema_for(fields)
+        self.part_rows = max(1, part_rows)
+        self._rows: List[Dict[str, Any]] = []
+        parts = list_parts(self.directory)
+        self._next_part = int(PART_PATTERN.match(parts[-1].name).group(1)) + 1 if parts else 1
+        self.rows_written = 0
+        self.parts_written = 0
+        self.bytes_written = 0
+
+    def append(self, row: Dict[str, Any]):
+        """追加一行；缓冲满 part_rows 行时写出一个分片"""
+        self._rows.append(row)
+        if len(self._rows) >= self.part_rows:
+            self.flush()
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        """把缓冲的行写成一个新分片"""
+        if not self._rows:
+            return
+        columns = {name: [row.get(name, MISSING[kind]) for row in self._rows] for name, kind in self.schema}
+        for name, kind in self.schema:
+            if kind == 'string':
+                columns[name] = [value if isinstance(value, str) else _to_string(value) for value in columns[name]]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"part-{self._next_part:05d}.{self.format}"
+        _write_part(path, self.schema, columns)
+        self._next_part += 1
+        self.rows_written += len(self._rows)
+        self.parts_written += 1
+        self.bytes_written += path.stat().st_size
+        self._rows.clear()
+
+    def close(self):
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'format': self.format,
+            'directory': str(self.directory),
+            'rows': self.rows_written,
+            'parts': self.parts_written,
+            'bytes': self.bytes_written,
+        }
+
+
+def export_records(records: Iterable[Dict[str, Any]], directory: Path, fields: Sequence[str],
+                   export_format: str = 'auto', part_rows: int = 1000, replace: bool = True) -> Dict[str, Any]:
+    """把已有的处理结果（如 processed_articles.jsonl）逐条导出；replace 时先删除已有分片"""
+    if replace:
+        for path in list_parts(directory):
+            path.unlink()
+    exporter = ColumnarExporter(directory, fields, export_format, part_rows)
+    exporter.extend(article_features(record, fields) for record in records)
+    exporter.close()
+    return exporter.stats()
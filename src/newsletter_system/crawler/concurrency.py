@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+自适应并发控制（AIMD）。
+
+职责概览：
+- 维护一个在 [min_limit, max_limit] 之间浮动的并发上限，`slot()` 在在途数达到上限时等待。
+- 加性增：健康响应每累计 `limit` 次，上限 +1（约每“一轮”在途请求加一）。
+- 乘性减：遇到 429、限流页面、Cloudflare 校验，或渲染延迟 EWMA 超过基线的若干倍时，
+  上限乘以 decrease_factor；冷却期内的重复信号只计数不重复下调，避免同一波在途请求把上限打到底。
+- 限流类信号同时设置共享退避截止时间（指数增长，封顶 max_backoff），所有任务在 `wait_backoff()` 处统一等待。
+- 每次上限调整记录为时间序列，随爬取统计输出。
+
+使用示例：
+    controller = AdaptiveConcurrencyController(initial=2, max_limit=5)
+    async with controller.slot():
+        await controller.wait_backoff()
+        started = time.monotonic()
+        ...
+        controller.record_success(time.monotonic() - started)
+    controller.record_throttle('http_429')
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrencyController:
+    """按限流/延迟信号调整在途并发的 AIMD 控制器"""
+
+    def __init__(self,
+                 initial: int,
+                 max_limit: int,
+                 min_limit: int = 1,
+                 decrease_factor: float = 0.5,
+                 latency_factor: float = 2.0,
+                 cooldown: float = 5.0,
+                 base_backoff: float = 0.5,
+                 max_backoff: float = 30.0,
+                 history_size: int = 500):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.in_flight = 0
+        self.pause_until = 0.0
+        self._consecutive_throttles = 0
+        self._last_decrease = float('-inf')
+        self._latency_ewma: Optional[float] = None
+        self._latency_baseline: Optional[float] = None
+        self._latency_samples = 0
+        self._cond = asyncio.Condition()
+        self._wakeups = set()             # 上限提高后唤醒等待者的任务（保持引用直到完成）
+        self._started = time.monotonic()
+        self.history = deque(maxlen=history_size)
+        self.counters: Dict[str, Any] = {
+            'successes': 0,
+            'increases': 0,
+            'decreases': 0,
+            'signals': {},
+        }
+        self._record('start')
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def set_max_limit(self, max_limit: int):
+        """按实际可用资源（如页面池上限）收紧上限"""
+        self.max_limit = max(self.min_limit, max_limit)
+        if self._limit > self.max_limit:
+            self._limit = float(self.max_limit)
+            self._record('max_limit')
+
+    @asynccontextmanager
+    async def slot(self):
+        """占用一个并发名额，在途数达到当前上限时等待"""
+        async with self._cond:
+            while self.in_flight >= self.limit:
+                await self._cond.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    async def wait_backoff(self):
+        """限流退避期间等待"""
+        pause = self.pause_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    def record_success(self, latency: Optional[float] = None):
+        """健康响应：加性增；延迟持续恶化时按延迟信号下调"""
+        self.counters['successes'] += 1
+        self._consecutive_throttles = 0
+        if latency is not None and self._latency_degraded(latency):
+            self._decrease('latency')
+            return
+        if self._limit < self.max_limit:
+            before = self.limit
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / max(1, self.limit))
+            if self.limit > before:
+                self.counters['increases'] += 1
+                self._record('increase')
+                # 新增的名额立即分给等待者，而不是等到下一次名额释放
+                self._notify_waiters(self.limit - before)
+
+    def _notify_waiters(self, count: int):
+        """同步调用方无法持有 Condition 的锁，由事件循环中的小任务代为 notify"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        async def wake():
+            async with self._cond:
+                self._cond.notify(count)
+
+        task = loop.create_task(wake())
+        self._wakeups.add(task)
+        task.add_done_callback(self._wakeups.discard)
+
+    def record_throttle(self, reason: str):
+        """限流/人机校验信号：乘性减，并设置共享指数退避"""
+        self._consecutive_throttles += 1
+        delay = min(self.max_backoff, self.base_backoff * (2 ** self._consecutive_throttles))
+        self.pause_until = max(self.pause_until, time.monotonic() + delay)
+        logger.warning(f"检测到限流信号（{reason}），并发上限 {self.limit}，暂停 {delay:.1f} 秒")
+        self._decrease(reason)
+
+    def stats(self) -> Dict[str, Any]:
+        """当前上限、调整计数、延迟统计与调整时间序列"""
+        return {
+            'limit': self.limit,
+            'min_limit': self.min_limit,
+            'max_limit': self.max_limit,
+            'in_flight': self.in_flight,
+            'latency_ewma': round(self._latency_ewma, 3) if self._latency_ewma is not None else None,
+            'latency_baseline': round(self._latency_baseline, 3) if self._latency_baseline is not None else None,
+            **self.counters,
+            'history': list(self.history),
+        }
+
+    def _latency_degraded(self, latency: float) -> bool:
+        alpha = 0.2
+        self._latency_samples += 1
+        self._latency_ewma = latency if self._latency_ewma is None else (
+            alpha * latency + (1 - alpha) * self._latency_ewma)
+        # 前几次样本只用于建立基线
+        if self._latency_samples < 5:
+            return False
+        if self._latency_baseline is None or self._latency_ewma < self._latency_baseline:
+            self._latency_baseline = self._latency_ewma
+            return False
+        return self._latency_ewma > self._latency_baseline * self.latency_factor
+
+    def _decrease(self, reason: str):
+        signals = self.counters['signals']
+        signals[reason] = signals.get(reason, 0) + 1
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        new_limit = max(float(self.min_limit), float(int(self._limit * self.decrease_factor)))
+        if new_limit < self._limit:
+            self._limit = new_limit
+            self.counters['decreases'] += 1
+            self._record(reason)
+        # 下调后以当前水平重新建立延迟基线
+        self._latency_baseline = self._latency_ewma
+
+    def _record(self, reason: str):
+        self.history.append({
+            't': round(time.monotonic() - self._started, 3),
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'reason': reason,
+        })
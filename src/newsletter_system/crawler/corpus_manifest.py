@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+已爬取文章的 SQLite 清单（`data/manifest.sqlite3`）。
+
+职责概览：
+- 每篇文章一行：id、文章目录（相对输出目录）、标题/slug/发布时间、content_hash、图片数与总字节数、
+  processed_date、最近一次内容变化的时间（updated_at）以及上传状态；图片（路径、URL、sha256、大小）
+  单独成表。下游按 id / 目录 / 图片 hash / 变化时间 / 上传状态查询都走索引，不再遍历文章目录并逐个
+  读取 `metadata.json`。
+- 每篇文章写盘后在一个事务中更新（文章行与图片行一起提交）。content_hash 与图片都没变时只刷新
+  processed_date，updated_at 与上传状态保持不变；有变化时 updated_at 更新，上传状态回到 pending。
+- WAL 模式 + synchronous=NORMAL：提交不逐次 fsync，崩溃最多丢失最近的几次提交，
+  下次处理同一文章时会重新写入（写入是幂等的 upsert）。
+- 清单首次创建时可由已有的 `metadata.json` 一次性回填（`rebuild_from_disk`）。
+
+上传状态：'pending'（新建或内容有变化）、'uploaded'、'failed'。上传器通过 `list_by_upload_state()`
+取待上传文章，完成后调用 `mark_uploaded()` / `mark_upload_failed()`。
+
+使用示例：
+    manifest = CorpusManifest(data_dir / "manifest.sqlite3")
+    manifest.record_article(123, "articles/123_title", content_hash, images, processed_date)
+    for article in manifest.list_changed_since(last_run):
+        ...
+    manifest.close()
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+UPLOAD_STATES = ('pending', 'uploaded', 'failed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id              INTEGER PRIMARY KEY,
+    directory       TEXT NOT NULL,
+    slug            TEXT,
+    title           TEXT,
+    post_date       TEXT,
+    content_hash    TEXT,
+    image_count     INTEGER NOT NULL DEFAULT 0,
+    image_bytes     INTEGER NOT NULL DEFAULT 0,
+    processed_date  TEXT,
+    updated_at      REAL NOT NULL,
+    upload_state    TEXT NOT NULL DEFAULT 'pending',
+    uploaded_at     REAL,
+    uploaded_hash   TEXT,
+    upload_error    TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_directory ON articles(directory);
+CREATE INDEX IF NOT EXISTS idx_articles_updated_at ON articles(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_articles_upload_state ON articles(upload_state, updated_at);
+
+CREATE TABLE IF NOT EXISTS images (
+    article_id  INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+    path        TEXT NOT NULL,
+    role        TEXT NOT NULL,
+    url         TEXT,
+    sha256      TEXT,
+    size        INTEGER,
+    PRIMARY KEY (article_id, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_images_sha256 ON images(sha256);
+"""
+
+
+def _timestamp(value: Union[float, int, datetime, str]) -> float:
+    """Unix 时间戳、datetime 或 ISO 8601 字符串转为 Unix 时间戳"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    return float(value)
+
+
+def article_images(cover_image_info: Optional[Dict[str, Any]], local_images: Iterable[Dict[str, Any]],
+                   cover_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """由 metadata 中的封面与正文图片信息生成清单的图片行"""
+    images = []
+    if cover_image_info and cover_image_info.get('path'):
+        images.append({'path': cover_image_info['path'], 'role': 'cover', 'url': cover_url,
+                       'sha256': cover_image_info.get('hash'), 'size': cover_image_info.get('size')})
+    for image in local_images or ():
+        if image.get('local_path'):
+            images.append({'path': image['local_path'], 'role': 'content', 'url': image.get('original_url'),
+                           'sha256': image.get('hash'), 'size': image.get('size')})
+    return images
+
+
+class CorpusManifest:
+    """文章清单（SQLite）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.created = not self.path.exists()
+        # 连接只在事件循环或被 await 的单个线程中使用，不会并发访问
+        self._conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"Manifest schema version {version} is newer than supported ({SCHEMA_VERSION})")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+        self.counters = {'recorded': 0, 'changed': 0, 'unchanged': 0}
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def record_article(self, article_id: int, directory: str, content_hash: Optional[str],
+                       images: Sequence[Dict[str, Any]], processed_date: Optional[str] = None,
+                       title: Optional[str] = None, slug: Optional[str] = None,
+                       post_date: Optional[str] = None) -> bool:
+        """写入或更新一篇文章（单个事务）；返回内容（正文 hash 或图片）是否有变化"""
+        with self._transaction() as conn:
+            changed = self._record(conn, article_id, directory, content_hash, images, processed_date,
+                                   title, slug, post_date)
+        self.counters['recorded'] += 1
+        self.counters['changed' if changed else 'unchanged'] += 1
+        return changed
+
+    def _record(self, conn: sqlite3.Connection, article_id: int, directory: str, content_hash: Optional[str],
+                images: Sequence[Dict[str, Any]], processed_date: Optional[str], title: Optional[str],
+                slug: Optional[str], post_date: Optional[str]) -> bool:
+        image_rows = sorted({image['path']: image for image in images}.values(), key=lambda image: image['path'])
+        signature = [(image['path'], image.get('sha256')) for image in image_rows]
+        now = time.time()
+        existing = conn.execute('SELECT content_hash FROM articles WHERE id = ?', (article_id,)).fetchone()
+        changed = (existing is None or existing['content_hash'] != content_hash
+                   or signature != [(row['path'], row['sha256']) for row in conn.execute(
+                       'SELECT path, sha256 FROM images WHERE article_id = ? ORDER BY path', (article_id,))])
+        # 目录名随标题变化时，旧目录可能仍被另一条记录占用（同一目录只属于一篇文章）
+        conn.execute('DELETE FROM articles WHERE directory = ? AND id != ?', (directory, article_id))
+        values = {
+            'id': article_id, 'directory': directory, 'slug': slug, 'title': title, 'post_date': post_date,
+            'content_hash': content_hash, 'image_count': len(image_rows),
+            'image_bytes': sum(image.get('size') or 0 for image in image_rows),
+            'processed_date': processed_date, 'updated_at': now,
+        }
+        if existing is None:
+            conn.execute(f"INSERT INTO articles ({', '.join(values)}) VALUES ({', '.join(['?'] * len(values))})",
+                         tuple(values.values()))
+        elif changed:
+            conn.execute("""UPDATE articles SET directory = :directory, slug = :slug, title = :title,
+                            post_date = :post_date, content_hash = :content_hash, image_count = :image_count,
+                            image_bytes = :image_bytes, processed_date = :processed_date,
+                            updated_at = :updated_at, upload_state = 'pending', upload_error = NULL
+                            WHERE id = :id""", values)
+        else:
+            conn.execute("""UPDATE articles SET directory = :directory, slug = :slug, title = :title,
+                            post_date = :post_date, image_bytes = :image_bytes,
+                            processed_date = :processed_date WHERE id = :id""", values)
+        conn.execute('DELETE FROM images WHERE article_id = ?', (article_id,))
+        conn.executemany(
+            'INSERT INTO images (article_id, path, role, url, sha256, size) VALUES (?, ?, ?, ?, ?, ?)',
+            [(article_id, image['path'], image.get('role', 'content'), image.get('url'),
+              image.get('sha256'), image.get('size')) for image in image_rows])
+        return changed
+
+    def get(self, article_id: int, with_images: bool = True) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute('SELECT * FROM articles WHERE id = ?', (article_id,)).fetchone()
+        return self._article(row, with_images)
+
+    def find_by_directory(self, directory: str, with_images: bool = True) -> Optional[Dict[str, Any]]:
+        """按文章目录（相对输出目录，如 articles/123_title）查找"""
+        row = self._conn.execute('SELECT * FROM articles WHERE directory = ?', (directory,)).fetchone()
+        return self._article(row, with_images)
+
+    def find_images_by_hash(self, sha256: str) -> List[Dict[str, Any]]:
+        """引用同一图片内容的全部文章图片"""
+        return [dict(row) for row in self._conn.execute('SELECT * FROM images WHERE sha256 = ?', (sha256,))]
+
+    def list_changed_since(self, since: Union[float, datetime, str], limit: Optional[int] = None,
+                           with_images: bool = False) -> List[Dict[str, Any]]:
+        """内容在 since（Unix 时间戳、datetime 或 ISO 8601）之后有变化的文章，按变化时间排序"""
+        query = 'SELECT * FROM articles WHERE updated_at > ? ORDER BY updated_at, id'
+        params: List[Any] = [_timestamp(since)]
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return [self._article(row, with_images) for row in self._conn.execute(query, params)]
+
+    def list_by_upload_state(self, state: str = 'pending', limit: Optional[int] = None,
+                             with_images: bool = False) -> List[Dict[str, Any]]:
+        """处于某个上传状态的文章，按变化时间排序"""
+        query = 'SELECT * FROM articles WHERE upload_state = ? ORDER BY updated_at, id'
+        params: List[Any] = [state]
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return [self._article(row, with_images) for row in self._conn.execute(query, params)]
+
+    def mark_uploaded(self, article_ids: Iterable[int], uploaded_at: Optional[float] = None):
+        """标记为已上传，并记下上传时的 content_hash"""
+        uploaded_at = time.time() if uploaded_at is None else uploaded_at
+        with self._transaction() as conn:
+            conn.executemany("""UPDATE articles SET upload_state = 'uploaded', uploaded_at = ?,
+                                uploaded_hash = content_hash, upload_error = NULL WHERE id = ?""",
+                             [(uploaded_at, article_id) for article_id in article_ids])
+
+    def mark_upload_failed(self, article_ids: Iterable[int], error: str):
+        with self._transaction() as conn:
+            conn.executemany("UPDATE articles SET upload_state = 'failed', upload_error = ? WHERE id = ?",
+                             [(error, article_id) for article_id in article_ids])
+
+    def remove(self, article_id: int):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM articles WHERE id = ?', (article_id,))
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def __contains__(self, article_id: int) -> bool:
+        return self._conn.execute('SELECT 1 FROM articles WHERE id = ?', (article_id,)).fetchone() is not None
+
+    def rebuild_from_disk(self, output_dir: Path, articles_dir: Path) -> int:
+        """由文章目录中已有的 metadata.json 回填清单（一次事务），返回回填的文章数"""
+        output_dir, articles_dir = Path(output_dir), Path(articles_dir)
+        if not articles_dir.is_dir():
+            return 0
+        count = 0
+        with self._transaction() as conn:
+            for metadata_path in sorted(articles_dir.glob('*/metadata.json')):
+                try:
+                    with open(metadata_path, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+                    article_id = int(metadata['id'])
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"跳过无法读取的元数据 {metadata_path}: {e}")
+                    continue
+                cover = metadata.get('cover_image')
+                images = article_images(cover if isinstance(cover, dict) else None, metadata.get('local_images'))
+                self._record(conn, article_id, str(metadata_path.parent.relative_to(output_dir)),
+                             metadata.get('content_hash'), images, metadata.get('processed_date'),
+                             metadata.get('title'), metadata.get('slug'), metadata.get('post_date'))
+                count += 1
+        return count
+
+    def _article(self, row: Optional[sqlite3.Row], with_images: bool) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        article = dict(row)
+        if with_images:
+            article['images'] = [dict(image) for image in self._conn.execute(
+                'SELECT path, role, url, sha256, size FROM images WHERE article_id = ? ORDER BY path', (row['id'],))]
+        return article
+
+    def stats(self) -> Dict[str, Any]:
+        states = dict(self._conn.execute('SELECT upload_state, COUNT(*) FROM articles GROUP BY upload_state'))
+        articles, image_bytes = self._conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(image_bytes), 0) FROM articles').fetchone()
+        return {
+            'path': str(self.path),
+            'articles': articles,
+            'images': self._conn.execute('SELECT COUNT(*) FROM images').fetchone()[0],
+            'image_bytes': image_bytes,
+            'upload_states': {state: states.get(state, 0) for state in UPLOAD_STATES},
+            **self.counters,
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE … COMMIT，异常时回滚"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+条件请求（ETag / Last-Modified）的校验信息与统计。
+
+职责概览：
+- 图片的校验信息随图片索引记在断点续传进度中（见 `ProgressTracker.record_image`），不在这里重复保存。
+- `ConditionalCache` 保存页面的校验信息：文章地址 -> 上次响应的 ETag、Last-Modified、Content-Length
+  与正文副本位置。正文（抽取后的 HTML）保存在 `data/page_cache/` 下，304 时读回。
+- 持久化方式与进度相同：快照 `data/http_cache.json` + 追加式日志 `data/http_cache.journal`，
+  每次更新只追加一个事件，`checkpoint()` 落盘（fsync），日志超过快照规模时才整文件重写。
+- `RevalidationStats` 按类别（图片/页面）累计条件请求次数，以及 304 节省的字节数与时间
+  （上次获取耗时减去本次往返耗时）。
+
+使用示例：
+    cache = ConditionalCache.open(data_dir / "http_cache.json", data_dir / "page_cache")
+    headers = conditional_headers(cache.get(url))
+    ...
+    if response.status == 304:
+        stats.record_request('page', True, cache.get(url), elapsed)
+    else:
+        cache.update(url, response.headers, elapsed, body=..., size=...)
+    cache.checkpoint()
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from .progress_journal import ProgressJournal
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('image', 'page')
+
+
+def validator_fields(headers: Mapping[str, str], elapsed: float) -> Optional[Dict[str, Any]]:
+    """响应头中的校验信息；既无 ETag 也无 Last-Modified 时返回 None"""
+    headers = {name.lower(): value for name, value in headers.items()}
+    etag, last_modified = headers.get('etag'), headers.get('last-modified')
+    if not etag and not last_modified:
+        return None
+    content_length = headers.get('content-length')
+    return {
+        'etag': etag,
+        'last_modified': last_modified,
+        'content_length': int(content_length) if content_length and content_length.isdigit() else None,
+        'elapsed': round(elapsed, 3),
+    }
+
+
+def conditional_headers(entry: Optional[Mapping[str, Any]]) -> Dict[str, str]:
+    """记录中的校验信息对应的条件请求头（没有记录时为空）"""
+    entry = entry or {}
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+class RevalidationStats:
+    """条件请求统计"""
+
+    def __init__(self):
+        self.counters = {
+            kind: {'conditional_requests': 0, 'not_modified': 0, 'modified': 0,
+                   'bytes_saved': 0, 'seconds_saved': 0.0}
+            for kind in KINDS
+        }
+
+    def record_request(self, kind: str, not_modified: bool, entry: Optional[Mapping[str, Any]] = None,
+                       elapsed: float = 0.0):
+        """统计一次条件请求；304 时按发请求所依据的记录累计节省的字节数与时间"""
+        counters = self.counters[kind]
+        counters['conditional_requests'] += 1
+        if not not_modified:
+            counters['modified'] += 1
+            return
+        counters['not_modified'] += 1
+        entry = entry or {}
+        counters['bytes_saved'] += entry.get('content_length') or entry.get('size') or 0
+        counters['seconds_saved'] += max(0.0, (entry.get('elapsed') or 0.0) - elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        summary = {kind: {**counters, 'seconds_saved': round(counters['seconds_saved'], 3)}
+                   for kind, counters in self.counters.items()}
+        summary['bytes_saved'] = sum(self.counters[kind]['bytes_saved'] for kind in KINDS)
+        summary['seconds_saved'] = round(sum(self.counters[kind]['seconds_saved'] for kind in KINDS), 3)
+        return summary
+
+
+class ConditionalCache:
+    """页面响应校验信息缓存（快照 + 追加式日志）"""
+
+    def __init__(self, path: Path, body_dir: Path, journal: Optional[ProgressJournal] = None,
+                 compact_min_events: int = 1000):
+        self.path = Path(path)
+        self.body_dir = Path(body_dir)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.journal = journal
+        self.compact_min_events = compact_min_events  # 日志至少积累这么多事件才压缩
+
+    @classmethod
+    def open(cls, path: Path, body_dir: Path, fsync_every: int = 64,
+             compact_min_events: int = 1000) -> 'ConditionalCache':
+        """加载快照并重放同名 .journal 日志，之后的变化追加到日志；文件损坏时从空缓存开始"""
+        path = Path(path)
+        cache = cls(path, body_dir, ProgressJournal(path.with_suffix('.journal'), fsync_every=fsync_every),
+                    compact_min_events)
+        legacy = False
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f).get('entries', {})
+                # 旧版本同时保存了图片记录（现在随进度保存），只保留页面
+                cache.entries = {key: entry for key, entry in entries.items() if entry.get('kind', 'page') == 'page'}
+                legacy = len(entries) > len(cache.entries)
+            except (OSError, ValueError) as e:
+                logger.warning(f"条件请求缓存读取失败，忽略: {e}")
+        for event in cache.journal.replay():
+            if event.get('op') == 'update':
+                cache.entries[event['key']] = event['entry']
+            elif event.get('op') == 'forget':
+                cache.entries.pop(event['key'], None)
+        if legacy:
+            cache.compact()
+        return cache
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def forget(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self._log({'op': 'forget', 'key': key})
+        if entry.get('body'):
+            body_path = self.body_dir / entry['body']
+            if body_path.exists():
+                body_path.unlink()
+
+    def update(self, key: str, headers: Mapping[str, str], elapsed: float,
+               url: Optional[str] = None, **fields: Any) -> bool:
+        """记录一次完整响应的校验信息；响应既无 ETag 也无 Last-Modified 时删除记录并返回 False"""
+        validators = validator_fields(headers, elapsed)
+        if validators is None:
+            self.forget(key)
+            return False
+        entry = {'kind': 'page', 'url': url or key, **validators, **fields}
+        self.entries[key] = entry
+        self._log({'op': 'update', 'key': key, 'entry': entry})
+        return True
+
+    def body_path(self, key: str) -> Path:
+        return self.body_dir / (hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '.html')
+
+    def _log(self, event: Dict[str, Any]):
+        if self.journal is not None:
+            self.journal.append(event)
+
+    def checkpoint(self):
+        """日志落盘（fsync）；日志事件数超过快照规模时压缩为新快照"""
+        if self.journal is None:
+            self.save()
+            return
+        self.journal.flush()
+        if self.journal.events >= max(self.compact_min_events, len(self.entries)):
+            self.compact()
+
+    def compact(self):
+        """把当前记录写成快照并清空日志"""
+        self.save()
+        if self.journal is not None:
+            self.journal.reset()
+
+    def close(self):
+        """结束时落盘；有未压缩的日志时压缩，下次启动只需读快照"""
+        if self.journal is None:
+            self.save()
+        elif self.journal.events:
+            self.compact()
+
+    def save(self):
+        """整文件保存快照（临时文件 + fsync + 原子替换）"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self.entries}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self.entries),
+            'journal': self.journal.stats() if self.journal is not None else None,
+        }
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+内容寻址图片库。
+
+职责概览：
+- 按 SHA-256 保存每张图片唯一的一份（`<root>/<hash 前两位>/<hash>`），不同 URL、
+  不同文章下载到相同内容时只占一份磁盘空间。
+- 文章目录中的 `images/img_x.ext` 以硬链接指向库中文件；文件系统不支持硬链接（跨设备、
+  权限等）时退回复制（保留 mtime，续传时的 hash 索引仍然有效）。
+- 文章目录里始终是普通文件，下游（OSS 上传、人工浏览）无需感知图片库。
+
+使用示例：
+    store = ContentAddressedImageStore(output_dir / "images" / "by-hash")
+    blob = store.adopt(tmp_path, file_hash)      # 下载完成的临时文件入库（已存在则丢弃）
+    store.link(blob, article_dir / "images" / "img_0.png")
+"""
+
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class ContentAddressedImageStore:
+    """按内容 hash 去重的图片库"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.counters = {
+            'blobs_added': 0,
+            'dedup_hits': 0,
+            'bytes_deduplicated': 0,
+            'hardlinks': 0,
+            'copies': 0,
+        }
+
+    def blob_path(self, file_hash: str) -> Path:
+        return self.root / file_hash[:2] / file_hash
+
+    def contains(self, file_hash: str) -> bool:
+        return self.blob_path(file_hash).exists()
+
+    def adopt(self, tmp_path: Path, file_hash: str) -> Path:
+        """把下载完成的临时文件移入库中；相同内容已存在时删除临时文件"""
+        blob = self.blob_path(file_hash)
+        if blob.exists():
+            self.counters['dedup_hits'] += 1
+            self.counters['bytes_deduplicated'] += tmp_path.stat().st_size
+            tmp_path.unlink()
+            return blob
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, blob)
+        self.counters['blobs_added'] += 1
+        return blob
+
+    def discard(self, file_hash: str):
+        """删除内容已损坏的库文件（与之硬链接的文章文件同样损坏），之后重新下载时重新入库"""
+        blob = self.blob_path(file_hash)
+        if blob.exists():
+            blob.unlink()
+
+    def link(self, source: Path, dest: Path):
+        """让 dest 指向 source 的内容：优先硬链接，失败时复制；dest 已存在则原子替换"""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() and os.path.samefile(source, dest):
+            return
+        # 临时名唯一，多个线程同时放置同一文件时互不干扰
+        tmp_dest = dest.with_name(f"{dest.name}.{uuid.uuid4().hex[:8]}.link")
+        try:
+            os.link(source, tmp_dest)
+            self.counters['hardlinks'] += 1
+        except OSError as e:
+            logger.debug(f"硬链接失败，改为复制 {source} -> {dest}: {e}")
+            shutil.copy2(source, tmp_dest)
+            self.counters['copies'] += 1
+        os.replace(tmp_dest, dest)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'root': str(self.root), **self.counters}
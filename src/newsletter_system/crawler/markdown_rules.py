@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Markdown 正文清理规则。
+
+职责概览：
+- 把“正文开头跳过哪些 UI 文本、正文中删除哪些行”描述为按来源划分的声明式规则集
+  （`MarkdownRuleset`），构造时编译为组合正则，此后每篇文章直接套用。
+- 开头阶段逐行寻找正文起点（通常只有几行）；正文阶段对剩余文本只做一次组合正则扫描，
+  命中删除词语的整行、或恰好是导航文本的整行被删除，不再对每一行反复执行 `any(word in line ...)`。
+- 规则集可 pickle（编译结果随对象一起传给转换进程），`RULESETS` 按名字登记内置来源。
+- 清理结果与原先逐行检查的实现逐字节一致。
+
+使用示例：
+    ruleset = get_ruleset('substack')
+    body = ruleset.clean(content_markdown)
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class MarkdownRuleset:
+    """一个来源的 Markdown 清理规则"""
+    name: str
+    # 开头阶段：strip 后长度超过 min_content_length 且不含 leading_skip_words 的行视为正文起点
+    leading_skip_words: List[str] = field(default_factory=list)
+    min_content_length: int = 20
+    # 开头阶段：以 heading_prefix 开头且不含 heading_skip_words 的标题行也视为正文起点
+    heading_prefix: Optional[str] = '## '
+    heading_skip_words: List[str] = field(default_factory=list)
+    # 开头阶段：以这些前缀开头的行（如论文编号）也视为正文起点
+    start_prefixes: List[str] = field(default_factory=list)
+    # 正文阶段：含这些词的行、strip 后恰好等于 body_skip_lines 的行被删除
+    body_skip_words: List[str] = field(default_factory=list)
+    body_skip_lines: List[str] = field(default_factory=list)
+    # 找不到正文起点时：保留不含这些词的非空行
+    fallback_skip_words: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._leading_re = self._compile_words(self.leading_skip_words)
+        self._heading_skip_re = self._compile_words(self.heading_skip_words)
+        self._start_prefixes = tuple(self.start_prefixes)
+        self._fallback_re = self._compile_words(self.fallback_skip_words)
+        # 正文阶段的组合正则：删除词语在前（同一位置优先命中），导航文本命中后再核对整行
+        self._body_words = frozenset(self.body_skip_words)
+        self._body_lines = frozenset(self.body_skip_lines)
+        self._body_re = self._compile_words(self.body_skip_words + self.body_skip_lines)
+
+    @staticmethod
+    def _compile_words(words: List[str]):
+        if not words:
+            return None
+        return re.compile('|'.join(map(re.escape, words)))
+
+    def clean(self, content_markdown: str) -> str:
+        """清理掉文章开头的分享按钮、订阅信息等非正文内容，以及正文中的 UI 元素"""
+        # 开头阶段：定位正文起点所在行
+        start = self._find_start(content_markdown)
+        if start is None:
+            return self._fallback(content_markdown)
+
+        # 起点行本身无条件保留，其后的文本交给正文阶段
+        line_end = content_markdown.find('\n', start)
+        if line_end == -1:
+            return content_markdown[start:].strip()
+        return (content_markdown[start:line_end + 1] + self._drop_body_lines(content_markdown[line_end + 1:])).strip()
+
+    def _find_start(self, content_markdown: str) -> Optional[int]:
+        """返回正文起点行的起始下标"""
+        offset = 0
+        for line in content_markdown.split('\n'):
+            stripped_line = line.strip()
+            # 1. 有实质内容（长度超过阈值且不是UI元素）
+            if len(stripped_line) > self.min_content_length and not (
+                    self._leading_re and self._leading_re.search(stripped_line)):
+                return offset
+            # 2. 或者检测到标题
+            if self.heading_prefix and stripped_line.startswith(self.heading_prefix) and not (
+                    self._heading_skip_re and self._heading_skip_re.search(stripped_line)):
+                return offset
+            # 3. 或者检测到论文标题编号
+            if self._start_prefixes and stripped_line.startswith(self._start_prefixes):
+                return offset
+            offset += len(line) + 1
+        return None
+
+    def _drop_body_lines(self, text: str) -> str:
+        """一次扫描删除命中规则的整行"""
+        if self._body_re is None or not text:
+            return text
+        parts = []
+        kept_from = 0
+        search_from = 0
+        while True:
+            match = self._body_re.search(text, search_from)
+            if match is None:
+                break
+            line_start = text.rfind('\n', 0, match.start()) + 1
+            line_end = text.find('\n', match.end())
+            if match.group() not in self._body_words:
+                # 导航文本只有整行（去掉首尾空白后）恰好相等才删除；否则从下一个字符继续找
+                line = text[line_start:line_end if line_end != -1 else len(text)]
+                if line.strip() not in self._body_lines:
+                    search_from = match.start() + 1
+                    continue
+            parts.append(text[kept_from:line_start])
+            if line_end == -1:
+                kept_from = len(text)
+                break
+            # 连同换行符一起删除，下一行从头开始匹配
+            kept_from = search_from = line_end + 1
+        parts.append(text[kept_from:])
+        return ''.join(parts)
+
+    def _fallback(self, content_markdown: str) -> str:
+        """没有找到正文起点时，保留所有不是UI元素的非空行"""
+        if not content_markdown:
+            return ''
+        cleaned_lines = [
+            line for line in content_markdown.split('\n')
+            if line.strip() and not (self._fallback_re and self._fallback_re.search(line))
+        ]
+        return '\n'.join(cleaned_lines).strip()
+
+
+# Substack 页面转换后常见的分享、订阅与导航文本
+SUBSTACK_RULES = MarkdownRuleset(
+    name='substack',
+    leading_skip_words=['Share this post', 'Copy link', 'Facebook', 'Email', 'Discover more from',
+                        'Subscribe', 'Notes', 'More', 'Already have an account'],
+    heading_skip_words=['Share this post'],
+    start_prefixes=['1).', '1.'],
+    body_skip_words=['Share this post', 'Copy link', 'Facebook', 'Email',
+                     'Discover more from', 'Subscribe', 'Already have an account'],
+    body_skip_lines=['Notes', 'More', 'Share', '[Share](javascript:void(0))'],
+    fallback_skip_words=['Share this post', 'Copy link', 'Facebook', 'Email',
+                         'Discover more from', 'Subscribe', 'Notes', 'More',
+                         'Already have an account', '[Share](javascript:void(0))'],
+)
+
+RULESETS: Dict[str, MarkdownRuleset] = {
+    SUBSTACK_RULES.name: SUBSTACK_RULES,
+}
+
+
+def get_ruleset(name: str) -> MarkdownRuleset:
+    """按名字取内置规则集"""
+    try:
+        return RULESETS[name]
+    except KeyError:
+        raise ValueError(f"Unknown markdown ruleset: {name}") from None
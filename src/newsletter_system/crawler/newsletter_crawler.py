@@ -7,7 +7,13 @@ Newsletter 爬虫核心模块。
 - 使用 Playwright 渲染页面并抽取正文 HTML，再按需转为 Markdown。
 - 并发下载封面与正文内图片，替换正文中的图片引用为相对路径。
 - 生成每篇文章的 `content.md` 与 `metadata.json`，并输出全量统计。
-- 通过 `ProgressTracker` 实现断点续传（记录已处理文章、失败原因、已下载图片）。
+- 每篇文章完成即追加到 `processed_articles.jsonl` / `recommendation_data.jsonl`（可选 gzip），
+  结束时流式生成原先的 JSON 数组文件，全程不在内存中累积文章内容。
+- 可选的列式导出（`data/features/`，Parquet 或 npz 分片）：推荐字段加派生数值特征，按分片增量追加。
+- `CorpusManifest` 在 `data/manifest.sqlite3` 中维护文章清单（目录、content_hash、图片、上传状态），
+  每篇文章写盘后事务更新，供上传/索引按 id 或变化时间查询而无需遍历文章目录。
+- 通过 `ProgressTracker` 实现断点续传（记录已处理文章、失败原因、已下载图片）；变化追加到进度日志，
+  定期压缩为快照。
 
 实现要点：
 - 网络层：使用 `aiohttp` 统一请求与超时控制；图片下载单独限流。
@@ -24,14 +30,18 @@ Newsletter 爬虫核心模块。
 """
 import asyncio
 import json
+import os
 import re
 import hashlib
+import multiprocessing
+import shutil
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Tuple, Union
 from urllib.parse import urljoin, urlparse
 import logging
-from functools import wraps
+from functools import partial
 import time
 from dataclasses import dataclass, field
 from asyncio import Semaphore
@@ -66,6 +76,12 @@ except ImportError:
     BS4_AVAILABLE = False
     print("警告: beautifulsoup4 未安装，请运行 'pip install beautifulsoup4' 安装")
 
+try:
+    import lxml  # noqa: F401  # BeautifulSoup 的快速解析后端
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
 try:
     from markdownify import markdownify as md
     MARKDOWNIFY_AVAILABLE = True
@@ -81,10 +97,97 @@ except ImportError:
     # 仅提示，不阻断功能
     print("警告: tqdm 未安装，请运行 'pip install tqdm' 安装")
 
+from ..utils.file_utils import JsonlWriter, load_json, sha256_file, write_json_array_from_jsonl
+from . import transform
+from .columnar_export import ColumnarExporter, article_features, list_parts
+from .compact_sets import CompactIdSet, ImageIndex, UrlDigestSet
+from .corpus_manifest import CorpusManifest, article_images as manifest_images
+from .concurrency import AdaptiveConcurrencyController
+from .http_cache import ConditionalCache, RevalidationStats, conditional_headers, validator_fields
+from .image_store import ContentAddressedImageStore
+from .markdown_rules import get_ruleset
+from .page_pool import PagePool, ShardedPagePool
+from .pipeline import PipelineStage, StagedPipeline
+from .progress_journal import ProgressJournal
+from .rate_limit import HostRateLimiter, TokenBucket
+from .retry import RetryBudget, RetryPolicy, RetryRule, RetryableError, parse_retry_after, retry_async
+from .request_blocking import DEFAULT_BLOCKED_URL_PATTERNS, RequestBlocker, RequestBlockingPolicy
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 页面内正文抽取脚本：按给定顺序检查所有正文选择器，任一命中（innerHTML 足够长）即返回；
+# 都未出现时通过 MutationObserver 等待，超时后回退到 body。一次求值同时返回图片地址与限流/人机校验/付费墙信号。
+# 限流与人机校验只在正文选择器都未命中时判断：人机校验看 <title> 与 #challenge-form / cf-chl-* 等页面结构，
+# 不在整页 HTML 里找子串（普通页面也会引用 /cdn-cgi/challenge-platform/ 脚本）。
+EXTRACT_CONTENT_JS = """
+async ({selectors, timeout, minLength, bodyMinLength, rateLimitIndicators, challengeTitles, challengeSelectors, paywallIndicators}) => {
+    const pick = () => {
+        for (const selector of selectors) {
+            let element = null;
+            try { element = document.querySelector(selector); } catch (e) { continue; }
+            if (element && element.innerHTML && element.innerHTML.length > minLength) {
+                return {selector, element};
+            }
+        }
+        return null;
+    };
+    const interstitial = () => {
+        const title = (document.title || '').trim();
+        if (challengeTitles.some(prefix => title.startsWith(prefix))) {
+            return true;
+        }
+        return challengeSelectors.some(selector => {
+            try { return !!document.querySelector(selector); } catch (e) { return false; }
+        });
+    };
+    const pageHtml = () => document.documentElement ? document.documentElement.outerHTML : '';
+    const paywalled = paywallIndicators.some(indicator => pageHtml().includes(indicator));
+    let found = pick();
+    if (!found && document.documentElement && !interstitial()) {
+        found = await new Promise(resolve => {
+            const observer = new MutationObserver(() => {
+                const hit = pick();
+                if (hit) {
+                    clearTimeout(timer);
+                    observer.disconnect();
+                    resolve(hit);
+                }
+            });
+            const timer = setTimeout(() => {
+                observer.disconnect();
+                resolve(pick());
+            }, timeout);
+            observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+        });
+    }
+    let selector = null;
+    let root = null;
+    if (found) {
+        selector = found.selector;
+        root = found.element;
+    } else {
+        const challenged = interstitial();
+        const html = pageHtml();
+        const rateLimited = rateLimitIndicators.some(indicator => html.includes(indicator));
+        if (rateLimited || challenged) {
+            return {selector: null, html: null, images: [], rateLimited, challenged, paywalled};
+        }
+        if (document.body && document.body.innerHTML.length > bodyMinLength) {
+            selector = 'body';
+            root = document.body;
+        }
+    }
+    const images = root
+        ? Array.from(root.querySelectorAll('img'))
+            .map(img => img.getAttribute('src') || img.getAttribute('data-src'))
+            .filter(Boolean)
+        : [];
+    return {selector, html: root ? root.innerHTML : null, images, rateLimited: false, challenged: false, paywalled};
+}
+"""
+
 
 @dataclass
 class CrawlerConfig:
@@ -94,36 +197,262 @@ class CrawlerConfig:
     max_concurrent_articles: int = 5  # 最大并发文章处理数
     max_concurrent_images: int = 10   # 最大并发图片下载数
     max_retries: int = 3             # 最大重试次数
+    retry_budget_ratio: float = 0.2  # 全局重试预算：每次请求可攒下的重试次数
+    retry_budget_reserve: int = 20   # 全局重试预算的初始储备
     retry_delay: float = 1.0         # 重试延迟（秒）
     request_timeout: int = 30        # 请求超时时间（秒）
-    api_delay: float = 1.0           # API请求间隔
+    api_delay: float = 1.0           # 列表 API 相邻请求的最小发起间隔（只作用于 archive API，不限制页面导航与正文直取）
+    api_page_size: int = 12          # 文章列表每页数量（archive API 的 limit）
+    api_window_size: int = 4         # 分页窗口：同时在途的 offset 请求数（1 即串行）
     article_delay: float = 0.5       # 文章处理间隔
     browser_timeout: int = 30000     # 浏览器超时（毫秒）
     enable_resume: bool = True       # 启用断点续传
     batch_size: int = 10             # 批处理大小
+    incremental_sync: bool = False   # 增量同步元数据：翻页到已知文章即停止并合并
+    work_queue_size: int = 24        # 待处理文章队列上限（列表抓取与文章处理之间的背压）
+    checkpoint_every: int = 10       # 每完成多少篇文章保存一次进度
+    progress_fsync_every: int = 64   # 进度日志每累计多少条事件写入并 fsync 一次（保存进度时也会落盘）
+    checkpoint_interval: float = 30.0  # 距上次保存超过多少秒也保存一次进度
+    parse_concurrency: int = 2       # 解析阶段并发（渲染阶段并发等于页面数）
+    image_stage_concurrency: int = 4  # 图片阶段同时处理的文章数（单篇内图片并发受 max_concurrent_images 限制）
+    max_image_size: Optional[int] = 10 * 1024 * 1024  # 单张图片大小上限（字节），超过即中止下载；None 不限
+    image_chunk_size: int = 64 * 1024  # 图片流式下载的分块大小（字节）
+    image_content_types: List[str] = field(default_factory=lambda: ['image/', 'application/octet-stream'])  # 允许写盘的 Content-Type（前缀匹配）
+    verify_images: bool = False      # 启动时并行重新计算已下载图片的 hash，与索引不符的图片会重新下载
+    image_store: bool = False        # 内容寻址图片库：相同内容只存一份（images/by-hash），文章目录以硬链接引用
+    conditional_requests: bool = True  # 记录图片的 ETag/Last-Modified（随进度保存），重新下载时发条件请求，304 直接复用本地副本
+    revalidate_pages: bool = False   # 页面也发条件请求：每篇文章在 data/page_cache 多存一份正文 HTML，重新爬取时多一次请求
+    write_concurrency: int = 2       # 写盘阶段并发
+    output_compression: Optional[str] = None  # 增量输出（*.jsonl）的压缩方式：None 或 'gzip'
+    legacy_json_outputs: bool = True  # 结束时由 JSONL 流式生成 processed_articles.json / recommendation_data.json
+    columnar_export: Optional[str] = None  # 列式导出（data/features）：None 关闭，'auto'（有 pyarrow 用 Parquet）、'parquet' 或 'npz'
+    columnar_part_rows: int = 1000   # 列式导出每个分片的行数
+    corpus_manifest: bool = True     # 维护 data/manifest.sqlite3 文章清单（每篇文章写盘后事务更新）
+    stage_queue_size: int = 8        # 阶段间队列上限（背压，限制在途文章数）
+    transform_executor: str = 'process'  # HTML 解析/Markdown 转换的执行方式：'process'、'thread' 或 'inline'（事件循环内）
+    transform_workers: Optional[int] = None  # 转换 worker 数，默认 min(4, CPU 核数)
+    markdown_ruleset: str = 'substack'  # Markdown 正文清理规则集（见 markdown_rules.RULESETS）
+    selector_timeout: int = 5000     # 页面内等待正文选择器出现的最长时间（毫秒）
+    fetch_mode: str = 'browser'      # 正文获取方式：'browser' 或 'http_first'（HTTP 直取，浏览器兜底）
+    block_resources: bool = True     # 页面池拦截图片/字体/媒体/统计脚本等请求
+    blocked_resource_types: List[str] = field(default_factory=lambda: ['image', 'media', 'font'])
+    blocked_url_patterns: List[str] = field(default_factory=lambda: list(DEFAULT_BLOCKED_URL_PATTERNS))
+    allowed_url_patterns: List[str] = field(default_factory=list)  # 白名单（优先于拦截规则）
+    browser_shards: int = 1          # 独立浏览器进程数（分片），每个分片各有一个页面池
+    page_pool_min: int = 1           # 每个分片最少保留的页面数（上限为 min(max_concurrent_articles, 5)）
+    page_max_navigations: int = 50   # 单个页面导航多少次后回收重建
+    page_max_heap_mb: Optional[float] = 512  # JS 堆超过该值（MB）时回收页面，None 关闭检查
+    page_idle_timeout: float = 120.0  # 多余页面空闲超过该秒数后关闭
+    site_rate_limit: Optional[float] = None  # 站点主机（页面导航、正文直取、页面条件请求共享）每秒请求数，默认 max_concurrent_articles/article_delay
+    site_burst: Optional[int] = None  # 站点主机令牌桶容量，默认等于 max_concurrent_articles
+    default_rate_limit: Optional[float] = 10.0  # 未单独配置的主机每秒请求数（None 不限速）
+    default_burst: int = 10
+    host_rate_limits: Dict[str, Dict[str, float]] = field(default_factory=lambda: {
+        'substackcdn.com': {'rate': 50.0, 'burst': 20},  # 图片 CDN 可以跑得更快
+    })
+    adaptive_concurrency: bool = True  # 按 429/人机校验/延迟信号自动调整在途文章数（关闭则固定为页面上限）
+    concurrency_initial: Optional[int] = None  # 初始在途文章数，默认取页面上限的一半
+    latency_backoff_factor: float = 2.0  # 渲染延迟 EWMA 超过基线该倍数时下调并发
     
 
+# 推荐算法相关字段（recommendation_data 与列式导出使用）
+RECOMMENDATION_FIELDS = [
+    'id', 'title', 'subtitle', 'post_date', 'audience', 'type',
+    'reactions', 'wordcount', 'postTags', 'cover_image',
+    'description', 'canonical_url', 'slug'
+]
+
+# 图片索引记录中的响应校验信息字段（条件请求使用）
+IMAGE_VALIDATOR_FIELDS = ('etag', 'last_modified', 'elapsed')
+
+
+@dataclass
+class CrawlRunState:
+    """单次 crawl_all 运行期间各 worker 共享的状态"""
+    processed_writer: Optional[JsonlWriter] = None
+    recommendation_writer: Optional[JsonlWriter] = None
+    columnar_exporter: Optional[ColumnarExporter] = None
+    output_lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # 两个输出文件按同一顺序追加
+    processed_count: int = 0          # 本次运行完成的文章数
+    total_images: int = 0             # 本次运行完成文章的本地图片数
+    since_checkpoint: int = 0         # 上次保存进度后完成的文章数
+    last_checkpoint: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class ArticleContext:
+    """单篇文章在流水线各阶段之间传递的中间状态"""
+    article_meta: Dict[str, Any]
+    article_dir: Path
+    images_dir: Path
+    html_content: Optional[str] = None
+    article_image_urls: List[str] = field(default_factory=list)
+    image_tasks: List[tuple] = field(default_factory=list)
+    cover_image_info: Optional[Dict[str, Any]] = None
+    article_images: List[Dict[str, Any]] = field(default_factory=list)
+    image_replacements: List[Tuple[str, str]] = field(default_factory=list)  # (原图片 URL, 本地相对路径)
+    blocked_requests: Optional[Dict[str, Any]] = None  # 渲染时被拦截的请求统计
+    image_hint: Optional[List[str]] = None  # 浏览器抽取正文时顺带拿到的图片地址（解析阶段直接使用）
+
+
 @dataclass
 class ProgressTracker:
-    """进度跟踪器"""
-    processed_articles: Set[int] = field(default_factory=set)
+    """进度跟踪器
+    
+    状态变化通过 mark_processed / mark_failed / record_image / forget_image 进行；用 `open()`
+    加载时附带追加式日志，每次变化只追加一个事件，`checkpoint()` 落盘并在日志过长时压缩为快照。
+    已处理文章 ID 保存为有序整数数组，已下载图片及其索引记录只以 URL 的 64 位摘要为键（见 compact_sets），
+    不能取回原始 URL；图片相关方法既接受 URL 也接受摘要。
+    """
+    processed_articles: CompactIdSet = field(default_factory=CompactIdSet)
     failed_articles: Dict[int, str] = field(default_factory=dict)
-    downloaded_images: Set[str] = field(default_factory=set)
+    downloaded_images: UrlDigestSet = field(default_factory=UrlDigestSet)
+    image_index: ImageIndex = field(default_factory=ImageIndex)  # URL 摘要 -> {path, hash, size, mtime_ns[, etag, last_modified, elapsed]}
+    snapshot_path: Optional[Path] = field(default=None, repr=False, compare=False)
+    journal: Optional[ProgressJournal] = field(default=None, repr=False, compare=False)
+    compact_min_events: int = field(default=1000, repr=False, compare=False)  # 日志至少积累这么多事件才压缩
+    
+    def mark_processed(self, article_id: int):
+        """标记文章已处理"""
+        self.processed_articles.add(article_id)
+        self._log({'op': 'processed', 'id': article_id})
+    
+    def mark_failed(self, article_id: int, reason: str):
+        """记录文章失败原因"""
+        self.failed_articles[article_id] = reason
+        self._log({'op': 'failed', 'id': article_id, 'reason': reason})
+    
+    def record_image(self, image: Union[str, int], file_path: Path, relative_path: str, file_hash: str, size: int,
+                     validators: Optional[Dict[str, Any]] = None):
+        """记录已下载图片的 hash、大小与 mtime，续传时据此跳过重新计算
+
+        validators 为下载响应的 ETag/Last-Modified（见 http_cache.validator_fields），供之后发条件请求；
+        未给出时沿用同一内容原有记录中的校验信息。
+        """
+        entry = {
+            'path': relative_path,
+            'hash': file_hash,
+            'size': size,
+            'mtime_ns': file_path.stat().st_mtime_ns,
+        }
+        digest = ImageIndex.key(image)
+        previous = self.image_index.get(digest)
+        if validators is None and previous and previous.get('hash') == file_hash:
+            validators = previous
+        if validators and (validators.get('etag') or validators.get('last_modified')):
+            entry.update((name, validators.get(name)) for name in IMAGE_VALIDATOR_FIELDS)
+            # 有 ETag 时服务端以 If-None-Match 为准、忽略 If-Modified-Since（RFC 7232），不必保存
+            if entry['etag']:
+                entry['last_modified'] = None
+        self.image_index.put(digest, entry)
+        self.downloaded_images.add_digest(digest)
+        self._log({'op': 'image', 'digest': digest, 'entry': entry})
+    
+    def trusted_image(self, image: Union[str, int], file_path: Path, relative_path: str) -> Optional[Dict[str, Any]]:
+        """索引中的记录与文件当前的大小、mtime 都一致时返回该记录，否则返回 None
+
+        同一 URL 在其他文章目录中的副本是硬链接或保留 mtime 的复制，路径不同也视为一致。
+        """
+        entry = self.image_index.get(image)
+        if not entry:
+            return None
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+        if stat.st_size != entry.get('size') or stat.st_mtime_ns != entry.get('mtime_ns'):
+            return None
+        return entry
+    
+    def forget_image(self, image: Union[str, int]):
+        """移除图片记录（下次遇到时重新下载）"""
+        digest = ImageIndex.key(image)
+        self.image_index.discard(digest)
+        self.downloaded_images.discard_digest(digest)
+        self._log({'op': 'forget_image', 'digest': digest})
+    
+    def start_over(self):
+        """不续传时使用：清空已处理/失败文章与已下载图片集合，本次运行重新处理、重新下载全部内容
+        
+        图片索引（hash、大小与 ETag/Last-Modified）保留，重新下载时据此发条件请求；
+        附带日志时立即压缩为新快照，之后的变化照常追加到日志。
+        """
+        self.processed_articles = CompactIdSet()
+        self.failed_articles = {}
+        self.downloaded_images = UrlDigestSet()
+        if self.journal is not None:
+            self.compact()
+    
+    def _log(self, event: Dict[str, Any]):
+        if self.journal is not None:
+            self.journal.append(event)
+    
+    def _apply(self, event: Dict[str, Any]):
+        """重放一个日志事件（不再写日志）"""
+        op = event.get('op')
+        if op == 'processed':
+            self.processed_articles.add(event['id'])
+        elif op == 'failed':
+            self.failed_articles[event['id']] = event['reason']
+        elif op == 'image':
+            # 旧日志以 URL 记录图片
+            digest = ImageIndex.key(event['digest'] if 'digest' in event else event['url'])
+            self.image_index.put(digest, event['entry'])
+            self.downloaded_images.add_digest(digest)
+        elif op == 'forget_image':
+            digest = ImageIndex.key(event['digest'] if 'digest' in event else event['url'])
+            self.image_index.discard(digest)
+            self.downloaded_images.discard_digest(digest)
+        else:
+            logger.warning(f"未知的进度事件，已忽略: {op}")
+    
+    def checkpoint(self):
+        """日志落盘（fsync）；日志事件数超过快照规模时压缩为新快照
+        
+        压缩阈值与状态规模成正比，整文件重写的代价摊还到每个事件仍是常数。
+        没有附带日志时退化为整文件保存。
+        """
+        if self.journal is None:
+            if self.snapshot_path is not None:
+                self.save(self.snapshot_path)
+            return
+        self.journal.flush()
+        state_size = len(self.processed_articles) + len(self.failed_articles) + len(self.image_index)
+        if self.journal.events >= max(self.compact_min_events, state_size):
+            self.compact()
+    
+    def compact(self):
+        """把当前状态写成快照并清空日志"""
+        self.save(self.snapshot_path)
+        if self.journal is not None:
+            self.journal.reset()
+    
+    def close(self):
+        """结束时落盘；有日志时压缩，下次启动只需读快照"""
+        if self.journal is not None:
+            self.compact()
+        elif self.snapshot_path is not None:
+            self.save(self.snapshot_path)
     
     def save(self, filepath: Path):
-        """保存进度"""
+        """整文件保存进度快照（临时文件 + fsync + 原子替换，写入途中崩溃不会损坏原文件）"""
         data = {
-            'processed_articles': list(self.processed_articles),
+            'processed_articles': self.processed_articles.to_list(),
             'failed_articles': self.failed_articles,
-            'downloaded_images': list(self.downloaded_images),
+            'downloaded_image_digests': self.downloaded_images.to_base64(),
+            'image_index_columns': self.image_index.to_snapshot(),
             'last_updated': datetime.now().isoformat()
         }
-        with open(filepath, 'w', encoding='utf-8') as f:
+        tmp_path = filepath.with_name(filepath.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
     
     @classmethod
     def load(cls, filepath: Path) -> 'ProgressTracker':
-        """加载进度"""
+        """加载进度（兼容以 URL 列表保存 downloaded_images、以 URL 为键保存 image_index 的旧进度文件）"""
         if not filepath.exists():
             return cls()
         
@@ -131,41 +460,120 @@ class ProgressTracker:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
+            if 'downloaded_image_digests' in data:
+                downloaded_images = UrlDigestSet.from_base64(data['downloaded_image_digests'])
+            else:
+                downloaded_images = UrlDigestSet.from_urls(data.get('downloaded_images', []))
+            if 'image_index_columns' in data:
+                image_index = ImageIndex.from_snapshot(data['image_index_columns'])
+            else:
+                image_index = ImageIndex.from_entries(data.get('image_index', {}))
             return cls(
-                processed_articles=set(data.get('processed_articles', [])),
-                failed_articles=data.get('failed_articles', {}),
-                downloaded_images=set(data.get('downloaded_images', []))
+                processed_articles=CompactIdSet(data.get('processed_articles', [])),
+                # JSON 对象的键是字符串，还原为文章 ID（与日志重放、运行期间的键一致）
+                failed_articles={int(k) if str(k).isdigit() else k: v
+                                 for k, v in data.get('failed_articles', {}).items()},
+                downloaded_images=downloaded_images,
+                image_index=image_index
             )
         except Exception as e:
             logger.error(f"加载进度文件失败: {e}")
             return cls()
-
-
-def retry_async(max_retries: int = 3, delay: float = 1.0):
-    """异步重试装饰器"""
-    def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(max_retries):
-                try:
-                    return await func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    if attempt < max_retries - 1:
-                        wait_time = delay * (2 ** attempt)  # 指数退避
-                        logger.warning(f"{func.__name__} 失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-                        await asyncio.sleep(wait_time)
-                    else:
-                        logger.error(f"{func.__name__} 最终失败: {e}")
-            raise last_exception
-        return wrapper
-    return decorator
+    
+    @classmethod
+    def open(cls, filepath: Path, fsync_every: int = 64, compact_min_events: int = 1000) -> 'ProgressTracker':
+        """加载快照（兼容原先整文件保存的进度文件）并重放同名 .journal 日志，之后的变化追加到日志"""
+        tracker = cls.load(filepath)
+        tracker.snapshot_path = filepath
+        tracker.compact_min_events = compact_min_events
+        journal = ProgressJournal(filepath.with_suffix('.journal'), fsync_every=fsync_every)
+        for event in journal.replay():
+            tracker._apply(event)
+        if journal.events:
+            logger.info(f"重放进度日志 {journal.events} 条事件")
+        tracker.journal = journal
+        return tracker
 
 
 class NewsletterCrawler:
+    # 正文内容选择器 - 优先使用干净的内容选择器
+    CONTENT_SELECTORS = [
+        '.markup',                    # Priority: Clean content only
+        '.body.markup',               # Priority: More specific clean content
+        'article .markup',            # Priority: Scoped to article
+        'article .body',              # Priority: Alternative within article
+        '.single-post-container',     # Fallback selectors
+        '.post-content',
+        '.entry-content', 
+        '.article-content',
+        '[data-testid="post-content"]',
+        'article',                    # Moved to end - contains UI elements
+        'main'
+    ]
+    
+    # 浏览器渲染的重试规则（按错误类别，总尝试次数含首次；未列出的类别不重试）
+    RENDER_RETRY_RULES = {
+        'throttled': RetryRule(max_attempts=4, base_delay=10.0, max_delay=60.0),
+        'challenge': RetryRule(max_attempts=4, base_delay=10.0, max_delay=60.0),
+        'no_content': RetryRule(max_attempts=4, base_delay=2.0, max_delay=16.0),
+        'timeout': RetryRule(max_attempts=4, base_delay=2.0, max_delay=16.0),
+        'connection': RetryRule(max_attempts=4, base_delay=2.0, max_delay=16.0),
+    }
+    
+    # 图片下载的重试规则：只重试限流、超时、连接错误与 5xx（其余类别按默认规则直接放弃）
+    IMAGE_RETRY_RULES = {
+        'timeout': RetryRule(max_attempts=3, base_delay=0.5, max_delay=4.0),
+        'connection': RetryRule(max_attempts=3, base_delay=0.5, max_delay=4.0),
+        'server_error': RetryRule(max_attempts=3, base_delay=0.5, max_delay=4.0),
+    }
+    
+    # 命中样本达到该数量后，才按命中次数调整选择器顺序
+    SELECTOR_LEARNING_MIN_SAMPLES = 10
+    
+    # 只检查Cloudflare或真实的限流页面文本
+    RATE_LIMIT_INDICATORS = [
+        'Access denied',
+        'Error 1015',
+        'You are being rate limited',
+        'Too many requests from this IP',
+        'Please wait a few minutes'
+    ]
+    
+    # Cloudflare 等人机校验页面的标题前缀（只在没有找到正文时检查）
+    CHALLENGE_TITLES = [
+        'Just a moment...',
+        'Attention Required!',
+        'Checking your browser',
+        'Please verify you are human'
+    ]
+    
+    # 人机校验页面特有的结构；不使用 challenge-platform 之类的子串，普通页面也会引用该路径下的脚本
+    CHALLENGE_SELECTORS = [
+        '#challenge-form',
+        '#challenge-running',
+        '#cf-challenge-running',
+        '#cf-browser-verification',
+        '[id^="cf-chl-"]',
+        'form[action*="__cf_chl_"]'
+    ]
+    
+    # 正文为空时，这些状态码视为人机校验/拦截页
+    CHALLENGE_STATUS_CODES = (403, 503)
+    
+    # 付费墙标记（更严格的条件）
+    PAYWALL_INDICATORS = [
+        'This post is for paid subscribers',
+        'Upgrade to paid',
+        'This content is for subscribers only',
+        'Become a paid subscriber to read',
+        'Available for paid subscribers'
+    ]
+    
     def __init__(self, config: Optional[CrawlerConfig] = None):
         self.config = config or CrawlerConfig()
+        # 增量同步只投入新文章，与“不续传、重新处理全部文章”矛盾
+        if self.config.incremental_sync and not self.config.enable_resume:
+            raise ValueError("incremental_sync requires enable_resume (--incremental cannot be combined with --no-resume)")
         self.base_url = self.config.base_url
         self.api_url = f"{self.base_url}/api/v1/archive"
         self.output_dir = Path(self.config.output_dir)
@@ -180,23 +588,102 @@ class NewsletterCrawler:
         # 资源管理
         self.session: Optional[aiohttp.ClientSession] = None
         self.browser = None
+        self.browsers: List[Any] = []
+        self.shard_startup_seconds: List[float] = []
         self.playwright = None
-        self.page_pool: List[Page] = []
+        self.page_pool: Optional[PagePool] = None
         
         # 并发控制
         self.article_semaphore = Semaphore(self.config.max_concurrent_articles)
         self.image_semaphore = Semaphore(self.config.max_concurrent_images)
         
+        # 按主机的令牌桶：同一主机上的页面导航、正文直取、图片下载共享预算
+        self.rate_limiter = HostRateLimiter(
+            default_rate=self.config.default_rate_limit,
+            default_burst=self.config.default_burst,
+            host_limits=self.config.host_rate_limits,
+        )
+        site_host = urlparse(self.base_url).hostname or ''
+        if site_host and site_host.lower() not in self.rate_limiter.host_limits:
+            # 默认与文章处理节奏一致：每个并发槽位每 article_delay 秒一个请求，允许所有槽位同时发起
+            site_rate = self.config.site_rate_limit
+            if site_rate is None and self.config.article_delay > 0:
+                site_rate = self.config.max_concurrent_articles / self.config.article_delay
+            site_burst = self.config.site_burst or self.config.max_concurrent_articles
+            self.rate_limiter.set_host_limit(site_host, site_rate, site_burst)
+        # 列表 API 单独按 api_delay 限速，不占用页面导航与正文直取的预算
+        self.api_rate_limiter = TokenBucket(1.0 / self.config.api_delay if self.config.api_delay > 0 else None)
+        
+        # 页面池请求拦截
+        self.request_blocker: Optional[RequestBlocker] = None
+        if self.config.block_resources:
+            self.request_blocker = RequestBlocker(RequestBlockingPolicy(
+                blocked_resource_types=self.config.blocked_resource_types,
+                blocked_url_patterns=self.config.blocked_url_patterns,
+                allowed_url_patterns=self.config.allowed_url_patterns
+            ))
+        self.blocking_stats: Dict[str, Any] = {
+            'articles': 0, 'blocked_requests': 0, 'by_type': {}, 'known_bytes_saved': 0
+        }
+        
+        # CPU 密集型转换（HTML 解析、Markdown 转换）的执行器，进入上下文时创建并预热
+        self.transform_executor: Optional[Executor] = None
+        self._transform_futures: Set[Future] = set()
+        self.markdown_ruleset = get_ruleset(self.config.markdown_ruleset)
+        self.transform_stats = {'mode': self.config.transform_executor, 'workers': 0, 'tasks': 0, 'busy_time': 0.0}
+        
+        # 统一重试策略（各层共享全局重试预算，按阶段统计）
+        self.retry_policy = RetryPolicy(budget=RetryBudget(
+            ratio=self.config.retry_budget_ratio,
+            reserve=self.config.retry_budget_reserve,
+        ))
+        
+        # 自适应并发控制（页面池就绪后按页面上限收紧）
+        max_pages = max(1, self.config.browser_shards) * min(self.config.max_concurrent_articles, 5)
+        self.concurrency = self._new_concurrency_controller(max_pages)
+        
+        # 正文选择器命中统计，以及浏览器抽取时顺带拿到的正文图片列表（按文章 URL，
+        # 只在一次渲染调用内暂存，由 _render_article 取走放到文章上下文中）
+        self.selector_stats: Dict[str, int] = {}
+        self._image_hints: Dict[str, List[str]] = {}
+        
+        # 正文获取路径统计（HTTP 直取 / 浏览器渲染 / 回退原因）
+        self.fetch_stats: Dict[str, Any] = {'http': 0, 'browser': 0, 'not_modified': 0, 'fallback_reasons': {}}
+        self.image_stats: Dict[str, Any] = {
+            'downloaded': 0, 'bytes': 0, 'rejected_content_type': 0, 'rejected_too_large': 0, 'failed': 0,
+            'index_hits': 0, 'rehashed': 0, 'coalesced': 0, 'reused': 0, 'not_modified': 0
+        }
+        # 同一 URL 的在途下载（后到的请求等待第一个完成后复用其文件）
+        self._inflight_images: Dict[str, asyncio.Future] = {}
+        self.image_store: Optional[ContentAddressedImageStore] = None
+        if self.config.image_store:
+            self.image_store = ContentAddressedImageStore(self.images_dir / "by-hash")
+        
+        # 条件请求：图片的校验信息记在进度的图片索引中（不续传时读取上次的索引），
+        # 页面的校验信息与正文副本只在 revalidate_pages 时保存；以及本次获取正文时的响应校验信息
+        self.revalidation = RevalidationStats()
+        self.http_cache: Optional[ConditionalCache] = None
+        if self.config.conditional_requests and self.config.revalidate_pages:
+            self.http_cache = ConditionalCache.open(self.data_dir / "http_cache.json", self.data_dir / "page_cache",
+                                                    fsync_every=self.config.progress_fsync_every)
+        self._page_validators: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        
+        # 文章清单（SQLite），在 __aenter__ 中打开
+        self.manifest: Optional[CorpusManifest] = None
+        
+        # 分阶段流水线（crawl_all 运行期间有效）
+        self.pipeline: Optional[StagedPipeline] = None
+        
         # 进度跟踪
         self.progress = ProgressTracker()
         self.progress_file = self.data_dir / "crawler_progress.json"
         
+        # 元数据与增量同步水位线
+        self.metadata_file = self.data_dir / "articles_metadata.json"
+        self.watermark_file = self.data_dir / "metadata_watermark.json"
+        
         # 推荐算法相关字段
-        self.recommendation_fields = [
-            'id', 'title', 'subtitle', 'post_date', 'audience', 'type', 
-            'reactions', 'wordcount', 'postTags', 'cover_image', 
-            'description', 'canonical_url', 'slug'
-        ]
+        self.recommendation_fields = list(RECOMMENDATION_FIELDS)
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
@@ -211,133 +698,482 @@ class NewsletterCrawler:
             }
         )
         
+        # 先启动转换 worker（在浏览器进程与线程出现之前）
+        await self._start_transform_executor()
+        
         # 启动playwright（缺失时直接报错，避免并发信号量为0导致卡死）
         if PLAYWRIGHT_AVAILABLE:
             self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,
-                args=['--disable-blink-features=AutomationControlled']
-            )
-            
-            # 创建页面池 - 根据配置创建足够的页面
-            page_count = min(self.config.max_concurrent_articles, 5)  # 最多5个页面
-            for _ in range(page_count):
-                page = await self.browser.new_page()
-                await page.set_viewport_size({'width': 1920, 'height': 1080})
-                # 设置页面超时
-                page.set_default_timeout(self.config.browser_timeout)
-                self.page_pool.append(page)
-            logger.info(f"创建了 {page_count} 个浏览器页面")
+            # 启动浏览器分片，每个分片一个页面池，按需在 [page_pool_min, 上限] 之间伸缩
+            await self._start_browser_shards()
         else:
             logger.error("Playwright 未安装或不可用。请先安装依赖并执行: 'pip install playwright' 然后 'playwright install chromium'")
             raise RuntimeError("Playwright is required for content crawling. Please install it.")
         
-        # 加载进度
+        # 加载进度；不续传时也记录本次运行的进度，并保留图片索引中的校验信息用于条件请求
+        self.progress = ProgressTracker.open(self.progress_file, fsync_every=self.config.progress_fsync_every)
         if self.config.enable_resume:
-            self.progress = ProgressTracker.load(self.progress_file)
             if self.progress.processed_articles:
                 logger.info(f"从上次进度恢复，已处理 {len(self.progress.processed_articles)} 篇文章")
+            if self.config.verify_images:
+                await self.verify_images()
+        else:
+            self.progress.start_over()
+        
+        # 打开文章清单；首次创建时由已有的 metadata.json 回填
+        if self.config.corpus_manifest:
+            self.manifest = CorpusManifest(self.data_dir / "manifest.sqlite3")
+            if self.manifest.created:
+                backfilled = await asyncio.get_running_loop().run_in_executor(
+                    None, self.manifest.rebuild_from_disk, self.output_dir, self.articles_dir)
+                if backfilled:
+                    logger.info(f"文章清单已由已有元数据回填 {backfilled} 篇")
         
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文管理器出口"""
-        # 保存进度
-        if self.config.enable_resume:
-            self.progress.save(self.progress_file)
+        # 保存进度（日志落盘并压缩为快照）
+        self.progress.close()
+        if self.http_cache:
+            self.http_cache.close()
+        if self.manifest is not None:
+            self.manifest.close()
+            self.manifest = None
         
         # 清理资源
         if self.session:
             await self.session.close()
         
         if self.page_pool:
-            for page in self.page_pool:
-                await page.close()
+            await self.page_pool.close()
         
-        if self.browser:
-            await self.browser.close()
+        for browser in self.browsers:
+            await browser.close()
+        
+        if self.transform_executor:
+            for future in list(self._transform_futures):
+                future.cancel()
+            self.transform_executor.shutdown(wait=True)
+            self.transform_executor = None
         
         if self.playwright:
             await self.playwright.stop()
     
     @retry_async(max_retries=3, delay=1.0)
-    async def get_all_articles_metadata(self) -> List[Dict[str, Any]]:
-        """获取所有文章的元数据"""
-        all_articles = []
-        offset = 0
-        limit = 12
-        
-        logger.info("开始获取文章列表...")
+    async def fetch_archive_page(self, offset: int, limit: int, sort: str = 'new') -> List[Dict[str, Any]]:
+        """获取单页文章列表（失败时只重试该页，不会从 offset 0 重新开始）"""
+        await self.api_rate_limiter.acquire()
+        params = {
+            'sort': sort,
+            'search': '',
+            'offset': offset,
+            'limit': limit
+        }
+        async with self.session.get(self.api_url, params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+    
+    async def iter_archive_pages(self, sort: str = 'new', start_offset: int = 0,
+                                 window: Optional[int] = None):
+        """按 offset 顺序逐页产出文章列表
+        
+        窗口内最多同时有 `api_window_size` 个 offset 请求在途，结果按 offset 顺序重组；
+        返回条数少于 limit 的短页即视为末页，并取消其后多余的预取请求。
+        """
+        limit = self.config.api_page_size
+        window = max(1, window or self.config.api_window_size)
+        pending: Dict[int, asyncio.Task] = {}
+        next_offset = start_offset
+        emit_offset = start_offset
+        end_offset: Optional[int] = None
         
-        while True:
-            params = {
-                'sort': 'new',
-                'search': '',
-                'offset': offset,
-                'limit': limit
-            }
-            
-            async with self.session.get(self.api_url, params=params) as response:
-                response.raise_for_status()
-                articles = await response.json()
+        try:
+            while True:
+                # 补满请求窗口
+                while len(pending) < window and (end_offset is None or next_offset < end_offset):
+                    pending[next_offset] = asyncio.ensure_future(
+                        self.fetch_archive_page(next_offset, limit, sort)
+                    )
+                    next_offset += limit
                 
-                if not articles:
-                    logger.info("没有更多文章了")
+                task = pending.pop(emit_offset, None)
+                if task is None:
                     break
+                articles = await task
+                
+                if len(articles) < limit:
+                    # 短页：到达末尾，丢弃之后的预取
+                    end_offset = emit_offset + limit
+                    for offset in [o for o in pending if o >= end_offset]:
+                        pending.pop(offset).cancel()
                 
-                all_articles.extend(articles)
-                logger.info(f"已获取 {len(all_articles)} 篇文章")
+                if articles:
+                    yield articles
                 
-                offset += limit
-                await asyncio.sleep(self.config.api_delay)
+                emit_offset += limit
+                if end_offset is not None and emit_offset >= end_offset:
+                    break
+        finally:
+            for task in pending.values():
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending.values(), return_exceptions=True)
+    
+    async def iter_articles_metadata(self):
+        """逐篇产出文章元数据（按列表顺序、已去重），首页返回即可开始消费"""
+        seen_ids: Set[int] = set()
+        count = 0
         
-        logger.info(f"总共获取到 {len(all_articles)} 篇文章")
-        return all_articles
+        logger.info("开始获取文章列表...")
+        
+        pages = self.iter_archive_pages()
+        try:
+            async for articles in pages:
+                for article in articles:
+                    article_id = article.get('id')
+                    # 翻页过程中有新文章发布时，相邻页可能出现重复条目
+                    if article_id is not None:
+                        if article_id in seen_ids:
+                            continue
+                        seen_ids.add(article_id)
+                    count += 1
+                    yield article
+                logger.info(f"已获取 {count} 篇文章")
+        finally:
+            await pages.aclose()
+        
+        logger.info("没有更多文章了")
+        logger.info(f"总共获取到 {count} 篇文章")
+    
+    async def get_all_articles_metadata(self) -> List[Dict[str, Any]]:
+        """获取所有文章的元数据（窗口化并发分页，按 offset 顺序重组）"""
+        return [article async for article in self.iter_articles_metadata()]
+    
+    async def _write_json_atomic(self, filepath: Path, data: Any):
+        """先写临时文件再原子替换，避免中途崩溃留下半截 JSON"""
+        tmp_path = filepath.with_name(filepath.name + '.tmp')
+        async with aiofiles.open(tmp_path, 'w', encoding='utf-8') as f:
+            await f.write(json.dumps(data, ensure_ascii=False, indent=2))
+        os.replace(tmp_path, filepath)
+    
+    async def _save_watermark(self, articles: List[Dict[str, Any]]):
+        """记录元数据水位线：最新 post_date 与全部已知文章 ID"""
+        post_dates = [a.get('post_date') for a in articles if a.get('post_date')]
+        watermark = {
+            'newest_post_date': max(post_dates) if post_dates else None,
+            'known_ids': sorted(a['id'] for a in articles if a.get('id') is not None),
+            'article_count': len(articles),
+            'last_synced': datetime.now().isoformat()
+        }
+        await self._write_json_atomic(self.watermark_file, watermark)
+    
+    async def sync_articles_metadata(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """增量同步文章元数据
+        
+        按 sort=new 翻页，遇到已知文章（ID 在水位线中，或 post_date 不晚于水位线）所在页即停止，
+        再把增量合并进 `articles_metadata.json`。没有水位线或本地元数据时退化为全量获取。
+        
+        返回 (合并后的全部元数据, 本次新增的文章)。
+        """
+        watermark = load_json(str(self.watermark_file), default={}) or {}
+        known_ids = set(watermark.get('known_ids', []))
+        existing = load_json(str(self.metadata_file), default=[]) or []
+        
+        if not known_ids or not existing:
+            logger.info("未找到水位线或本地元数据，执行全量获取")
+            articles = await self.get_all_articles_metadata()
+            if articles:
+                await self._write_json_atomic(self.metadata_file, articles)
+                await self._save_watermark(articles)
+            return articles, articles
+        
+        newest_post_date = watermark.get('newest_post_date')
+        logger.info(f"增量同步文章列表（水位线: {newest_post_date}，已知 {len(known_ids)} 篇）...")
+        
+        new_articles: List[Dict[str, Any]] = []
+        refreshed: Dict[int, Dict[str, Any]] = {}
+        # 增量通常只需第一页，串行翻页避免无谓的预取
+        pages = self.iter_archive_pages(sort='new', window=1)
+        try:
+            async for articles in pages:
+                reached_known = False
+                for article in articles:
+                    article_id = article.get('id')
+                    post_date = article.get('post_date')
+                    if article_id in known_ids:
+                        refreshed[article_id] = article
+                        reached_known = True
+                        continue
+                    if article_id in refreshed:
+                        continue
+                    refreshed[article_id] = article
+                    new_articles.append(article)
+                    if newest_post_date and post_date and post_date <= newest_post_date:
+                        reached_known = True
+                if reached_known:
+                    break
+        finally:
+            await pages.aclose()
+        
+        # 合并：新文章在前，已知文章用本次刷新到的元数据（如最新 reactions）覆盖
+        merged = new_articles + [
+            refreshed.get(article.get('id'), article) for article in existing
+        ]
+        await self._write_json_atomic(self.metadata_file, merged)
+        await self._save_watermark(merged)
+        logger.info(f"增量同步完成：新增 {len(new_articles)} 篇，共 {len(merged)} 篇")
+        return merged, new_articles
     
-    @retry_async(max_retries=3, delay=0.5)
     async def download_image(self, image_url: str, save_path: Path) -> Optional[Dict[str, Any]]:
-        """下载图片到指定路径并计算hash"""
+        """下载图片到指定路径并计算hash
+
+        同一 URL 只从网络获取一次：已下载过的图片从本地副本复用，正在下载的等待其完成后复用，
+        并发处理的文章共享同一次下载。启用 image_store 时图片按内容入库，文章目录以硬链接引用。
+        """
+        relative_path = str(save_path.relative_to(self.articles_dir.parent))
+        
         # 检查是否已下载
         if image_url in self.progress.downloaded_images:
             if save_path.exists():
-                # 计算已存在文件的hash
-                hasher = hashlib.sha256()
-                async with aiofiles.open(save_path, 'rb') as f:
-                    content = await f.read()
-                    hasher.update(content)
+                # 索引记录与文件大小/mtime 一致时直接采用，不再读盘计算hash
+                entry = self.progress.trusted_image(image_url, save_path, relative_path)
+                if entry is not None:
+                    self.image_stats['index_hits'] += 1
+                    return {'path': relative_path, 'hash': entry['hash'], 'size': entry['size']}
+                # 没有索引记录（旧进度文件）或文件已变化：计算已存在文件的hash并记入索引
+                file_hash, size = await self._hash_file(save_path)
+                entry = self.progress.image_index.get(image_url)
+                # 其他文章目录中内容相同的副本仍是索引记录，不改写
+                if not entry or entry.get('path') == relative_path or entry.get('hash') != file_hash:
+                    self.progress.record_image(image_url, save_path, relative_path, file_hash, size)
+                self.image_stats['rehashed'] += 1
                 return {
-                    'path': str(save_path.relative_to(self.articles_dir.parent)),
-                    'hash': hasher.hexdigest(),
-                    'size': len(content)
+                    'path': relative_path,
+                    'hash': file_hash,
+                    'size': size
                 }
-        
+            # 其他文章已下载过同一 URL：从本地副本复用
+            entry = self.progress.image_index.get(image_url)
+            source_path = self.articles_dir.parent / entry['path'] if entry else None
+            if entry and self.progress.trusted_image(image_url, source_path, entry['path']) is not None:
+                result = await self._materialize_image(entry, save_path, relative_path)
+                if result is not None:
+                    self.image_stats['reused'] += 1
+                    return result
+        
+        # 同一 URL 正在下载：等待完成后复用其文件
+        pending = self._inflight_images.get(image_url)
+        if pending is not None:
+            self.image_stats['coalesced'] += 1
+            source = await asyncio.shield(pending)
+            if source is None or source['path'] == relative_path:
+                return source
+            return await self._materialize_image(source, save_path, relative_path)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_images[image_url] = future
+        result = None
+        try:
+            result = await self._fetch_image(image_url, save_path, relative_path)
+            return result
+        finally:
+            del self._inflight_images[image_url]
+            future.set_result(result)
+    
+    async def _fetch_image(self, image_url: str, save_path: Path, relative_path: str) -> Optional[Dict[str, Any]]:
+        """下载图片，按 IMAGE_RETRY_RULES 重试；最终失败时返回 None"""
+        try:
+            return await self.retry_policy.run(self._fetch_image_once, image_url, save_path, relative_path,
+                                               stage='image', rules=self.IMAGE_RETRY_RULES)
+        except Exception as e:
+            self.image_stats['failed'] += 1
+            logger.error(f"下载图片失败 {image_url}: {e}")
+            return None
+    
+    async def _fetch_image_once(self, image_url: str, save_path: Path,
+                                relative_path: str) -> Optional[Dict[str, Any]]:
+        """单次流式下载图片；网络与 HTTP 错误抛出，由重试策略决定是否重试
+        
+        分块写入同目录下的 .part 临时文件，边写边更新 SHA-256，完成后原子替换为目标文件
+        （启用 image_store 时移入图片库再硬链接到目标路径）；Content-Type 不是图片或大小超过
+        max_image_size 时在写盘前/下载中途放弃（返回 None，不重试）。
+        """
         async with self.image_semaphore:
+            tmp_path = save_path.with_name(save_path.name + '.part')
             try:
-                async with self.session.get(image_url) as response:
+                # 上次下载的本地副本完好时带上校验信息，304 即直接复用
+                cached = self._revalidatable_image(image_url)
+                headers = conditional_headers(cached) if cached else None
+                await self.rate_limiter.acquire(image_url)
+                started = time.monotonic()
+                async with self.session.get(image_url, headers=headers) as response:
+                    if cached:
+                        not_modified = response.status == 304
+                        self.revalidation.record_request('image', not_modified, cached, time.monotonic() - started)
+                        if not_modified:
+                            return await self._reuse_not_modified_image(image_url, cached, save_path, relative_path)
                     response.raise_for_status()
                     
+                    if not self._is_image_content_type(response.content_type):
+                        self.image_stats['rejected_content_type'] += 1
+                        logger.warning(f"跳过非图片响应 {image_url}: Content-Type {response.content_type}")
+                        return None
+                    max_size = self.config.max_image_size
+                    if max_size and response.content_length and response.content_length > max_size:
+                        self.image_stats['rejected_too_large'] += 1
+                        logger.warning(f"跳过过大的图片 {image_url}: {response.content_length} 字节")
+                        return None
+                    
                     # 确保目录存在
                     save_path.parent.mkdir(parents=True, exist_ok=True)
                     
-                    content = await response.read()
-                    
-                    # 计算hash
                     hasher = hashlib.sha256()
-                    hasher.update(content)
-                    
-                    async with aiofiles.open(save_path, 'wb') as f:
-                        await f.write(content)
+                    size = 0
+                    async with aiofiles.open(tmp_path, 'wb') as f:
+                        async for chunk in response.content.iter_chunked(self.config.image_chunk_size):
+                            size += len(chunk)
+                            # 没有 Content-Length 或其不可信时，按实际字节数中途放弃
+                            if max_size and size > max_size:
+                                break
+                            hasher.update(chunk)
+                            await f.write(chunk)
+                    if max_size and size > max_size:
+                        self.image_stats['rejected_too_large'] += 1
+                        logger.warning(f"图片超过大小上限 {max_size} 字节，已中止下载: {image_url}")
+                        return None
+                    file_hash = hasher.hexdigest()
+                    if self.image_store:
+                        blob = self.image_store.adopt(tmp_path, file_hash)
+                        self.image_store.link(blob, save_path)
+                    else:
+                        os.replace(tmp_path, save_path)
                     
-                    self.progress.downloaded_images.add(image_url)
+                    validators = None
+                    if self.config.conditional_requests:
+                        validators = validator_fields(response.headers, time.monotonic() - started)
+                    self.progress.record_image(image_url, save_path, relative_path, file_hash, size, validators or {})
+                    self.image_stats['downloaded'] += 1
+                    self.image_stats['bytes'] += size
                     return {
-                        'path': str(save_path.relative_to(self.articles_dir.parent)),
-                        'hash': hasher.hexdigest(),
-                        'size': len(content)
+                        'path': relative_path,
+                        'hash': file_hash,
+                        'size': size
                     }
-                    
-            except Exception as e:
-                logger.error(f"下载图片失败 {image_url}: {e}")
+            finally:
+                # 中止或失败时清理半截的临时文件
+                if tmp_path.exists():
+                    tmp_path.unlink()
+    
+    def _revalidatable_image(self, image_url: str) -> Optional[Dict[str, Any]]:
+        """图片索引中带校验信息的记录；本地副本缺失或大小/mtime 已变化时返回 None"""
+        if not self.config.conditional_requests:
+            return None
+        entry = self.progress.image_index.get(image_url)
+        if not entry or not (entry.get('etag') or entry.get('last_modified')):
+            return None
+        try:
+            stat = (self.articles_dir.parent / entry['path']).stat()
+        except OSError:
+            return None
+        if stat.st_size != entry.get('size') or stat.st_mtime_ns != entry.get('mtime_ns'):
+            return None
+        return entry
+    
+    async def _reuse_not_modified_image(self, image_url: str, cached: Dict[str, Any], save_path: Path,
+                                        relative_path: str) -> Optional[Dict[str, Any]]:
+        """服务端返回 304：沿用索引记录的 hash/大小与校验信息，本地副本就在目标路径时不读写任何文件"""
+        if cached['path'] == relative_path:
+            result = {'path': relative_path, 'hash': cached['hash'], 'size': cached['size']}
+        else:
+            result = await self._materialize_image(cached, save_path, relative_path)
+            if result is None:
                 return None
+        self.progress.record_image(image_url, save_path, relative_path, cached['hash'], cached['size'], cached)
+        self.image_stats['not_modified'] += 1
+        return result
+    
+    async def _materialize_image(self, source: Dict[str, Any], save_path: Path,
+                                 relative_path: str) -> Optional[Dict[str, Any]]:
+        """把已下载的图片（source 为 {'path', 'hash', 'size'}）放到 save_path，不访问网络
+        
+        启用 image_store 时从图片库硬链接（旧文件先收入图片库），否则复制一份（保留 mtime）。
+        """
+        source_path = self.articles_dir.parent / source['path']
+        
+        def place():
+            if self.image_store:
+                blob = self.image_store.blob_path(source['hash'])
+                if not blob.exists():
+                    self.image_store.link(source_path, blob)
+                self.image_store.link(blob, save_path)
+            else:
+                save_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source_path, save_path)
+        
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, place)
+        except OSError as e:
+            logger.warning(f"复用已下载图片失败 {source['path']} -> {relative_path}: {e}")
+            return None
+        return {'path': relative_path, 'hash': source['hash'], 'size': source['size']}
+    
+    def _is_image_content_type(self, content_type: str) -> bool:
+        """Content-Type 是否属于允许写盘的图片类型（缺失时 aiohttp 视为 application/octet-stream）"""
+        content_type = (content_type or '').lower()
+        return any(content_type.startswith(allowed) for allowed in self.config.image_content_types)
+    
+    async def _hash_file(self, path: Path) -> Tuple[str, int]:
+        """在线程中分块读取文件计算 SHA-256，返回 (hash, 字节数)"""
+        return await asyncio.get_running_loop().run_in_executor(None, sha256_file, path)
+    
+    async def verify_images(self) -> Dict[str, Any]:
+        """并行重新计算索引中所有图片的 hash
+
+        hashlib 在计算大块数据时释放 GIL，线程池即可用满多核。文件缺失或内容与记录不符的图片
+        从索引中移除（之后重新下载）；内容一致但 mtime 变化的记录会被刷新。
+        """
+        digests = self.progress.image_index.digests()
+        summary = {'checked': len(digests), 'ok': 0, 'refreshed': 0, 'missing': 0, 'mismatched': 0}
+        if not digests:
+            self.image_stats['verify'] = summary
+            return summary
+        
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        workers = self.config.transform_workers or os.cpu_count() or 1
+        root = self.articles_dir.parent
+        
+        async def check(digest: int, executor: Executor):
+            entry = self.progress.image_index.get(digest)
+            if entry is None:
+                return
+            path = root / entry['path']
+            try:
+                file_hash, size = await loop.run_in_executor(executor, sha256_file, path)
+            except OSError:
+                self.progress.forget_image(digest)
+                summary['missing'] += 1
+                return
+            if file_hash != entry.get('hash') or size != entry.get('size'):
+                logger.warning(f"图片内容与索引不符，将重新下载: {entry['path']}")
+                self.progress.forget_image(digest)
+                if self.image_store:
+                    self.image_store.discard(entry.get('hash', ''))
+                summary['mismatched'] += 1
+            elif self.progress.trusted_image(digest, path, entry['path']) is None:
+                self.progress.record_image(digest, path, entry['path'], file_hash, size)
+                summary['refreshed'] += 1
+            else:
+                summary['ok'] += 1
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='verify') as executor:
+            await asyncio.gather(*(check(digest, executor) for digest in digests))
+        
+        summary['seconds'] = round(time.monotonic() - started, 3)
+        self.image_stats['verify'] = summary
+        logger.info(f"图片校验完成: {summary}")
+        return summary
     
     async def download_images_batch(self, image_urls: List[tuple]) -> List[Optional[Dict[str, Any]]]:
         """批量下载图片"""
@@ -361,157 +1197,121 @@ class NewsletterCrawler:
     
     def extract_images_from_html(self, html_content: str) -> List[str]:
         """从HTML内容中提取图片URL"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        images = []
-        
-        for img in soup.find_all('img'):
-            src = img.get('src') or img.get('data-src')
-            if src:
-                # 处理相对URL
-                if src.startswith('//'):
-                    src = 'https:' + src
-                elif src.startswith('/'):
-                    src = urljoin(self.base_url, src)
-                elif not src.startswith(('http://', 'https://')):
-                    src = urljoin(self.base_url, src)
-                images.append(src)
-        
-        return images
-    
-    async def get_article_content_with_page(self, article_url: str, page: Page, retry_count: int = 0) -> Optional[str]:
-        """使用指定的页面获取文章内容，支持重试"""
-        max_retries = 3
-        base_delay = 2.0  # 基础延迟（秒）
-        
+        return transform.extract_image_urls(html_content, self.base_url)
+    
+    def _normalize_image_url(self, src: str) -> str:
+        """处理相对URL"""
+        return transform.normalize_image_url(src, self.base_url)
+    
+    async def get_article_content_with_page(self, article_url: str, page: Page) -> Optional[str]:
+        """使用指定的页面获取文章内容，按 RENDER_RETRY_RULES 统一重试"""
         try:
-            # 如果是重试，添加指数退避延迟
-            if retry_count > 0:
-                delay = base_delay * (2 ** (retry_count - 1))
-                logger.info(f"重试 {retry_count}/{max_retries}，等待 {delay} 秒...")
-                await asyncio.sleep(delay)
-            
-            response = await page.goto(article_url, wait_until='networkidle', timeout=self.config.browser_timeout)
-            
-            # 检查HTTP响应状态码
-            status_code = response.status if response else None
-            
-            # 只有真正的HTTP 429才算限流
-            if status_code == 429:
-                logger.warning(f"检测到真实的HTTP 429限流: {article_url}")
-                if retry_count < max_retries:
-                    # 限流时等待更长时间
-                    await asyncio.sleep(10)
-                    return await self.get_article_content_with_page(article_url, page, retry_count + 1)
-                else:
-                    logger.error(f"超过最大重试次数，限流持续: {article_url}")
-                    return None
-            
-            # 如果状态码不是200也不是429，记录但继续尝试
-            if status_code and status_code != 200:
-                logger.debug(f"HTTP状态码 {status_code}: {article_url}")
-            
-            # 获取页面内容
-            page_content = await page.content()
-            
-            # 只检查Cloudflare或真实的限流页面文本
-            rate_limit_indicators = [
-                'Access denied',
-                'Error 1015',
-                'You are being rate limited',
-                'Too many requests from this IP',
-                'Please wait a few minutes'
-            ]
-            
-            if any(indicator in page_content for indicator in rate_limit_indicators):
-                logger.warning(f"检测到限流页面: {article_url}")
-                if retry_count < max_retries:
-                    await asyncio.sleep(10)
-                    return await self.get_article_content_with_page(article_url, page, retry_count + 1)
-                else:
-                    logger.error(f"超过最大重试次数，限流持续: {article_url}")
-                    return None
-            
-            # 检查是否真正需要登录或付费（更严格的条件）
-            paywall_indicators = [
-                'This post is for paid subscribers',
-                'Upgrade to paid',
-                'This content is for subscribers only',
-                'Become a paid subscriber to read',
-                'Available for paid subscribers'
-            ]
-            
-            if any(indicator in page_content for indicator in paywall_indicators):
-                logger.warning(f"文章需要付费订阅: {article_url}")
-            
-            # 等待内容加载 - 优先使用干净的内容选择器
-            content_selectors = [
-                '.markup',                    # Priority: Clean content only
-                '.body.markup',               # Priority: More specific clean content
-                'article .markup',            # Priority: Scoped to article
-                'article .body',              # Priority: Alternative within article
-                '.single-post-container',     # Fallback selectors
-                '.post-content',
-                '.entry-content', 
-                '.article-content',
-                '[data-testid="post-content"]',
-                'article',                    # Moved to end - contains UI elements
-                'main'
-            ]
-            
-            for selector in content_selectors:
-                try:
-                    await page.wait_for_selector(selector, timeout=5000)
-                    element = await page.query_selector(selector)
-                    if element:
-                        html_content = await element.inner_html()
-                        # 验证内容不为空
-                        if html_content and len(html_content) > 100:
-                            return html_content
-                except:
-                    continue
-            
-            # 如果都找不到，获取body内容
-            body = await page.query_selector('body')
-            if body:
-                html_content = await body.inner_html()
-                # 检查是否是有效内容
-                if html_content and len(html_content) > 500:
-                    return html_content
-            
-            # 如果内容太少，可能需要重试
-            if retry_count < max_retries:
-                logger.warning(f"内容过少，尝试重新获取: {article_url}")
-                return await self.get_article_content_with_page(article_url, page, retry_count + 1)
-                
-        except asyncio.TimeoutError:
-            logger.error(f"获取文章超时: {article_url}")
-            if retry_count < max_retries:
-                return await self.get_article_content_with_page(article_url, page, retry_count + 1)
+            return await self.retry_policy.run(self._load_article_once, article_url, page,
+                                               stage='render', rules=self.RENDER_RETRY_RULES)
         except Exception as e:
             logger.error(f"获取文章内容失败 {article_url}: {e}")
-            if retry_count < max_retries and 'Connection' in str(e):
-                # 网络错误时重试
-                return await self.get_article_content_with_page(article_url, page, retry_count + 1)
+            return None
+    
+    async def _load_article_once(self, article_url: str, page: Page) -> str:
+        """单次尝试：导航并抽取正文；失败时抛出带错误类别的异常，由重试策略决定是否重试"""
+        await self.rate_limiter.acquire(article_url)
+        response = await page.goto(article_url, wait_until='networkidle', timeout=self.config.browser_timeout)
+        
+        # 检查HTTP响应状态码
+        status_code = response.status if response else None
+        
+        # 只有真正的HTTP 429才算限流
+        if status_code == 429:
+            logger.warning(f"检测到真实的HTTP 429限流: {article_url}")
+            self.concurrency.record_throttle('http_429')
+            headers = getattr(response, 'headers', None) or {}
+            raise RetryableError(f"HTTP 429: {article_url}", 'throttled',
+                                 retry_after=parse_retry_after(headers.get('retry-after')))
+        
+        # 如果状态码不是200也不是429，记录但继续尝试
+        if status_code and status_code != 200:
+            logger.debug(f"HTTP状态码 {status_code}: {article_url}")
+        elif status_code and self.http_cache:
+            self._page_validators[article_url] = (article_url, dict(response.headers))
+        
+        return await self._extract_article_from_page(article_url, page, status_code)
+    
+    async def _extract_article_from_page(self, article_url: str, page: Page,
+                                         status_code: Optional[int] = None) -> str:
+        """从已导航的页面抽取正文；限流/校验页与内容过少时抛出 RetryableError
+        
+        限流与人机校验只在正文选择器都未命中时判断（见 EXTRACT_CONTENT_JS），
+        此时 403/503 状态码也视为人机校验页。
+        """
+        # 单次页面内求值：竞速所有正文选择器，同时返回图片列表与限流/付费墙信号
+        extraction = await self.extract_content_in_page(page)
+        if (extraction.get('selector') in (None, 'body') and status_code in self.CHALLENGE_STATUS_CODES
+                and not extraction.get('rateLimited')):
+            extraction['challenged'] = True
+        
+        # 只检查Cloudflare或真实的限流页面文本
+        if extraction.get('rateLimited') or extraction.get('challenged'):
+            logger.warning(f"检测到限流页面: {article_url}")
+            if extraction.get('challenged'):
+                self.concurrency.record_throttle('challenge')
+                raise RetryableError(f"人机校验页面: {article_url}", 'challenge')
+            self.concurrency.record_throttle('rate_limit_page')
+            raise RetryableError(f"限流页面: {article_url}", 'throttled')
+        
+        # 检查是否真正需要登录或付费（更严格的条件）
+        if extraction.get('paywalled'):
+            logger.warning(f"文章需要付费订阅: {article_url}")
+        
+        html_content = extraction.get('html')
+        if html_content:
+            # 图片列表随正文一并返回，解析阶段无需再解析一遍 HTML
+            self._image_hints[article_url] = extraction.get('images') or []
+            return html_content
         
-        return None
+        raise RetryableError(f"内容过少: {article_url}", 'no_content')
+    
+    async def extract_content_in_page(self, page: Page) -> Dict[str, Any]:
+        """一次 CDP 往返完成正文抽取
+        
+        页面内同时检查所有正文选择器（按学习到的命中顺序，命中即返回，最长等待 selector_timeout），
+        返回命中的选择器、正文 HTML、正文内图片地址，以及限流/付费墙信号。
+        """
+        extraction = await page.evaluate(EXTRACT_CONTENT_JS, {
+            'selectors': self._ordered_content_selectors(),
+            'timeout': self.config.selector_timeout,
+            'minLength': 100,
+            'bodyMinLength': 500,
+            'rateLimitIndicators': self.RATE_LIMIT_INDICATORS,
+            'challengeTitles': self.CHALLENGE_TITLES,
+            'challengeSelectors': self.CHALLENGE_SELECTORS,
+            'paywallIndicators': self.PAYWALL_INDICATORS,
+        }) or {}
+        selector = extraction.get('selector') or 'miss'
+        self.selector_stats[selector] = self.selector_stats.get(selector, 0) + 1
+        return extraction
+    
+    def _ordered_content_selectors(self) -> List[str]:
+        """按历史命中次数排序正文选择器（样本不足时保持默认优先级）"""
+        if sum(self.selector_stats.get(s, 0) for s in self.CONTENT_SELECTORS) < self.SELECTOR_LEARNING_MIN_SAMPLES:
+            return list(self.CONTENT_SELECTORS)
+        priority = {selector: index for index, selector in enumerate(self.CONTENT_SELECTORS)}
+        return sorted(self.CONTENT_SELECTORS, key=lambda s: (-self.selector_stats.get(s, 0), priority[s]))
     
     async def process_article_batch(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """批量处理文章 - 使用信号量限制并发"""
         results = []
         
-        # 使用信号量限制并发数，避免页面冲突
+        # 在途数由自适应控制器限制，页面池独占借还，避免页面冲突
         if not self.page_pool:
             raise RuntimeError("No browser pages available. Ensure Playwright is installed and initialized.")
-        sem = asyncio.Semaphore(len(self.page_pool))
         
-        async def process_with_semaphore(article, index):
-            async with sem:
-                # 获取一个可用页面
-                page = self.page_pool[index % len(self.page_pool)]
-                return await self.process_article_with_page(article, page)
+        async def process_in_slot(article):
+            async with self.concurrency.slot():
+                await self.concurrency.wait_backoff()
+                return await self.process_article(article)
         
         # 创建任务
-        tasks = [process_with_semaphore(article, i) for i, article in enumerate(articles)]
+        tasks = [process_in_slot(article) for article in articles]
         
         # 并发执行
         batch_results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -519,14 +1319,18 @@ class NewsletterCrawler:
         for i, result in enumerate(batch_results):
             if isinstance(result, Exception):
                 logger.error(f"处理文章失败 {articles[i].get('id')}: {result}")
-                self.progress.failed_articles[articles[i]['id']] = str(result)
+                self.progress.mark_failed(articles[i]['id'], str(result))
             else:
                 results.append(result)
         
         return results
     
-    async def process_article_with_page(self, article_meta: Dict[str, Any], page: Page) -> Dict[str, Any]:
-        """使用指定页面处理单篇文章"""
+    async def process_article(self, article_meta: Dict[str, Any]) -> Dict[str, Any]:
+        """处理单篇文章：只在渲染时从页面池借出页面，拿到正文 HTML 即归还，解析/图片/写盘不占用页面"""
+        return await self.process_article_with_page(article_meta, None)
+    
+    async def process_article_with_page(self, article_meta: Dict[str, Any], page: Optional[Page]) -> Dict[str, Any]:
+        """使用指定页面处理单篇文章（page 为 None 时渲染阶段从页面池借用；传入的页面由调用方持有到返回）"""
         article_id = article_meta['id']
         
         # 检查是否已处理
@@ -537,11 +1341,32 @@ class NewsletterCrawler:
         async with self.article_semaphore:
             return await self._process_article_internal(article_meta, page)
     
-    async def _process_article_internal(self, article_meta: Dict[str, Any], page: Page) -> Dict[str, Any]:
-        """内部文章处理逻辑"""
+    async def _process_article_internal(self, article_meta: Dict[str, Any], page: Optional[Page] = None) -> Dict[str, Any]:
+        """内部文章处理逻辑（依次执行 获取/渲染 → 解析 → 图片 → 写盘 四个阶段）"""
+        ctx = self._prepare_article(article_meta)
+        await self._fetch_article(ctx, page)
+        await self._parse_article(ctx)
+        await self._download_article_images(ctx)
+        return await self._write_article(ctx)
+    
+    async def _fetch_article(self, ctx: ArticleContext, page: Optional[Page] = None):
+        """获取正文：未变化（304）或 HTTP 直取成功时不占用浏览器页面，否则渲染
+        
+        未指定页面时从页面池借出，渲染完成立即归还。
+        """
+        if (await self._revalidate_article(ctx)
+                or self.config.fetch_mode == 'http_first' and await self._fetch_article_http_first(ctx)):
+            return
+        if page is not None:
+            await self._render_article(ctx, page)
+            return
+        async with self.page_pool.checkout() as pooled_page:
+            await self._render_article(ctx, pooled_page)
+    
+    def _prepare_article(self, article_meta: Dict[str, Any]) -> ArticleContext:
+        """创建文章目录并初始化流水线上下文"""
         article_id = article_meta['id']
         title = article_meta.get('title', 'Untitled')
-        canonical_url = article_meta.get('canonical_url', '')
         
         logger.info(f"处理文章: {title}")
         
@@ -558,79 +1383,380 @@ class NewsletterCrawler:
         images_dir = article_dir / "images"
         images_dir.mkdir(exist_ok=True)
         
-        # 获取文章内容
-        html_content = None
+        return ArticleContext(article_meta=article_meta, article_dir=article_dir, images_dir=images_dir)
+    
+    async def _render_article(self, ctx: ArticleContext, page: Page):
+        """渲染阶段：唯一需要浏览器页面的阶段，拿到正文 HTML 即可释放页面"""
+        canonical_url = ctx.article_meta.get('canonical_url', '')
         if canonical_url:
-            html_content = await self.get_article_content_with_page(canonical_url, page)
+            self.fetch_stats['browser'] += 1
+            if self.request_blocker:
+                self.request_blocker.reset(page)
+            started = time.monotonic()
+            try:
+                ctx.html_content = await self.get_article_content_with_page(canonical_url, page)
+            finally:
+                # 图片列表随文章上下文传递，渲染失败或取消时也不会留在 _image_hints 中
+                ctx.image_hint = self._image_hints.pop(canonical_url, None)
+            if ctx.html_content:
+                self.concurrency.record_success(time.monotonic() - started)
+            await self._remember_article(ctx, time.monotonic() - started)
+            if self.request_blocker:
+                ctx.blocked_requests = self.request_blocker.collect(page)
+    
+    async def _start_transform_executor(self):
+        """创建转换执行器，并给每个 worker 提交一次预热任务"""
+        mode = self.config.transform_executor
+        if mode == 'inline':
+            return
+        workers = self.config.transform_workers or min(4, os.cpu_count() or 1)
+        if mode == 'process':
+            # spawn：worker 不继承事件循环、浏览器连接等父进程状态
+            self.transform_executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        elif mode == 'thread':
+            self.transform_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='transform')
+        else:
+            raise ValueError(f"Unknown transform_executor: {mode}")
+        self.transform_stats['workers'] = workers
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        await asyncio.gather(*(loop.run_in_executor(self.transform_executor, transform.warm_up)
+                               for _ in range(workers)))
+        logger.info(f"转换执行器就绪（{mode} × {workers}），预热耗时 {time.monotonic() - started:.2f} 秒")
+    
+    async def _run_transform(self, func, *args):
+        """在转换执行器中运行 transform 模块的纯函数（inline 模式直接在事件循环中执行）"""
+        started = time.monotonic()
+        try:
+            if self.transform_executor is None:
+                return func(*args)
+            # 记录在途任务，退出时取消仍在排队的部分（Python 3.8 的 shutdown 没有 cancel_futures）
+            future = self.transform_executor.submit(func, *args)
+            self._transform_futures.add(future)
+            future.add_done_callback(self._transform_futures.discard)
+            return await asyncio.wrap_future(future)
+        finally:
+            self.transform_stats['tasks'] += 1
+            self.transform_stats['busy_time'] += time.monotonic() - started
+    
+    async def _start_browser_shards(self):
+        """并行启动 browser_shards 个独立浏览器，各自预热一个页面池分片"""
+        shard_count = max(1, self.config.browser_shards)
+        max_pages = self._max_pages_per_shard()
+        self.shard_startup_seconds = [0.0] * shard_count
+        
+        async def start_shard(index: int):
+            started = time.monotonic()
+            browser = await self._launch_browser()
+            try:
+                pool = PagePool(
+                    factory=partial(self._new_pool_page, browser),
+                    closer=self._close_pool_page,
+                    min_size=self.config.page_pool_min,
+                    max_size=max_pages,
+                    max_navigations=self.config.page_max_navigations,
+                    max_heap_mb=self.config.page_max_heap_mb,
+                    idle_timeout=self.config.page_idle_timeout,
+                )
+                await pool.start()
+            except Exception:
+                await browser.close()
+                raise
+            self.shard_startup_seconds[index] = round(time.monotonic() - started, 3)
+            return browser, pool
+        
+        results = await asyncio.gather(*(start_shard(i) for i in range(shard_count)), return_exceptions=True)
+        started_shards = [r for r in results if not isinstance(r, BaseException)]
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            for browser, pool in started_shards:
+                await pool.close()
+                await browser.close()
+            raise errors[0]
+        
+        self.browsers = [browser for browser, _ in started_shards]
+        self.browser = self.browsers[0]
+        pools = [pool for _, pool in started_shards]
+        self.page_pool = pools[0] if shard_count == 1 else ShardedPagePool(pools)
+        self.concurrency = self._new_concurrency_controller(self.page_pool.max_size)
+        logger.info(f"启动了 {shard_count} 个浏览器分片，耗时 {self.shard_startup_seconds} 秒，"
+                    f"页面上限 {self.page_pool.max_size}")
+    
+    def _new_concurrency_controller(self, max_limit: int) -> AdaptiveConcurrencyController:
+        """在途文章数控制器：上限为页面数，关闭自适应时固定为上限"""
+        if not self.config.adaptive_concurrency:
+            return AdaptiveConcurrencyController(initial=max_limit, max_limit=max_limit, min_limit=max_limit,
+                                                 base_backoff=self.config.article_delay)
+        initial = self.config.concurrency_initial or max(1, max_limit // 2)
+        return AdaptiveConcurrencyController(
+            initial=initial,
+            max_limit=max_limit,
+            latency_factor=self.config.latency_backoff_factor,
+            base_backoff=self.config.article_delay,
+        )
+    
+    async def _launch_browser(self):
+        """启动一个浏览器进程（子类可覆盖启动参数）"""
+        return await self.playwright.chromium.launch(
+            headless=True,
+            args=['--disable-blink-features=AutomationControlled']
+        )
+    
+    def _max_pages_per_shard(self) -> int:
+        """单个浏览器分片的页面上限"""
+        return min(self.config.max_concurrent_articles, 5)  # 最多5个页面
+    
+    async def _new_pool_page(self, browser) -> Page:
+        """页面池工厂：在分片浏览器上新建页面"""
+        page = await browser.new_page()
+        await page.set_viewport_size({'width': 1920, 'height': 1080})
+        # 设置页面超时
+        page.set_default_timeout(self.config.browser_timeout)
+        await self._install_request_blocking(page)
+        return page
+    
+    async def _close_pool_page(self, page: Page):
+        """页面池关闭函数"""
+        if self.request_blocker:
+            self.request_blocker.detach(page)
+        await page.close()
+    
+    async def _install_request_blocking(self, page: Page):
+        """为池化页面注册请求拦截（未启用时不做任何事）"""
+        if self.request_blocker:
+            await self.request_blocker.attach(page)
+    
+    def _record_blocked_requests(self, ctx: ArticleContext):
+        """汇总单篇文章渲染时被拦截的请求；被拦截的图片若随后由 download_image 下载，其大小计入节省字节"""
+        blocked = ctx.blocked_requests
+        if not blocked:
+            return
+        stats = self.blocking_stats
+        stats['articles'] += 1
+        stats['blocked_requests'] += blocked['blocked']
+        for resource_type, count in blocked['by_type'].items():
+            stats['by_type'][resource_type] = stats['by_type'].get(resource_type, 0) + count
+        downloaded_sizes = {image['original_url']: image['size'] for image in ctx.article_images}
+        if ctx.cover_image_info and ctx.article_meta.get('cover_image'):
+            downloaded_sizes[ctx.article_meta['cover_image']] = ctx.cover_image_info['size']
+        stats['known_bytes_saved'] += sum(
+            downloaded_sizes[url] for url in set(blocked['image_urls']) if url in downloaded_sizes
+        )
+    
+    def _blocking_summary(self) -> Dict[str, Any]:
+        """请求拦截统计（含每篇文章平均节省的请求数与字节数）"""
+        stats = dict(self.blocking_stats)
+        articles = stats['articles']
+        stats['avg_blocked_requests_per_article'] = round(stats['blocked_requests'] / articles, 2) if articles else 0
+        stats['avg_known_bytes_saved_per_article'] = int(stats['known_bytes_saved'] / articles) if articles else 0
+        return stats
+    
+    async def _fetch_article_http_first(self, ctx: ArticleContext) -> bool:
+        """HTTP 直取正文；成功返回 True，需要浏览器兜底时记录原因并返回 False"""
+        started = time.monotonic()
+        html_content, reason = await self.fetch_article_via_http(ctx.article_meta)
+        if html_content:
+            self.fetch_stats['http'] += 1
+            ctx.html_content = html_content
+            await self._remember_article(ctx, time.monotonic() - started)
+            return True
+        reasons = self.fetch_stats['fallback_reasons']
+        reasons[reason] = reasons.get(reason, 0) + 1
+        if reason == 'challenge':
+            self.concurrency.record_throttle('http_challenge')
+        logger.debug(f"HTTP 直取失败（{reason}），改用浏览器: {ctx.article_meta.get('id')}")
+        return False
+    
+    async def fetch_article_via_http(self, article_meta: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """不经浏览器获取正文 HTML
+        
+        依次尝试 post JSON API（`/api/v1/posts/{slug}` 的 body_html）与服务端渲染页面中的
+        `.markup`/`.body.markup`。返回 (正文 HTML, None)，或 (None, 回退原因)：
+        no_url / http_error / challenge / paywalled / no_content。
+        """
+        slug = article_meta.get('slug')
+        canonical_url = article_meta.get('canonical_url')
+        if not slug and not canonical_url:
+            return None, 'no_url'
+        
+        reason = 'no_content'
+        try:
+            if slug:
+                post_url = f"{self.base_url}/api/v1/posts/{slug}"
+                await self.rate_limiter.acquire(post_url)
+                async with self.session.get(post_url) as response:
+                    if response.status in (403, 429, 503):
+                        return None, 'challenge'
+                    if response.status == 200:
+                        post = await response.json(content_type=None)
+                        body_html = post.get('body_html') if isinstance(post, dict) else None
+                        if body_html and any(indicator in body_html for indicator in self.PAYWALL_INDICATORS):
+                            reason = 'paywalled'
+                        elif isinstance(post, dict) and post.get('audience') == 'only_paid' and post.get('truncated_body_text'):
+                            reason = 'paywalled'
+                        elif body_html and len(body_html) > 100:
+                            if canonical_url and self.http_cache:
+                                self._page_validators[canonical_url] = (post_url, dict(response.headers))
+                            return body_html, None
+            
+            if canonical_url:
+                await self.rate_limiter.acquire(canonical_url)
+                async with self.session.get(canonical_url) as response:
+                    if response.status in (403, 429, 503):
+                        return None, 'challenge'
+                    if response.status != 200:
+                        return None, 'http_error'
+                    page_content = await response.text()
+                    validators = (canonical_url, dict(response.headers))
+                
+                if any(indicator in page_content for indicator in self.PAYWALL_INDICATORS):
+                    return None, 'paywalled'
+                html_content = self.extract_content_from_html(page_content)
+                if html_content:
+                    if self.http_cache:
+                        self._page_validators[canonical_url] = validators
+                    return html_content, None
+                if self.is_blocked_page(page_content):
+                    return None, 'challenge'
+        except Exception as e:
+            logger.debug(f"HTTP 直取正文失败 {canonical_url or slug}: {e}")
+            return None, 'http_error'
         
-        # 准备图片下载任务
-        image_tasks = []
+        return None, reason
+    
+    def is_blocked_page(self, page_html: str) -> bool:
+        """没有找到正文的页面是否为人机校验/限流页：看标题与校验表单等结构，以及限流页文本"""
+        soup = BeautifulSoup(page_html, HTML_PARSER)
+        title = soup.title.get_text(strip=True) if soup.title else ''
+        if any(title.startswith(prefix) for prefix in self.CHALLENGE_TITLES):
+            return True
+        if any(soup.select_one(selector) for selector in self.CHALLENGE_SELECTORS):
+            return True
+        return any(indicator in page_html for indicator in self.RATE_LIMIT_INDICATORS)
+    
+    def extract_content_from_html(self, page_html: str) -> Optional[str]:
+        """从服务端渲染的页面 HTML 中按 CONTENT_SELECTORS 优先级抽取正文（与浏览器路径一致）"""
+        soup = BeautifulSoup(page_html, HTML_PARSER)
+        for selector in self.CONTENT_SELECTORS:
+            element = soup.select_one(selector)
+            if element:
+                html_content = element.decode_contents()
+                if html_content and len(html_content) > 100:
+                    return html_content
+        return None
+    
+    async def _revalidate_article(self, ctx: ArticleContext) -> bool:
+        """用上次获取正文时的校验信息发条件请求；304 时读回缓存的正文 HTML 并返回 True"""
+        key = ctx.article_meta.get('canonical_url')
+        entry = self.http_cache.get(key) if self.http_cache and key else None
+        if not entry or entry.get('kind') != 'page':
+            return False
+        body_path = self.http_cache.body_dir / entry['body']
+        if not body_path.exists():
+            self.http_cache.forget(key)
+            return False
+        
+        started = time.monotonic()
+        try:
+            await self.rate_limiter.acquire(entry['url'])
+            async with self.session.get(entry['url'], headers=conditional_headers(entry)) as response:
+                # 有变化时不读响应体，交给正常的获取路径
+                not_modified = response.status == 304
+        except Exception as e:
+            logger.debug(f"条件请求失败 {entry['url']}: {e}")
+            return False
+        self.revalidation.record_request('page', not_modified, entry, time.monotonic() - started)
+        if not not_modified:
+            return False
+        
+        async with aiofiles.open(body_path, 'r', encoding='utf-8') as f:
+            ctx.html_content = await f.read()
+        self.fetch_stats['not_modified'] += 1
+        return True
+    
+    async def _remember_article(self, ctx: ArticleContext, elapsed: float):
+        """保存本次获取正文的响应校验信息与正文 HTML，供下次爬取发条件请求"""
+        key = ctx.article_meta.get('canonical_url')
+        validators = self._page_validators.pop(key, None) if key else None
+        if not validators or not self.http_cache or not ctx.html_content:
+            return
+        url, headers = validators
+        body_path = self.http_cache.body_path(key)
+        if self.http_cache.update(key, headers, elapsed, url=url, body=body_path.name,
+                                  size=len(ctx.html_content.encode('utf-8'))):
+            body_path.parent.mkdir(parents=True, exist_ok=True)
+            async with aiofiles.open(body_path, 'w', encoding='utf-8') as f:
+                await f.write(ctx.html_content)
+    
+    async def _parse_article(self, ctx: ArticleContext):
+        """解析阶段：抽取正文图片并规划所有图片的保存路径"""
+        article_meta = ctx.article_meta
         
         # 封面图片
-        cover_image_info = None
         if article_meta.get('cover_image'):
             cover_url = article_meta['cover_image']
             cover_ext = self._guess_image_extension(cover_url)
-            cover_path = images_dir / f"cover{cover_ext}"
-            image_tasks.append((cover_url, cover_path))
+            cover_path = ctx.images_dir / f"cover{cover_ext}"
+            ctx.image_tasks.append((cover_url, cover_path))
         
-        # 文章中的图片
-        article_image_urls = []
-        if html_content:
-            article_image_urls = self.extract_images_from_html(html_content)
-            for i, img_url in enumerate(article_image_urls):
+        # 文章中的图片（浏览器抽取时已顺带拿到图片列表，则无需再解析 HTML）
+        if ctx.html_content:
+            if ctx.image_hint is not None:
+                ctx.article_image_urls = [self._normalize_image_url(src) for src in ctx.image_hint]
+            else:
+                ctx.article_image_urls = await self._run_transform(
+                    transform.extract_image_urls, ctx.html_content, self.base_url)
+            for i, img_url in enumerate(ctx.article_image_urls):
                 img_ext = self._guess_image_extension(img_url)
-                img_path = images_dir / f"img_{i}{img_ext}"
-                image_tasks.append((img_url, img_path))
-        
-        # 批量下载所有图片
-        downloaded_images = await self.download_images_batch(image_tasks)
+                img_path = ctx.images_dir / f"img_{i}{img_ext}"
+                ctx.image_tasks.append((img_url, img_path))
+    
+    async def _download_article_images(self, ctx: ArticleContext):
+        """图片阶段：批量下载图片，记录正文中图片链接到相对路径的替换（在写盘阶段统一改写）"""
+        article_meta = ctx.article_meta
+        downloaded_images = await self.download_images_batch(ctx.image_tasks)
         
         # 处理下载结果
         if article_meta.get('cover_image') and downloaded_images and downloaded_images[0]:
-            cover_image_info = downloaded_images[0]
+            ctx.cover_image_info = downloaded_images[0]
         
-        article_images = []
-        if html_content and len(downloaded_images) > 1:
+        if ctx.html_content and len(downloaded_images) > 1:
             start_idx = 1 if article_meta.get('cover_image') else 0
-            for i, (img_url, img_info) in enumerate(zip(article_image_urls, downloaded_images[start_idx:])):
+            for i, (img_url, img_info) in enumerate(zip(ctx.article_image_urls, downloaded_images[start_idx:])):
                 if img_info:
-                    article_images.append({
+                    ctx.article_images.append({
                         'original_url': img_url,
                         'local_path': img_info['path'],
                         'hash': img_info['hash'],
                         'size': img_info['size']
                     })
-                    # 替换HTML中的图片链接为相对路径（保留原扩展名）
-                    rel_ext = Path(article_images[-1]['local_path']).suffix or '.jpg'
-                    relative_path = f"images/img_{i}{rel_ext}"
-                    html_content = html_content.replace(img_url, relative_path)
-        
-        # 转换为Markdown
-        markdown_content = ""
-        if html_content and MARKDOWNIFY_AVAILABLE:
-            # 只在内容真的太短时才警告
-            if len(html_content) < 100:
-                logger.warning(f"文章内容过短 ({len(html_content)} 字符): {article_id}")
-                markdown_content = md(html_content, heading_style="ATX", strip=['script', 'style'])
-                if not markdown_content.strip():
-                    markdown_content = "**注意: 未能获取到有效内容**"
-            else:
-                # 正常转换为Markdown
-                markdown_content = md(html_content, heading_style="ATX", strip=['script', 'style'])
-        elif not html_content:
+                    # HTML中的图片链接替换为相对路径（保留原扩展名）
+                    rel_ext = Path(ctx.article_images[-1]['local_path']).suffix or '.jpg'
+                    ctx.image_replacements.append((img_url, f"images/img_{i}{rel_ext}"))
+        self._record_blocked_requests(ctx)
+    
+    async def _write_article(self, ctx: ArticleContext) -> Dict[str, Any]:
+        """写盘阶段：转换 Markdown，写出 content.md 与 metadata.json，并标记为已处理"""
+        article_meta = ctx.article_meta
+        article_id = article_meta['id']
+        article_dir = ctx.article_dir
+        cover_image_info = ctx.cover_image_info
+        article_images = ctx.article_images
+        
+        # 改写图片链接、转换为Markdown并生成 content.md（CPU 密集，交给转换执行器）
+        converted = await self._run_transform(
+            transform.convert_article, ctx.html_content,
+            article_meta.get('title', 'Untitled'), article_meta.get('subtitle'), 'title' in article_meta,
+            ctx.image_replacements, self.markdown_ruleset)
+        html_content = converted['content_html']
+        if converted['warning'] == 'short':
+            logger.warning(f"文章内容过短 ({len(html_content)} 字符): {article_id}")
+        elif converted['warning'] == 'empty':
             logger.warning(f"未获取到HTML内容: {article_id}")
-            markdown_content = "**错误: 未能获取到文章内容**\n\n可能原因:\n- 网络连接问题\n- 文章需要登录访问\n- 文章已被删除"
-        
-        # 生成Markdown文件内容（只包含正文） - 先创建临时article_data
-        temp_article_data = {
-            **article_meta,
-            'content_markdown': markdown_content
-        }
-        md_content = self.generate_markdown_file(temp_article_data)
-        
-        # 计算文章内容的hash
-        content_hash = hashlib.sha256(md_content.encode('utf-8')).hexdigest()
+        markdown_content = converted['markdown_content']
+        md_content = converted['md_content']
+        content_hash = converted['content_hash']
         
         # 创建文章的完整数据
         article_data = {
@@ -675,8 +1801,16 @@ class NewsletterCrawler:
         async with aiofiles.open(metadata_file_path, 'w', encoding='utf-8') as f:
             await f.write(json.dumps(metadata, ensure_ascii=False, indent=2))
         
+        # 更新文章清单（先于进度标记：崩溃后重新处理时再次写入即可）
+        if self.manifest is not None:
+            self.manifest.record_article(
+                article_id, metadata['article_directory'], content_hash,
+                manifest_images(cover_image_info, article_images, article_meta.get('cover_image')),
+                metadata['processed_date'], title=metadata['title'], slug=metadata['slug'],
+                post_date=metadata['post_date'])
+        
         # 标记为已处理
-        self.progress.processed_articles.add(article_id)
+        self.progress.mark_processed(article_id)
         
         # 提取推荐算法相关字段
         recommendation_data = {
@@ -692,78 +1826,7 @@ class NewsletterCrawler:
     
     def generate_markdown_file(self, article_data: Dict[str, Any]) -> str:
         """生成Markdown文件内容 - 只包含正文"""
-        md_content = []
-        
-        # 标题
-        md_content.append(f"# {article_data.get('title', 'Untitled')}")
-        md_content.append("")
-        
-        # 副标题
-        if article_data.get('subtitle'):
-            md_content.append(f"### {article_data.get('subtitle')}")
-            md_content.append("")
-        
-        # 正文内容 - 修复内容中的图片路径
-        if article_data.get('content_markdown'):
-            # 修复正文中的图片路径
-            content_markdown = article_data['content_markdown']
-            # 图片路径已经在HTML阶段处理为相对路径 images/img_x.jpg
-            
-            # 清理掉文章开头的分享按钮、订阅信息等非正文内容
-            lines = content_markdown.split('\n')
-            cleaned_lines = []
-            skip_until_main_content = True
-            
-            for i, line in enumerate(lines):
-                # 检测到真正的文章内容开始
-                if skip_until_main_content:
-                    # 检查是否是真正的内容开始
-                    # 1. 检查是否有实质内容（长度超过20字符且不是UI元素）
-                    stripped_line = line.strip()
-                    if len(stripped_line) > 20 and not any(skip_word in stripped_line for skip_word in 
-                        ['Share this post', 'Copy link', 'Facebook', 'Email', 'Discover more from', 
-                         'Subscribe', 'Notes', 'More', 'Already have an account']):
-                        skip_until_main_content = False
-                        cleaned_lines.append(line)
-                    # 2. 或者检测到标题
-                    elif stripped_line.startswith('## ') and 'Share this post' not in stripped_line:
-                        skip_until_main_content = False
-                        cleaned_lines.append(line)
-                    # 3. 或者检测到论文标题编号
-                    elif stripped_line.startswith('1).') or stripped_line.startswith('1.'):
-                        skip_until_main_content = False
-                        cleaned_lines.append(line)
-                else:
-                    # 已经开始正文，过滤UI元素
-                    # 跳过重复的分享按钮部分
-                    if any(skip_word in line for skip_word in 
-                           ['Share this post', 'Copy link', 'Facebook', 'Email']):
-                        continue
-                    # 跳过订阅相关内容
-                    if any(skip_word in line for skip_word in 
-                           ['Discover more from', 'Subscribe', 'Already have an account']):
-                        continue
-                    # 跳过页面导航元素
-                    if line.strip() in ['Notes', 'More', 'Share', '[Share](javascript:void(0))']:
-                        continue
-                    
-                    cleaned_lines.append(line)
-            
-            # 如果没有找到内容开始点，则保留所有不是UI元素的内容
-            if not cleaned_lines and content_markdown:
-                for line in lines:
-                    if not any(skip_word in line for skip_word in 
-                              ['Share this post', 'Copy link', 'Facebook', 'Email', 
-                               'Discover more from', 'Subscribe', 'Notes', 'More', 
-                               'Already have an account', '[Share](javascript:void(0))']):
-                        if line.strip():  # 跳过空行
-                            cleaned_lines.append(line)
-            
-            content_markdown = '\n'.join(cleaned_lines).strip()
-            md_content.append(content_markdown)
-            md_content.append("")
-        
-        return "\n".join(md_content)
+        return transform.build_markdown_document(article_data, self.markdown_ruleset)
 
     def _guess_image_extension(self, url: str) -> str:
         """根据 URL 猜测图片扩展名，默认为 .jpg"""
@@ -776,94 +1839,212 @@ class NewsletterCrawler:
             pass
         return '.jpg'
     
+    async def _produce_articles(self, pipeline: StagedPipeline, articles_metadata: List[Dict[str, Any]]):
+        """列表抓取生产者：边翻页边把待处理文章投入流水线（断点续传过滤在此完成），结束时关闭输入"""
+        try:
+            if self.config.incremental_sync:
+                merged, _ = await self.sync_articles_metadata()
+                articles_metadata.extend(merged)
+                for article in merged:
+                    if article['id'] in self.progress.processed_articles:
+                        continue
+                    await pipeline.put(article)
+                return
+            
+            skipped = 0
+            async for article in self.iter_articles_metadata():
+                articles_metadata.append(article)
+                if self.config.enable_resume and article['id'] in self.progress.processed_articles:
+                    skipped += 1
+                    continue
+                await pipeline.put(article)
+            if skipped:
+                logger.info(f"跳过 {skipped} 篇已处理文章")
+            
+            # 保存原始元数据
+            if articles_metadata:
+                await self._write_json_atomic(self.metadata_file, articles_metadata)
+                await self._save_watermark(articles_metadata)
+        finally:
+            await pipeline.close()
+    
+    def _build_pipeline(self, run_state: CrawlRunState) -> StagedPipeline:
+        """构建 渲染 → 解析 → 图片 → 写盘 分阶段流水线"""
+        async def render_stage(article_meta: Dict[str, Any]) -> Optional[ArticleContext]:
+            if self.config.enable_resume and article_meta['id'] in self.progress.processed_articles:
+                logger.info(f"跳过已处理文章: {article_meta['id']}")
+                return None
+            # 在途文章数由自适应控制器决定；检测到限流时所有文章统一退避
+            async with self.concurrency.slot():
+                await self.concurrency.wait_backoff()
+                ctx = self._prepare_article(article_meta)
+                await self._fetch_article(ctx)
+                await asyncio.sleep(self.config.article_delay)
+            return ctx
+        
+        async def parse_stage(ctx: ArticleContext) -> ArticleContext:
+            await self._parse_article(ctx)
+            return ctx
+        
+        async def image_stage(ctx: ArticleContext) -> ArticleContext:
+            await self._download_article_images(ctx)
+            return ctx
+        
+        async def write_stage(ctx: ArticleContext) -> None:
+            result = await self._write_article(ctx)
+            await self._append_outputs(run_state, result)
+            run_state.since_checkpoint += 1
+            self._maybe_checkpoint(run_state)
+            return None
+        
+        def on_error(stage_name: str, item: Any, error: Exception):
+            article_meta = item.article_meta if isinstance(item, ArticleContext) else item
+            logger.error(f"处理文章失败 {article_meta.get('id')}（{stage_name} 阶段）: {error}")
+            self.progress.mark_failed(article_meta['id'], str(error))
+        
+        stage_queue_size = max(1, self.config.stage_queue_size)
+        return StagedPipeline([
+            PipelineStage('render', render_stage, concurrency=self.page_pool.max_size,
+                          queue_size=max(1, self.config.work_queue_size)),
+            PipelineStage('parse', parse_stage, concurrency=self.config.parse_concurrency,
+                          queue_size=stage_queue_size),
+            PipelineStage('images', image_stage, concurrency=self.config.image_stage_concurrency,
+                          queue_size=stage_queue_size),
+            PipelineStage('write', write_stage, concurrency=self.config.write_concurrency,
+                          queue_size=stage_queue_size),
+        ], on_error=on_error)
+    
+    def _output_path(self, name: str) -> Path:
+        suffix = '.jsonl.gz' if self.config.output_compression == 'gzip' else '.jsonl'
+        return self.data_dir / f"{name}{suffix}"
+    
+    def _open_outputs(self, run_state: CrawlRunState):
+        """打开增量输出文件：断点续传时在已有记录后追加，否则重新开始"""
+        append = self.config.enable_resume
+        run_state.processed_writer = JsonlWriter(self._output_path('processed_articles'), append=append)
+        run_state.recommendation_writer = JsonlWriter(self._output_path('recommendation_data'), append=append)
+        if self.config.columnar_export:
+            # 每次运行只追加新分片；不续传时清空旧分片，与 JSONL 保持一致
+            features_dir = self.data_dir / "features"
+            if not append:
+                for path in list_parts(features_dir):
+                    path.unlink()
+            run_state.columnar_exporter = ColumnarExporter(
+                features_dir, self.recommendation_fields, self.config.columnar_export,
+                part_rows=self.config.columnar_part_rows)
+    
+    async def _append_outputs(self, run_state: CrawlRunState, result: Dict[str, Any]):
+        """文章完成即追加到 JSONL（序列化、压缩与写盘在线程中进行），之后不再持有文章内容"""
+        def write():
+            run_state.processed_writer.write(result['article_data'])
+            run_state.recommendation_writer.write(result['recommendation_data'])
+            if run_state.columnar_exporter:
+                run_state.columnar_exporter.append(
+                    article_features(result['article_data'], self.recommendation_fields))
+        
+        async with run_state.output_lock:
+            await asyncio.get_running_loop().run_in_executor(None, write)
+        run_state.processed_count += 1
+        run_state.total_images += len(result['article_data'].get('local_images', []))
+    
+    def _finalize_outputs(self, run_state: CrawlRunState) -> Dict[str, Any]:
+        """关闭增量输出，并逐条流式生成原先的 JSON 数组文件（同一文章重复处理时保留最后一条）"""
+        summary = {'format': 'jsonl', 'compression': self.config.output_compression}
+        for name, writer in (('processed_articles', run_state.processed_writer),
+                             ('recommendation_data', run_state.recommendation_writer)):
+            writer.close()
+            entry = {'path': str(writer.path), 'bytes': writer.path.stat().st_size, 'appended': writer.records}
+            if self.config.legacy_json_outputs:
+                entry['legacy_records'] = write_json_array_from_jsonl(
+                    writer.path, self.data_dir / f"{name}.json", unique_key='id')
+            summary[name] = entry
+        if run_state.columnar_exporter:
+            run_state.columnar_exporter.close()
+            summary['columnar'] = run_state.columnar_exporter.stats()
+        return summary
+    
+    def pipeline_queue_depths(self) -> Dict[str, int]:
+        """当前流水线各阶段的队列深度（未在爬取时返回空字典）"""
+        return self.pipeline.queue_depths() if self.pipeline else {}
+    
+    def _maybe_checkpoint(self, run_state: CrawlRunState):
+        """按完成数量或时间间隔保存进度，而不是每批保存"""
+        now = time.monotonic()
+        if (run_state.since_checkpoint >= self.config.checkpoint_every
+                or now - run_state.last_checkpoint >= self.config.checkpoint_interval):
+            self.progress.checkpoint()
+            if self.http_cache:
+                self.http_cache.checkpoint()
+            run_state.since_checkpoint = 0
+            run_state.last_checkpoint = now
+            logger.info(f"进度已保存，队列深度: {self.pipeline_queue_depths()}")
+    
     async def crawl_all(self) -> Dict[str, Any]:
         """爬取所有文章"""
         start_time = time.time()
         logger.info("开始爬取所有文章...")
         
-        # 获取所有文章元数据
-        articles_metadata = await self.get_all_articles_metadata()
-        
-        if not articles_metadata:
-            logger.error("没有获取到任何文章")
-            return {}
-        
-        # 保存原始元数据
-        metadata_file = self.data_dir / "articles_metadata.json"
-        async with aiofiles.open(metadata_file, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(articles_metadata, ensure_ascii=False, indent=2))
-        
-        # 过滤已处理的文章
-        if self.config.enable_resume:
-            articles_to_process = [
-                article for article in articles_metadata 
-                if article['id'] not in self.progress.processed_articles
-            ]
-            logger.info(f"需要处理 {len(articles_to_process)} 篇新文章")
-        else:
-            articles_to_process = articles_metadata
+        if not self.page_pool:
+            raise RuntimeError("No browser pages available. Ensure Playwright is installed and initialized.")
         
-        # 分批处理文章
-        processed_articles = []
-        recommendation_data = []
-        rate_limit_count = 0  # 限流计数器
+        # 列表抓取 → 渲染 → 解析 → 图片 → 写盘，各阶段由有界队列衔接：首页返回即开始处理，
+        # 页面在拿到正文 HTML 后立即归还，解析/图片/写盘不再占用浏览器页面
+        run_state = CrawlRunState()
+        self._open_outputs(run_state)
+        self.pipeline = self._build_pipeline(run_state)
+        articles_metadata: List[Dict[str, Any]] = []
+        producer = asyncio.ensure_future(self._produce_articles(self.pipeline, articles_metadata))
         
-        for i in range(0, len(articles_to_process), self.config.batch_size):
-            batch = articles_to_process[i:i + self.config.batch_size]
-            logger.info(f"处理批次 {i//self.config.batch_size + 1}/{(len(articles_to_process) + self.config.batch_size - 1)//self.config.batch_size}")
-            
-            batch_results = await self.process_article_batch(batch)
-            
-            # 检查批次结果并处理限流
-            has_rate_limit = False
-            for result in batch_results:
-                if result:
-                    article_data = result['article_data']
-                    # 检查是否有限流错误
-                    if article_data.get('content_markdown') and 'Too Many Requests' in article_data['content_markdown']:
-                        has_rate_limit = True
-                        rate_limit_count += 1
-                        logger.warning(f"文章 {article_data.get('id')} 遇到限流")
-                    
-                    processed_articles.append(article_data)
-                    recommendation_data.append(result['recommendation_data'])
+        try:
+            try:
+                await self.pipeline.run()
+            finally:
+                if not producer.done():
+                    producer.cancel()
             
-            # 定期保存进度
-            if self.config.enable_resume:
-                self.progress.save(self.progress_file)
+            self.progress.checkpoint()
             
-            # 动态调整延迟
-            if has_rate_limit:
-                # 限流时增加延迟
-                delay = min(30, self.config.article_delay * (2 ** rate_limit_count))
-                logger.warning(f"检测到限流，等待 {delay} 秒...")
-                await asyncio.sleep(delay)
-            else:
-                # 正常延迟
-                rate_limit_count = 0  # 重置限流计数
-                await asyncio.sleep(self.config.article_delay)
+            # 列表抓取异常在此抛出
+            await producer
+        finally:
+            # 处理后的数据与推荐算法数据已逐篇写入 JSONL，这里只需收尾并生成 JSON 数组
+            outputs = await asyncio.get_running_loop().run_in_executor(None, self._finalize_outputs, run_state)
         
-        # 保存处理后的数据
-        processed_file = self.data_dir / "processed_articles.json"
-        async with aiofiles.open(processed_file, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(processed_articles, ensure_ascii=False, indent=2))
-        
-        # 保存推荐算法数据
-        recommendation_file = self.data_dir / "recommendation_data.json"
-        async with aiofiles.open(recommendation_file, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(recommendation_data, ensure_ascii=False, indent=2))
+        if not articles_metadata:
+            logger.error("没有获取到任何文章")
+            return {}
         
         # 生成统计信息
         elapsed_time = time.time() - start_time
         stats = {
             'total_articles': len(articles_metadata),
-            'processed_articles': len(processed_articles),
+            'processed_articles': run_state.processed_count,
             'failed_articles': len(self.progress.failed_articles),
-            'total_images': sum(len(article.get('local_images', [])) for article in processed_articles),
+            'total_images': run_state.total_images,
             'downloaded_images': len(self.progress.downloaded_images),
             'crawl_date': datetime.now().isoformat(),
             'elapsed_time': f"{elapsed_time:.2f}秒",
-            'output_directory': str(self.output_dir)
+            'output_directory': str(self.output_dir),
+            'pipeline': self.pipeline.stats(),
+            'fetch_paths': self.fetch_stats,
+            'progress_journal': self.progress.journal.stats() if self.progress.journal else None,
+            'outputs': outputs,
+            'manifest': self.manifest.stats() if self.manifest is not None else None,
+            'revalidation': {**self.revalidation.stats(),
+                             'page_cache': self.http_cache.stats() if self.http_cache else None}
+                            if self.config.conditional_requests else None,
+            'images': {**self.image_stats, 'store': self.image_store.stats() if self.image_store else None},
+            'request_blocking': self._blocking_summary(),
+            'page_pool': self.page_pool.stats(),
+            'concurrency': self.concurrency.stats(),
+            'rate_limits': {**self.rate_limiter.stats(), 'archive_api': self.api_rate_limiter.stats()},
+            'retries': self.retry_policy.stats(),
+            'transform': {**self.transform_stats, 'busy_time': round(self.transform_stats['busy_time'], 3)},
+            'browser_shards': {
+                'count': len(self.browsers),
+                'startup_seconds': self.shard_startup_seconds,
+            },
+            'selector_hits': self.selector_stats
         }
         
         stats_file = self.data_dir / "crawl_stats.json"
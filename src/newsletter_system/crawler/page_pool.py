@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+浏览器页面池（独占借还）。
+
+职责概览：
+- `acquire()` / `release()`（或 `checkout()` 上下文）保证同一时刻一个页面只被一个任务使用，
+  取代按下标取模或随机挑选页面的做法。
+- 页面在累计导航 N 次或 JS 堆超过阈值后回收重建，抑制长时间爬取中 Chromium 的内存增长。
+- 已关闭/崩溃的页面在借出前或归还时被识别并透明替换，调用方无感知。
+- 池大小在 [min_size, max_size] 之间伸缩：全部页面忙时按需扩容，空闲超时的多余页面被关闭。
+- 页面的创建与关闭由外部提供的 factory / closer 完成，
+  因此既可以是 `browser.new_page()`，也可以是“每页一个独立 context”的反检测配置。
+- `ShardedPagePool` 把多个页面池（每个对应一个独立浏览器进程）合成一个池，
+  借出时选择当前负载最低的分片，接口与 `PagePool` 相同。
+
+使用示例：
+    pool = PagePool(factory=new_page, closer=close_page, min_size=1, max_size=5)
+    await pool.start()
+    async with pool.checkout() as page:
+        await page.goto(url)
+    await pool.close()
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Chromium 提供 performance.memory；其他内核返回 0 表示未知
+_JS_HEAP_SCRIPT = "() => (performance.memory && performance.memory.usedJSHeapSize) || 0"
+
+
+@dataclass
+class PooledPage:
+    """池中页面及其使用记录"""
+    page: Any
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    navigations: int = 0
+    crashed: bool = False
+    heap_bytes: int = 0
+
+
+class PagePool:
+    """带健康检查与回收的独占页面池"""
+
+    def __init__(self,
+                 factory: Callable[[], Awaitable[Any]],
+                 closer: Callable[[Any], Awaitable[None]],
+                 min_size: int = 1,
+                 max_size: int = 5,
+                 max_navigations: int = 50,
+                 max_heap_mb: Optional[float] = None,
+                 idle_timeout: float = 120.0):
+        self.factory = factory
+        self.closer = closer
+        self.max_size = max(1, max_size)
+        self.min_size = max(0, min(min_size, self.max_size))
+        self.max_navigations = max_navigations
+        self.max_heap_mb = max_heap_mb
+        self.idle_timeout = idle_timeout
+
+        self._entries: Dict[Any, PooledPage] = {}
+        self._idle: Deque[PooledPage] = deque()
+        self._creating = 0
+        self._waiters = 0
+        self._closed = False
+        self._cond = asyncio.Condition()
+        self.counters = {
+            'created': 0,
+            'closed': 0,
+            'recycled_navigations': 0,
+            'recycled_heap': 0,
+            'replaced_crashed': 0,
+            'shrunk': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'peak_size': 0,
+            'peak_heap_mb': 0.0,
+        }
+
+    @property
+    def size(self) -> int:
+        """当前池中页面数（含借出的页面）"""
+        return len(self._entries)
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    @property
+    def pages(self):
+        """当前池中所有页面（仅供观察，借用请走 acquire/checkout）"""
+        return [entry.page for entry in self._entries.values()]
+
+    async def start(self):
+        """预热到 min_size 个页面"""
+        for _ in range(self.min_size):
+            entry = await self._create()
+            self._idle.append(entry)
+        logger.info(f"页面池就绪：{self.size} 个页面（上限 {self.max_size}）")
+
+    async def acquire(self):
+        """借出一个页面（独占）；无空闲页面且已达上限时等待归还"""
+        while True:
+            entry = None
+            async with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("PagePool is closed")
+                    if self._idle:
+                        entry = self._idle.popleft()
+                        break
+                    if self.size + self._creating < self.max_size:
+                        self._creating += 1
+                        break
+                    self._waiters += 1
+                    self.counters['waits'] += 1
+                    try:
+                        await self._cond.wait()
+                    finally:
+                        self._waiters -= 1
+
+            if entry is None:
+                try:
+                    entry = await self._create()
+                finally:
+                    async with self._cond:
+                        self._creating -= 1
+                        self._cond.notify()
+
+            if self._is_broken(entry):
+                logger.warning("页面已关闭或崩溃，替换为新页面")
+                self.counters['replaced_crashed'] += 1
+                await self._discard(entry)
+                continue
+
+            self.counters['checkouts'] += 1
+            return entry.page
+
+    async def release(self, page, navigated: bool = True):
+        """归还页面；按健康状况、导航次数与 JS 堆大小决定复用还是回收"""
+        entry = self._entries.get(page)
+        if entry is None:
+            return
+        entry.last_used = time.monotonic()
+        if navigated:
+            entry.navigations += 1
+
+        reason = await self._recycle_reason(entry)
+        if reason:
+            await self._discard(entry)
+            if reason == 'crashed':
+                self.counters['replaced_crashed'] += 1
+            else:
+                self.counters[f'recycled_{reason}'] += 1
+                logger.info(f"回收页面（{reason}）：导航 {entry.navigations} 次，"
+                            f"JS 堆 {entry.heap_bytes / 1024 / 1024:.1f}MB")
+            await self._replenish()
+            return
+
+        async with self._cond:
+            if self._closed:
+                closing = True
+            else:
+                closing = False
+                self._idle.append(entry)
+                self._cond.notify()
+        if closing:
+            await self._discard(entry)
+            return
+        await self._shrink_idle()
+
+    @asynccontextmanager
+    async def checkout(self):
+        """`async with pool.checkout() as page:` 形式的借还"""
+        page = await self.acquire()
+        try:
+            yield page
+        finally:
+            await self.release(page)
+
+    async def close(self):
+        """关闭池中所有页面；之后的 acquire 会抛出 RuntimeError"""
+        async with self._cond:
+            self._closed = True
+            self._idle.clear()
+            self._cond.notify_all()
+        for entry in list(self._entries.values()):
+            await self._discard(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """池大小、借还次数与回收/替换计数"""
+        return {
+            'size': self.size,
+            'idle': self.idle_count,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'js_heap_mb': round(sum(entry.heap_bytes for entry in self._entries.values()) / 1024 / 1024, 1),
+            **self.counters,
+        }
+
+    async def _create(self) -> PooledPage:
+        page = await self.factory()
+        entry = PooledPage(page=page)
+        self._entries[page] = entry
+        # 渲染进程崩溃时标记，下次借出/归还时替换
+        if hasattr(page, 'on'):
+            try:
+                page.on('crash', lambda *_: setattr(entry, 'crashed', True))
+            except Exception as e:
+                logger.debug(f"注册崩溃回调失败（可忽略）: {e}")
+        self.counters['created'] += 1
+        self.counters['peak_size'] = max(self.counters['peak_size'], self.size)
+        return entry
+
+    async def _discard(self, entry: PooledPage):
+        if self._entries.pop(entry.page, None) is None:
+            return
+        try:
+            await self.closer(entry.page)
+        except Exception as e:
+            logger.debug(f"关闭页面失败（可忽略）: {e}")
+        self.counters['closed'] += 1
+        async with self._cond:
+            # 腾出了名额，唤醒等待扩容的借用方
+            self._cond.notify()
+
+    async def _replenish(self):
+        """回收后补足到 min_size（有人排队时也补一个，避免其等待下一次归还）"""
+        if self._closed:
+            return
+        async with self._cond:
+            needed = self.size + self._creating < self.min_size or (
+                self._waiters > 0 and self.size + self._creating < self.max_size)
+            if not needed:
+                return
+            self._creating += 1
+        try:
+            entry = await self._create()
+        except Exception as e:
+            logger.error(f"补充页面失败: {e}")
+            async with self._cond:
+                self._creating -= 1
+                self._cond.notify()
+            return
+        async with self._cond:
+            self._creating -= 1
+            self._idle.append(entry)
+            self._cond.notify()
+
+    async def _shrink_idle(self):
+        """关闭空闲超时的多余页面，直到 min_size"""
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        expired = []
+        async with self._cond:
+            for entry in list(self._idle):
+                if self.size - len(expired) <= self.min_size:
+                    break
+                if now - entry.last_used > self.idle_timeout:
+                    self._idle.remove(entry)
+                    expired.append(entry)
+        for entry in expired:
+            await self._discard(entry)
+            self.counters['shrunk'] += 1
+
+    @staticmethod
+    def _is_broken(entry: PooledPage) -> bool:
+        if entry.crashed:
+            return True
+        is_closed = getattr(entry.page, 'is_closed', None)
+        try:
+            return bool(is_closed()) if callable(is_closed) else False
+        except Exception:
+            return True
+
+    async def _recycle_reason(self, entry: PooledPage) -> Optional[str]:
+        if self._is_broken(entry):
+            return 'crashed'
+        if self.max_navigations and entry.navigations >= self.max_navigations:
+            return 'navigations'
+        if self.max_heap_mb:
+            try:
+                entry.heap_bytes = int(await entry.page.evaluate(_JS_HEAP_SCRIPT) or 0)
+            except Exception as e:
+                logger.debug(f"读取 JS 堆大小失败，按崩溃处理: {e}")
+                return 'crashed'
+            heap_mb = entry.heap_bytes / 1024 / 1024
+            self.counters['peak_heap_mb'] = round(max(self.counters['peak_heap_mb'], heap_mb), 1)
+            if heap_mb >= self.max_heap_mb:
+                return 'heap'
+        return None
+
+
+class ShardedPagePool:
+    """多个页面池（各自对应独立浏览器）的组合，按最低负载借出"""
+
+    def __init__(self, shards: List[PagePool]):
+        if not shards:
+            raise ValueError("ShardedPagePool requires at least one shard")
+        self.shards = shards
+        self._load = [0] * len(shards)
+        self._owner: Dict[Any, int] = {}
+
+    @property
+    def max_size(self) -> int:
+        return sum(shard.max_size for shard in self.shards)
+
+    @property
+    def size(self) -> int:
+        return sum(shard.size for shard in self.shards)
+
+    @property
+    def idle_count(self) -> int:
+        return sum(shard.idle_count for shard in self.shards)
+
+    @property
+    def pages(self):
+        return [page for shard in self.shards for page in shard.pages]
+
+    async def start(self):
+        await asyncio.gather(*(shard.start() for shard in self.shards))
+
+    async def acquire(self):
+        """从借出（含排队中）比例最低的分片借出页面"""
+        index = min(range(len(self.shards)),
+                    key=lambda i: (self._load[i] / self.shards[i].max_size, -self.shards[i].idle_count))
+        self._load[index] += 1
+        try:
+            page = await self.shards[index].acquire()
+        except BaseException:
+            self._load[index] -= 1
+            raise
+        self._owner[page] = index
+        return page
+
+    async def release(self, page, navigated: bool = True):
+        index = self._owner.pop(page, None)
+        if index is None:
+            return
+        self._load[index] -= 1
+        await self.shards[index].release(page, navigated)
+
+    @asynccontextmanager
+    async def checkout(self):
+        page = await self.acquire()
+        try:
+            yield page
+        finally:
+            await self.release(page)
+
+    async def close(self):
+        await asyncio.gather(*(shard.close() for shard in self.shards), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """汇总计数，并附各分片明细"""
+        shard_stats = [shard.stats() for shard in self.shards]
+        summary: Dict[str, Any] = {}
+        for stats in shard_stats:
+            for key, value in stats.items():
+                if key in ('peak_heap_mb',):
+                    summary[key] = max(summary.get(key, 0), value)
+                elif isinstance(value, (int, float)):
+                    summary[key] = summary.get(key, 0) + value
+        summary['js_heap_mb'] = round(summary.get('js_heap_mb', 0), 1)
+        summary['shards'] = shard_stats
+        return summary
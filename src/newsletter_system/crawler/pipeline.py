@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+分阶段处理流水线。
+
+职责概览：
+- 把一条处理链拆成若干阶段（如 渲染 → 解析 → 图片 → 写盘），阶段之间用有界队列衔接。
+- 每个阶段拥有独立的并发上限（worker 数），稀缺资源（浏览器页面）只被需要它的阶段占用。
+- 队列有界即天然背压：下游变慢时上游 `put` 会等待，内存中的在途条目数有上限。
+- 暴露每个阶段的当前/峰值队列深度与处理计数，便于观察瓶颈。
+
+使用示例：
+    pipeline = StagedPipeline([
+        PipelineStage('render', render, concurrency=3, queue_size=24),
+        PipelineStage('write', write, concurrency=2, queue_size=8),
+    ])
+    runner = asyncio.ensure_future(pipeline.run())
+    await pipeline.put(item)
+    await pipeline.close()
+    await runner
+
+约定：
+- handler 返回 None 表示该条目到此结束（例如已跳过），不再传给下一阶段；
+- handler 抛出的异常交给 `on_error` 处理，条目被丢弃，不影响其他条目。
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_STOP = object()
+
+
+@dataclass
+class PipelineStage:
+    """流水线阶段定义"""
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    concurrency: int = 1              # 该阶段的 worker 数
+    queue_size: int = 8               # 该阶段输入队列上限（背压）
+    processed: int = 0
+    failed: int = 0
+    busy_time: float = 0.0            # 所有 worker 在 handler 中的累计耗时（秒）
+    max_depth: int = 0
+    queue: Optional[asyncio.Queue] = field(default=None, repr=False)
+
+
+class StagedPipeline:
+    """由有界队列串联的多阶段异步流水线"""
+
+    def __init__(self, stages: List[PipelineStage],
+                 on_error: Optional[Callable[[str, Any, Exception], None]] = None):
+        if not stages:
+            raise ValueError("StagedPipeline requires at least one stage")
+        self.stages = stages
+        self.on_error = on_error
+        for stage in self.stages:
+            stage.concurrency = max(1, stage.concurrency)
+            stage.queue = asyncio.Queue(maxsize=max(1, stage.queue_size))
+
+    async def put(self, item: Any):
+        """向第一阶段投递条目（队列满时等待）"""
+        await self._enqueue(self.stages[0], item)
+
+    async def close(self):
+        """声明输入结束；各阶段处理完存量后依次退出"""
+        first = self.stages[0]
+        for _ in range(first.concurrency):
+            await first.queue.put(_STOP)
+
+    async def run(self):
+        """启动所有阶段的 worker，直到输入结束且全部条目流出"""
+        stage_tasks = []
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            workers = [
+                asyncio.ensure_future(self._worker(stage, next_stage))
+                for _ in range(stage.concurrency)
+            ]
+            stage_tasks.append(workers)
+
+        try:
+            for index, workers in enumerate(stage_tasks):
+                await asyncio.gather(*workers)
+                # 本阶段全部 worker 退出后，通知下一阶段结束
+                if index + 1 < len(self.stages):
+                    next_stage = self.stages[index + 1]
+                    for _ in range(next_stage.concurrency):
+                        await next_stage.queue.put(_STOP)
+        finally:
+            for workers in stage_tasks:
+                for worker in workers:
+                    worker.cancel()
+
+    def queue_depths(self) -> Dict[str, int]:
+        """各阶段输入队列的当前深度"""
+        return {stage.name: stage.queue.qsize() for stage in self.stages}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各阶段的处理计数、累计耗时与峰值队列深度"""
+        return {
+            stage.name: {
+                'concurrency': stage.concurrency,
+                'processed': stage.processed,
+                'failed': stage.failed,
+                'busy_time': round(stage.busy_time, 3),
+                'max_queue_depth': stage.max_depth,
+                'queue_size': stage.queue.maxsize,
+            }
+            for stage in self.stages
+        }
+
+    async def _enqueue(self, stage: PipelineStage, item: Any):
+        await stage.queue.put(item)
+        stage.max_depth = max(stage.max_depth, stage.queue.qsize())
+
+    async def _worker(self, stage: PipelineStage, next_stage: Optional[PipelineStage]):
+        while True:
+            item = await stage.queue.get()
+            if item is _STOP:
+                return
+
+            started = time.monotonic()
+            try:
+                result = await stage.handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.failed += 1
+                if self.on_error:
+                    self.on_error(stage.name, item, e)
+                else:
+                    logger.error(f"流水线阶段 {stage.name} 处理失败: {e}")
+                continue
+            finally:
+                stage.busy_time += time.monotonic() - started
+
+            stage.processed += 1
+            if result is not None and next_stage is not None:
+                await self._enqueue(next_stage, result)
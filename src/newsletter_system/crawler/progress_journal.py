@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+断点续传进度的追加式日志。
+
+职责概览：
+- 每次进度变化（文章处理完成/失败、图片记录/移除）追加一行 JSON 事件，写入代价与已有进度规模无关；
+  事件先进入内存缓冲，每累计 `fsync_every` 条或显式 `flush()` 时一次写入并 fsync。
+- 加载时先读快照（`crawler_progress.json`，即原先整文件保存的格式），再按顺序重放日志；
+  事件均为幂等操作，快照替换后、日志截断前崩溃也不会重复计数。
+- 末尾被截断的半行（写入途中崩溃）在重放时忽略。
+- 压缩：由 `ProgressTracker` 在日志事件数超过快照规模时把当前状态写成新快照（临时文件 + fsync +
+  原子替换）并清空日志，摊还到每个事件仍是 O(1)。
+
+使用示例：
+    journal = ProgressJournal(data_dir / "crawler_progress.journal")
+    for event in journal.replay():
+        ...
+    journal.append({'op': 'processed', 'id': 123})
+    journal.flush()
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressJournal:
+    """JSON Lines 格式的进度事件日志"""
+
+    def __init__(self, path: Path, fsync_every: int = 64):
+        self.path = Path(path)
+        self.fsync_every = max(1, fsync_every)
+        self.events = 0                  # 日志文件中（含未落盘缓冲）的事件数
+        self.bytes = 0
+        self.flushes = 0
+        self._buffer: List[str] = []
+        self._file = None
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """按写入顺序返回日志中的事件，并据此设置事件计数"""
+        self.events = 0
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # 通常是写入途中崩溃留下的半行
+                    logger.warning(f"进度日志第 {line_number} 行不完整，已忽略: {self.path}")
+                    continue
+                self.events += 1
+                yield event
+        self.bytes = self.path.stat().st_size
+
+    def append(self, event: Dict[str, Any]):
+        """追加一个事件；缓冲满 fsync_every 条时落盘"""
+        self._buffer.append(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.events += 1
+        if len(self._buffer) >= self.fsync_every:
+            self.flush()
+
+    def flush(self):
+        """把缓冲的事件一次写入并 fsync"""
+        if not self._buffer:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            # 上次写入途中崩溃留下的半行单独成行，重放时作为损坏行跳过
+            if self._file.tell() > 0 and not self._ends_with_newline():
+                self._file.write('\n')
+        data = ''.join(self._buffer)
+        self._buffer.clear()
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.bytes += len(data.encode('utf-8'))
+        self.flushes += 1
+
+    def reset(self):
+        """快照已包含全部事件后清空日志（未落盘的缓冲一并丢弃）"""
+        self._buffer.clear()
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
+        self.events = 0
+        self.bytes = 0
+
+    def close(self):
+        """落盘并关闭文件"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def stats(self) -> Dict[str, Any]:
+        return {'events': self.events, 'bytes': self.bytes, 'flushes': self.flushes}
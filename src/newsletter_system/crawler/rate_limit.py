@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+按主机的令牌桶限速。
+
+职责概览：
+- 每个主机一个令牌桶（速率 rate 个/秒，容量 burst），所有出站请求（列表 API、页面导航、
+  正文 HTTP 直取、图片下载）发起前都从对应主机的桶里取令牌，彼此共享同一主机的预算。
+- 主机规则按“完全相等或子域名”匹配（如 `substackcdn.com` 同时覆盖 `www.substackcdn.com`），
+  未配置的主机使用默认速率；速率为 None/0 表示不限速。
+- 令牌不足时先预约再在锁外等待，多个等待者按到达顺序依次获得时间片，不会互相饿死。
+- 按主机统计请求数与累计等待时间。
+- 不按主机区分的预算（如列表 API 的固定间隔）可直接使用单个 `TokenBucket`。
+
+使用示例：
+    limiter = HostRateLimiter(default_rate=10, default_burst=10,
+                              host_limits={'nlp.elvissaravia.com': {'rate': 1.0, 'burst': 1}})
+    await limiter.acquire('https://nlp.elvissaravia.com/api/v1/archive')
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """单个主机的令牌桶"""
+
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        self.rate = rate if rate and rate > 0 else None
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.requests = 0
+        self.waited = 0.0
+
+    async def acquire(self) -> float:
+        """取一个令牌，返回本次等待的秒数"""
+        self.requests += 1
+        if self.rate is None:
+            return 0.0
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 先扣减（可为负数，即预约未来的令牌），再在锁外等待
+            self._tokens -= 1.0
+            wait_time = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait_time > 0:
+            self.waited += wait_time
+            await asyncio.sleep(wait_time)
+        return wait_time
+
+    def stats(self) -> Dict[str, Any]:
+        """速率配置、请求数与累计等待时间"""
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'requests': self.requests,
+            'waited_seconds': round(self.waited, 3),
+        }
+
+
+class HostRateLimiter:
+    """按主机分发的令牌桶注册表"""
+
+    def __init__(self, default_rate: Optional[float] = None, default_burst: int = 1,
+                 host_limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.host_limits = {host.lower(): limit for host, limit in (host_limits or {}).items()}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def set_host_limit(self, host: str, rate: Optional[float], burst: int = 1):
+        """设置（或覆盖）某主机的速率；已创建的桶一并替换"""
+        host = host.lower()
+        self.host_limits[host] = {'rate': rate, 'burst': burst}
+        for key in [key for key in self._buckets if self._match(key) == host]:
+            del self._buckets[key]
+
+    async def acquire(self, url: str) -> float:
+        """为指向 url 的请求取令牌"""
+        return await self.bucket_for(url).acquire()
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = (urlparse(url).hostname or '').lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rule = self._match(host)
+            limit = self.host_limits.get(rule) if rule else None
+            if limit is not None:
+                bucket = TokenBucket(limit.get('rate'), int(limit.get('burst', 1)))
+            else:
+                bucket = TokenBucket(self.default_rate, self.default_burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各主机的速率配置、请求数与累计等待时间"""
+        return {host: bucket.stats() for host, bucket in self._buckets.items()}
+
+    def _match(self, host: str) -> Optional[str]:
+        """返回匹配该主机的最具体规则（完全相等或子域名）"""
+        best = None
+        for rule in self.host_limits:
+            if host == rule or host.endswith('.' + rule):
+                if best is None or len(rule) > len(best):
+                    best = rule
+        return best
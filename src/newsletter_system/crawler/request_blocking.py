@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+页面池请求拦截。
+
+职责概览：
+- 在池化页面上注册 Playwright 路由，按资源类型或 URL 模式中止不需要的请求
+  （图片、字体、媒体、第三方统计脚本等），白名单优先放行。
+- 正文图片由 `download_image` 单独下载，页面内加载图片只会浪费带宽与渲染时间。
+- 按页面累计被拦截的请求数（按类型分组）及被拦截的图片 URL，供爬虫按文章归集统计。
+
+使用示例：
+    blocker = RequestBlocker(RequestBlockingPolicy())
+    await blocker.attach(page)
+    blocker.reset(page)
+    await page.goto(url)
+    summary = blocker.collect(page)   # {'blocked': 12, 'by_type': {...}, 'image_urls': [...]}
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 常见第三方统计/广告/埋点脚本
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    r'google-analytics\.com',
+    r'googletagmanager\.com',
+    r'doubleclick\.net',
+    r'connect\.facebook\.net',
+    r'static\.ads-twitter\.com',
+    r'cdn\.segment\.com',
+    r'api\.segment\.io',
+    r'js\.sentry-cdn\.com',
+    r'browser\.sentry-cdn\.com',
+    r'static\.hotjar\.com',
+    r'widget\.intercom\.io',
+    r'/api/v1/firehose',
+]
+
+
+@dataclass
+class RequestBlockingPolicy:
+    """请求拦截策略：资源类型 + URL 模式，白名单优先"""
+    blocked_resource_types: List[str] = field(default_factory=lambda: ['image', 'media', 'font'])
+    blocked_url_patterns: List[str] = field(default_factory=lambda: list(DEFAULT_BLOCKED_URL_PATTERNS))
+    allowed_url_patterns: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._blocked_types = frozenset(self.blocked_resource_types)
+        self._blocked_re = self._compile(self.blocked_url_patterns)
+        self._allowed_re = self._compile(self.allowed_url_patterns)
+
+    @staticmethod
+    def _compile(patterns: List[str]):
+        if not patterns:
+            return None
+        return re.compile('|'.join(f'(?:{p})' for p in patterns))
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        """判断请求是否应被中止（文档请求始终放行）"""
+        if resource_type == 'document':
+            return False
+        if self._allowed_re is not None and self._allowed_re.search(url):
+            return False
+        if resource_type in self._blocked_types:
+            return True
+        return self._blocked_re is not None and self._blocked_re.search(url) is not None
+
+
+class RequestBlocker:
+    """把拦截策略挂到页面上，并按页面累计拦截统计"""
+
+    def __init__(self, policy: RequestBlockingPolicy):
+        self.policy = policy
+        self._page_stats: Dict[Any, Dict[str, Any]] = {}
+
+    async def attach(self, page):
+        """在页面上注册路由拦截"""
+        self._page_stats[page] = self._empty_stats()
+
+        async def handle_route(route):
+            request = route.request
+            resource_type = request.resource_type
+            if self.policy.should_block(request.url, resource_type):
+                stats = self._page_stats.setdefault(page, self._empty_stats())
+                stats['blocked'] += 1
+                stats['by_type'][resource_type] = stats['by_type'].get(resource_type, 0) + 1
+                if resource_type == 'image':
+                    stats['image_urls'].append(request.url)
+                try:
+                    await route.abort()
+                except Exception as e:
+                    logger.debug(f"中止请求失败（可忽略）: {e}")
+            else:
+                try:
+                    await route.continue_()
+                except Exception as e:
+                    logger.debug(f"放行请求失败（可忽略）: {e}")
+
+        await page.route('**/*', handle_route)
+
+    def reset(self, page):
+        """开始一次新的导航前清零该页面的统计"""
+        self._page_stats[page] = self._empty_stats()
+
+    def collect(self, page) -> Dict[str, Any]:
+        """取出并清零该页面自上次 reset 以来的拦截统计"""
+        stats = self._page_stats.get(page) or self._empty_stats()
+        self._page_stats[page] = self._empty_stats()
+        return stats
+
+    def detach(self, page):
+        """页面关闭后丢弃其统计"""
+        self._page_stats.pop(page, None)
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {'blocked': 0, 'by_type': {}, 'image_urls': []}
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+统一重试策略。
+
+职责概览：
+- `RetryPolicy.run()` 以循环（而非递归）执行一次尝试函数，失败时按错误类别查规则决定是否重试、
+  最多尝试几次以及等待多久。
+- 等待时间使用去相关抖动（decorrelated jitter）：sleep = min(max_delay, uniform(base, 上次 sleep * 3))，
+  避免大量任务在同一时刻集中重试。
+- 异常携带 Retry-After（秒数或 HTTP 日期）时，等待不短于服务端要求（封顶 max_retry_after）。
+- 全局重试预算：每次首次尝试按比例存入令牌，每次重试消耗一个；预算耗尽时不再重试，
+  防止限流期间各层重试叠加成重试风暴。
+- 按阶段（stage）统计调用数、重试次数、重试等待耗时、放弃次数与各错误类别计数。
+
+使用示例：
+    policy = RetryPolicy()
+    html = await policy.run(fetch_once, url, page, stage='render',
+                            rules={'no_content': RetryRule(max_attempts=4, base_delay=2.0)})
+
+    @retry_async(max_retries=3, delay=1.0)     # 兼容旧接口，默认可重试的错误类别都按同一规则重试
+    async def fetch_page(self, offset): ...
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - aiohttp 是爬虫的必需依赖
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+
+class RetryableError(Exception):
+    """结果层面的可重试失败（限流页、人机校验、内容过少等），带错误类别与可选 Retry-After"""
+
+    def __init__(self, message: str, error_class: str = 'transient', retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.error_class = error_class
+        self.retry_after = retry_after
+
+
+@dataclass
+class RetryRule:
+    """某一错误类别的重试规则"""
+    max_attempts: int = 3      # 总尝试次数（含首次）
+    base_delay: float = 1.0    # 去相关抖动的下限
+    max_delay: float = 30.0    # 单次等待上限
+    retry: bool = True         # False 表示该类错误直接放弃
+
+
+# 默认规则：限流/校验等得久一些，客户端错误与未知异常不重试
+DEFAULT_RULES: Dict[str, RetryRule] = {
+    'throttled': RetryRule(max_attempts=4, base_delay=10.0, max_delay=60.0),
+    'challenge': RetryRule(max_attempts=4, base_delay=10.0, max_delay=60.0),
+    'timeout': RetryRule(max_attempts=4, base_delay=2.0, max_delay=30.0),
+    'connection': RetryRule(max_attempts=4, base_delay=1.0, max_delay=30.0),
+    'server_error': RetryRule(max_attempts=3, base_delay=1.0, max_delay=30.0),
+    'transient': RetryRule(max_attempts=3, base_delay=1.0, max_delay=30.0),
+    'client_error': RetryRule(retry=False),
+    'other': RetryRule(retry=False),
+}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def classify_error(error: BaseException) -> str:
+    """把异常归入错误类别"""
+    if isinstance(error, RetryableError):
+        return error.error_class
+    if aiohttp is not None and isinstance(error, aiohttp.ClientResponseError):
+        if error.status == 429:
+            return 'throttled'
+        if error.status >= 500:
+            return 'server_error'
+        return 'client_error'
+    if isinstance(error, asyncio.TimeoutError) or 'Timeout' in type(error).__name__:
+        return 'timeout'
+    if aiohttp is not None and isinstance(error, aiohttp.ClientConnectionError):
+        return 'connection'
+    if isinstance(error, (ConnectionError, OSError)):
+        return 'connection'
+    message = str(error)
+    if 'Connection' in message or 'net::ERR_' in message:
+        return 'connection'
+    return 'other'
+
+
+def _retry_after_of(error: BaseException) -> Optional[float]:
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is not None:
+        return retry_after
+    headers = getattr(error, 'headers', None)
+    if headers:
+        try:
+            return parse_retry_after(headers.get('Retry-After') or headers.get('retry-after'))
+        except AttributeError:
+            return None
+    return None
+
+
+class RetryBudget:
+    """全局重试预算：首次尝试按 ratio 存入令牌，重试消耗 1 个令牌"""
+
+    def __init__(self, ratio: float = 0.2, reserve: int = 20, max_tokens: Optional[float] = None):
+        self.ratio = ratio
+        self.max_tokens = max_tokens if max_tokens is not None else max(float(reserve), reserve * 5.0)
+        self.tokens = float(reserve)
+        self.denied = 0
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        self.denied += 1
+        return False
+
+
+class RetryPolicy:
+    """按错误类别决定重试、共享全局预算并按阶段统计的重试执行器"""
+
+    def __init__(self, rules: Optional[Dict[str, RetryRule]] = None,
+                 budget: Optional[RetryBudget] = None,
+                 classify: Callable[[BaseException], str] = classify_error,
+                 max_retry_after: float = 120.0):
+        self.rules = dict(DEFAULT_RULES)
+        if rules:
+            self.rules.update(rules)
+        self.budget = budget
+        self.classify = classify
+        self.max_retry_after = max_retry_after
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    async def run(self, func: Callable[..., Awaitable[Any]], *args,
+                  stage: str = 'default',
+                  rules: Optional[Dict[str, RetryRule]] = None,
+                  **kwargs) -> Any:
+        """执行 func，按规则重试；最终失败时抛出最后一次的异常"""
+        stats = self._stage_stats(stage)
+        stats['calls'] += 1
+        if self.budget is not None:
+            self.budget.deposit()
+
+        attempt = 0
+        previous_sleep = 0.0
+        first_failure: Optional[float] = None
+        try:
+            while True:
+                attempt += 1
+                try:
+                    return await func(*args, **kwargs)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if first_failure is None:
+                        first_failure = time.monotonic()
+                    error_class = self.classify(e)
+                    stats['errors'][error_class] = stats['errors'].get(error_class, 0) + 1
+                    rule = self._rule_for(error_class, rules)
+
+                    if not rule.retry or attempt >= rule.max_attempts:
+                        stats['gave_up'] += 1
+                        raise
+                    if self.budget is not None and not self.budget.withdraw():
+                        stats['budget_denied'] += 1
+                        logger.warning(f"重试预算已耗尽，放弃重试（{stage}/{error_class}）: {e}")
+                        raise
+
+                    base = rule.base_delay
+                    sleep = min(rule.max_delay, random.uniform(base, max(base, previous_sleep * 3)))
+                    retry_after = _retry_after_of(e)
+                    if retry_after is not None:
+                        sleep = max(sleep, min(retry_after, self.max_retry_after))
+                    previous_sleep = sleep
+
+                    stats['retries'] += 1
+                    logger.warning(f"{stage} 失败（{error_class}，尝试 {attempt}/{rule.max_attempts}），"
+                                   f"{sleep:.1f} 秒后重试: {e}")
+                    await asyncio.sleep(sleep)
+        finally:
+            # 重试耗时：从首次失败到最终成功/放弃（含退避等待与后续尝试）
+            if first_failure is not None:
+                stats['retry_time'] += time.monotonic() - first_failure
+
+    def _rule_for(self, error_class: str, overrides: Optional[Dict[str, RetryRule]]) -> RetryRule:
+        """调用方覆盖优先（'*' 为覆盖中的兜底），其次策略自身规则，最后按 'other' 处理"""
+        overrides = overrides or {}
+        return (overrides.get(error_class) or overrides.get('*')
+                or self.rules.get(error_class) or self.rules['other'])
+
+    def stats(self) -> Dict[str, Any]:
+        """各阶段的重试统计与预算余量"""
+        result: Dict[str, Any] = {
+            stage: {**stats, 'retry_time': round(stats['retry_time'], 3)}
+            for stage, stats in self._stats.items()
+        }
+        if self.budget is not None:
+            result['_budget'] = {
+                'tokens': round(self.budget.tokens, 2),
+                'denied': self.budget.denied,
+            }
+        return result
+
+    def _stage_stats(self, stage: str) -> Dict[str, Any]:
+        stats = self._stats.get(stage)
+        if stats is None:
+            stats = {'calls': 0, 'retries': 0, 'retry_time': 0.0, 'gave_up': 0,
+                     'budget_denied': 0, 'errors': {}}
+            self._stats[stage] = stats
+        return stats
+
+
+# 未绑定到爬虫实例的 retry_async 调用共享的策略
+default_retry_policy = RetryPolicy()
+
+
+def retry_async(max_retries: int = 3, delay: float = 1.0):
+    """异步重试装饰器（兼容旧接口）
+
+    DEFAULT_RULES 中可重试的错误类别按同一规则重试（最多 max_retries 次尝试，去相关抖动从 delay 起步）；
+    客户端错误与未知异常仍按默认规则直接放弃。
+    被装饰的是方法且实例带有 `retry_policy` 时，共享该实例的重试预算与统计。
+    """
+    rule = RetryRule(max_attempts=max_retries, base_delay=delay, max_delay=max(delay * 2 ** max_retries, delay))
+    rules = {error_class: rule for error_class, default in DEFAULT_RULES.items() if default.retry}
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            policy = getattr(args[0], 'retry_policy', None) if args else None
+            if not isinstance(policy, RetryPolicy):
+                policy = default_retry_policy
+            return await policy.run(func, *args, stage=func.__name__, rules=rules, **kwargs)
+        return wrapper
+    return decorator
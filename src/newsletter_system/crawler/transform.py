@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+文章的 CPU 密集型转换步骤。
+
+职责概览：
+- 把 HTML 解析（抽取图片地址）、HTML → Markdown 转换、content.md 文档生成与内容 hash
+  集中为模块级纯函数：输入输出都是 str/list/dict，可以直接交给进程池或线程池执行，
+  不阻塞爬虫的事件循环。
+- `convert_article()` 一次完成“图片链接改写为本地相对路径 → 单次解析 → Markdown”：
+  改写按图片 URL 的公共前缀单遍扫描 HTML 并查表替换（O(文档长度)），结果与逐张图片
+  `html.replace(url, path)` 完全一致；URL 之间或与替换路径可能重叠时退回逐个替换。
+- 正文清理规则见 `markdown_rules`，按来源的规则集作为参数传入（默认 Substack）。
+- 实现范围（并非完整的“一次遍历”）：转换阶段只解析一次，但仍有以下未做到——
+  1. 图片地址的抽取与改写不在同一次遍历中：图片下载位于两者之间，解析树也无法跨进程池传递。
+     浏览器路径的图片列表由页面内求值顺带返回，不解析；HTTP 直取路径由 `extract_image_urls` 单独解析
+     （只为 <img> 建树）。
+  2. 只收集 src / data-src；srcset 中的候选地址既不收集也不单独改写，只有与已下载 URL 完全相同的
+     候选会随文本替换变为本地路径。
+  3. 分享/订阅等 UI 元素由 `markdown_rules` 在 Markdown 文本上清理，而不是在 DOM 遍历中剔除：
+     content.md 的逐字节兼容以这些文本规则的结果为准。
+- `warm_up()` 在 worker 启动后预先导入 BeautifulSoup/markdownify 并跑一次小转换，
+  避免第一篇文章承担导入与初始化开销。
+
+使用示例：
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(executor, convert_article, html, title, subtitle, True,
+                                        [(image_url, 'images/img_0.jpg')])
+    result['content_html'], result['markdown_content'], result['md_content'], result['content_hash']
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin
+
+from .markdown_rules import SUBSTACK_RULES, MarkdownRuleset
+
+try:
+    from bs4 import BeautifulSoup, SoupStrainer
+except ImportError:  # pragma: no cover - 依赖缺失时由爬虫模块统一提示
+    BeautifulSoup = SoupStrainer = None
+
+try:
+    from markdownify import MarkdownConverter
+    MARKDOWNIFY_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    MARKDOWNIFY_AVAILABLE = False
+
+NO_CONTENT_MARKDOWN = "**错误: 未能获取到文章内容**\n\n可能原因:\n- 网络连接问题\n- 文章需要登录访问\n- 文章已被删除"
+SHORT_CONTENT_MARKDOWN = "**注意: 未能获取到有效内容**"
+
+# 公共前缀过短时命中过多，单遍扫描不划算
+_MIN_SCAN_ANCHOR = 8
+
+
+def warm_up() -> bool:
+    """预热 worker：完成依赖导入与一次小规模转换"""
+    sample = '<div><h2>warm up</h2><p>text <img src="/a.png"></p></div>'
+    extract_image_urls(sample, 'https://example.com')
+    html_to_markdown(sample)
+    return True
+
+
+def normalize_image_url(src: str, base_url: str) -> str:
+    """处理相对URL"""
+    if src.startswith('//'):
+        return 'https:' + src
+    elif src.startswith('/'):
+        return urljoin(base_url, src)
+    elif not src.startswith(('http://', 'https://')):
+        return urljoin(base_url, src)
+    return src
+
+
+def extract_image_urls(html_content: str, base_url: str) -> List[str]:
+    """从HTML内容中提取图片URL"""
+    # 只保留 <img> 节点建树，省掉正文其余部分的对象构建
+    soup = BeautifulSoup(html_content, 'html.parser', parse_only=SoupStrainer('img'))
+    images = []
+
+    for img in soup.find_all('img'):
+        src = img.get('src') or img.get('data-src')
+        if src:
+            images.append(normalize_image_url(src, base_url))
+
+    return images
+
+
+def html_to_markdown(html_content: str) -> str:
+    """HTML → Markdown（ATX 标题，去掉 script/style）；与 markdownify(html) 等价，只解析一次"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    return MarkdownConverter(heading_style="ATX", strip=['script', 'style']).convert_soup(soup)
+
+
+def rewrite_image_references(html_content: str, replacements: Sequence[Tuple[str, str]]) -> str:
+    """把 HTML 中的图片 URL 替换为本地相对路径
+
+    语义等同于按顺序执行 `html_content = html_content.replace(url, path)`，
+    因此 src、data-src、srcset 以及链接里出现的同一 URL 都会被改写。
+    """
+    pairs = [(url, path) for url, path in replacements if url]
+    if not pairs or not html_content:
+        return html_content
+
+    # 同一 URL 重复出现时，顺序替换里只有第一次生效
+    mapping: Dict[str, str] = {}
+    for url, path in pairs:
+        mapping.setdefault(url, path)
+
+    anchor = _scan_anchor(mapping)
+    if anchor is None:
+        for url, path in pairs:
+            html_content = html_content.replace(url, path)
+        return html_content
+
+    # 单遍扫描：定位公共前缀出现的位置，再按 URL 长度查表
+    lengths = sorted({len(url) for url in mapping}, reverse=True)
+    parts = []
+    last = 0
+    position = html_content.find(anchor)
+    while position != -1:
+        for length in lengths:
+            path = mapping.get(html_content[position:position + length])
+            if path is not None:
+                parts.append(html_content[last:position])
+                parts.append(path)
+                last = position + length
+                position = html_content.find(anchor, last)
+                break
+        else:
+            position = html_content.find(anchor, position + 1)
+    parts.append(html_content[last:])
+    return ''.join(parts)
+
+
+def _scan_anchor(mapping: Dict[str, str]) -> Optional[str]:
+    """返回单遍扫描使用的公共前缀；无法保证与顺序替换等价时返回 None
+
+    等价条件：URL 出现处两两不重叠（无互为前缀、公共前缀只出现在开头、结尾不是公共前缀的前段），
+    且替换结果与前后文拼接后不会构成新的 URL（路径中没有公共前缀或其前段结尾，
+    URL 不包含路径、也不以路径的前段结尾）。
+    """
+    urls = list(mapping)
+    anchor = os.path.commonprefix(urls)
+    if len(anchor) < _MIN_SCAN_ANCHOR:
+        return None
+
+    ordered = sorted(urls)
+    if any(b.startswith(a) for a, b in zip(ordered, ordered[1:])):
+        return None
+    for url in urls:
+        if url.find(anchor, 1) != -1 or _ends_with_prefix_of(url, anchor):
+            return None
+
+    paths = set(mapping.values())
+    for path in paths:
+        if anchor in path or _ends_with_prefix_of(path, anchor):
+            return None
+    path_prefixes = {path[:k] for path in paths for k in range(1, len(path) + 1)}
+    longest = max(len(path) for path in paths)
+    # 包含某个路径的 URL 必然包含所有路径的公共前缀（通常是 images/img_）
+    path_anchor = os.path.commonprefix(list(paths))
+    for url in urls:
+        if any(url[-k:] in path_prefixes for k in range(1, min(longest, len(url)) + 1)):
+            return None
+        if path_anchor in url and any(path in url for path in paths):
+            return None
+    return anchor
+
+
+def _ends_with_prefix_of(text: str, anchor: str) -> bool:
+    """text 是否以 anchor 的某个真前缀结尾"""
+    if not text:
+        return False
+    # 只需检查 anchor 中与 text 末字符相同的位置
+    index = anchor.find(text[-1], 0, len(anchor) - 1)
+    while index != -1:
+        if text.endswith(anchor[:index + 1]):
+            return True
+        index = anchor.find(text[-1], index + 1, len(anchor) - 1)
+    return False
+
+
+def clean_markdown_body(content_markdown: str, ruleset: Optional[MarkdownRuleset] = None) -> str:
+    """清理掉文章开头的分享按钮、订阅信息等非正文内容，以及正文中的 UI 元素"""
+    return (ruleset or SUBSTACK_RULES).clean(content_markdown)
+
+
+def build_markdown_document(article_data: Dict[str, Any], ruleset: Optional[MarkdownRuleset] = None) -> str:
+    """生成Markdown文件内容 - 只包含正文"""
+    md_content = []
+
+    # 标题
+    md_content.append(f"# {article_data.get('title', 'Untitled')}")
+    md_content.append("")
+
+    # 副标题
+    if article_data.get('subtitle'):
+        md_content.append(f"### {article_data.get('subtitle')}")
+        md_content.append("")
+
+    # 正文内容（图片路径已经在HTML阶段处理为相对路径 images/img_x.jpg）
+    if article_data.get('content_markdown'):
+        md_content.append(clean_markdown_body(article_data['content_markdown'], ruleset))
+        md_content.append("")
+
+    return "\n".join(md_content)
+
+
+def convert_article(html_content: Optional[str], title: Any = 'Untitled', subtitle: Any = None,
+                    has_title: bool = True,
+                    image_replacements: Optional[Sequence[Tuple[str, str]]] = None,
+                    ruleset: Optional[MarkdownRuleset] = None) -> Dict[str, Any]:
+    """文章转换：改写图片链接、正文 Markdown、content.md 全文与内容 hash
+
+    返回 {'content_html', 'markdown_content', 'md_content', 'content_hash', 'warning'}，
+    content_html 为图片链接改写后的 HTML；warning 为 None、'short'（内容过短）
+    或 'empty'（没有 HTML），由调用方记录日志。
+    """
+    if html_content and image_replacements:
+        html_content = rewrite_image_references(html_content, image_replacements)
+
+    warning = None
+    markdown_content = ""
+    if html_content and MARKDOWNIFY_AVAILABLE:
+        if len(html_content) < 100:
+            warning = 'short'
+            markdown_content = html_to_markdown(html_content)
+            if not markdown_content.strip():
+                markdown_content = SHORT_CONTENT_MARKDOWN
+        else:
+            markdown_content = html_to_markdown(html_content)
+    elif not html_content:
+        warning = 'empty'
+        markdown_content = NO_CONTENT_MARKDOWN
+
+    document_data = {'subtitle': subtitle, 'content_markdown': markdown_content}
+    if has_title:
+        document_data['title'] = title
+    md_content = build_markdown_document(document_data, ruleset)
+
+    return {
+        'content_html': html_content,
+        'markdown_content': markdown_content,
+        'md_content': md_content,
+        'content_hash': hashlib.sha256(md_content.encode('utf-8')).hexdigest(),
+        'warning': warning,
+    }
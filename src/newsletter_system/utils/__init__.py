@@ -3,6 +3,8 @@ Utility functions and helpers.
 """
 
 from .logger import setup_logger
-from .file_utils import ensure_directory, save_json, load_json
+from .file_utils import (ensure_directory, save_json, load_json, parse_size, iter_jsonl, iter_json_records,
+                         JsonlWriter, write_json_array_from_jsonl)
 
-__all__ = ['setup_logger', 'ensure_directory', 'save_json', 'load_json']
\ No newline at end of file
+__all__ = ['setup_logger', 'ensure_directory', 'save_json', 'load_json', 'parse_size', 'iter_jsonl',
+           'iter_json_records', 'JsonlWriter', 'write_json_array_from_jsonl']
\ No newline at end of file
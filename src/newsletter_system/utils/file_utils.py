@@ -1,7 +1,7 @@
 """
 文件工具函数。
 
-包含目录保障、JSON 读写与项目根目录定位等常用能力，避免在业务代码中重复实现。
+包含目录保障、JSON/JSON Lines 读写与项目根目录定位等常用能力，避免在业务代码中重复实现。
 
 使用示例：
     from newsletter_system.utils.file_utils import ensure_directory, save_json, load_json
@@ -9,12 +9,22 @@
     ensure_directory("crawled_data/data")
     save_json({"ok": True}, "crawled_data/data/demo.json")
     data = load_json("crawled_data/data/demo.json", default={})
+
+    for article in iter_json_records("crawled_data/data/processed_articles.jsonl.gz"):
+        ...
 """
 
+import gzip
+import hashlib
 import json
+import logging
 import os
+import re
+import zlib
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
 
 
 def ensure_directory(path: str) -> Path:
@@ -71,6 +81,223 @@ def load_json(file_path: str, default: Any = None) -> Any:
         return default
 
 
+_SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2,
+               'G': 1024 ** 3, 'GB': 1024 ** 3}
+
+
+def parse_size(value: Union[str, int, float, None]) -> Optional[int]:
+    """
+    Parse a human-readable size such as "10MB", "512 KB" or 2048 into bytes.
+    
+    Args:
+        value: Size string (B/KB/MB/GB, 1024-based) or number of bytes
+        
+    Returns:
+        Size in bytes, or None if value is empty
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*', value.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def sha256_file(file_path: Union[str, Path], chunk_size: int = 1024 * 1024) -> Tuple[str, int]:
+    """
+    Compute the SHA-256 of a file in chunks.
+    
+    Args:
+        file_path: File path
+        chunk_size: Bytes read per chunk
+        
+    Returns:
+        (hex digest, file size in bytes)
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            hasher.update(chunk)
+    return hasher.hexdigest(), size
+
+
+def _open_text(path: Path, mode: str):
+    """Open a text file, transparently (de)compressing paths that end with .gz."""
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def iter_jsonl(file_path: Union[str, Path]) -> Iterator[Any]:
+    """
+    Lazily iterate over the records of a JSON Lines file (gzip-compressed if it ends with .gz).
+    
+    A torn last line or truncated gzip stream (e.g. after a crash mid-write) ends the iteration
+    with a warning instead of raising.
+    
+    Args:
+        file_path: File path
+        
+    Returns:
+        Iterator over decoded records; empty if the file doesn't exist
+    """
+    path = Path(file_path)
+    if not path.exists():
+        return
+    with _open_text(path, 'r') as f:
+        line_number = 0
+        try:
+            for line_number, line in enumerate(f, 1):
+                if not line.endswith('\n'):
+                    logger.warning(f"Ignoring incomplete last line {line_number} of {path}")
+                    return
+                yield json.loads(line)
+        except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+            logger.warning(f"{path} is truncated after line {line_number}: {e}")
+
+
+def iter_json_records(file_path: Union[str, Path]) -> Iterator[Any]:
+    """
+    Iterate over the records of a JSON Lines file, or of a JSON array file.
+    
+    JSON Lines (.jsonl / .jsonl.gz) is read lazily; a JSON array (.json) has to be loaded at once.
+    
+    Args:
+        file_path: File path
+        
+    Returns:
+        Iterator over records; empty if the file doesn't exist
+    """
+    path = Path(file_path)
+    if path.suffix == '.json':
+        yield from load_json(path, default=[])
+    else:
+        yield from iter_jsonl(path)
+
+
+class JsonlWriter:
+    """
+    Append records to a JSON Lines file as they are produced, one line per record.
+    
+    Paths ending with .gz are gzip-compressed; every write is flushed so that the file
+    stays readable up to the last complete record if the process dies.
+    
+    Args:
+        file_path: File path
+        append: Keep existing records (otherwise the file is truncated)
+    """
+    
+    def __init__(self, file_path: Union[str, Path], append: bool = True):
+        self.path = Path(file_path)
+        ensure_directory(self.path.parent)
+        self.records = 0
+        if append and self.path.exists():
+            self._repair()
+        self._file = _open_text(self.path, 'a' if append else 'w')
+    
+    def _repair(self):
+        """Drop a torn tail left by a crash so that appended records stay readable."""
+        if self.path.suffix == '.gz':
+            # A truncated gzip member would hide every member appended after it
+            try:
+                with gzip.open(self.path, 'rb') as f:
+                    while f.read(1024 * 1024):
+                        pass
+                return
+            except (EOFError, zlib.error, gzip.BadGzipFile):
+                pass
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                for record in iter_jsonl(self.path):
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.path)
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Truncate back to the end of the last complete line
+            position = size
+            while position > 0:
+                step = min(64 * 1024, position)
+                f.seek(position - step)
+                block = f.read(step)
+                newline = block.rfind(b'\n')
+                if newline != -1:
+                    f.truncate(position - step + newline + 1)
+                    return
+                position -= step
+            f.truncate(0)
+    
+    def write(self, record: Any) -> None:
+        """Append one record and flush it."""
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.records += 1
+    
+    def close(self) -> None:
+        self._file.close()
+    
+    def __enter__(self) -> 'JsonlWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def write_json_array_from_jsonl(source: Union[str, Path], destination: Union[str, Path],
+                                indent: int = 2, unique_key: Optional[str] = None) -> int:
+    """
+    Stream a JSON Lines file into a JSON array file, one record in memory at a time.
+    
+    The output is byte-identical to `json.dump(records, f, ensure_ascii=False, indent=indent)`
+    and replaces the destination atomically.
+    
+    Args:
+        source: JSON Lines file (.jsonl or .jsonl.gz)
+        destination: JSON array file to write
+        indent: JSON indentation
+        unique_key: If set, only the last record for each value of this key is kept
+            (in the position of that last occurrence)
+        
+    Returns:
+        Number of records written
+    """
+    keep = None
+    if unique_key is not None:
+        last_line: Dict[Any, int] = {}
+        for line_number, record in enumerate(iter_jsonl(source)):
+            last_line[record.get(unique_key) if isinstance(record, dict) else line_number] = line_number
+        keep = set(last_line.values())
+    
+    destination = Path(destination)
+    tmp_path = destination.with_name(destination.name + '.tmp')
+    prefix = ' ' * indent
+    written = 0
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for line_number, record in enumerate(iter_jsonl(source)):
+            if keep is not None and line_number not in keep:
+                continue
+            f.write(',\n' if written else '[\n')
+            # Strings never contain raw newlines in JSON, so indenting every line nests the record
+            f.write('\n'.join(prefix + line for line in json.dumps(record, ensure_ascii=False, indent=indent).split('\n')))
+            written += 1
+        f.write('\n]' if written else '[]')
+    os.replace(tmp_path, destination)
+    return written
+
+
 def get_project_root() -> Path:
     """
     Get the project root directory.
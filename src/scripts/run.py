@@ -45,6 +45,10 @@ async def main():
     parser.add_argument("--max-concurrent-images", type=int, default=20, help="最大并发图片下载数")
     parser.add_argument("--batch-size", type=int, default=10, help="批处理大小")
     parser.add_argument("--no-resume", action="store_true", help="禁用断点续传")
+    parser.add_argument("--incremental", action="store_true", help="增量同步文章列表（基于水位线）")
+    parser.add_argument("--fetch-mode", choices=["browser", "http_first"], default="browser",
+                        help="正文获取方式：browser 或 http_first（HTTP 直取，浏览器兜底）")
+    parser.add_argument("--browser-shards", type=int, default=1, help="独立浏览器进程数（每个分片各有页面池）")
     parser.add_argument("--api-delay", type=float, default=1.0, help="API请求间隔（秒）")
     parser.add_argument("--article-delay", type=float, default=0.5, help="文章处理间隔（秒）")
     
@@ -58,7 +62,10 @@ async def main():
         batch_size=args.batch_size,
         enable_resume=not args.no_resume,
         api_delay=args.api_delay,
-        article_delay=args.article_delay
+        article_delay=args.article_delay,
+        incremental_sync=args.incremental,
+        fetch_mode=args.fetch_mode,
+        browser_shards=args.browser_shards
     )
     
     # 运行爬虫
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+推荐特征读取基准：整文件 JSON vs 列式导出
+
+生成 N 篇带正文的合成文章，写成 processed_articles.json 与列式分片（data/features），
+比较推荐任务取 id + 点赞总数 + 标签的耗时：原先需要加载整个 JSON（含正文）并逐篇解析嵌套的
+reactions / postTags；列式导出只解码请求的列。最后核对两种方式的结果一致。
+
+用法:
+    python src/tests/benchmark_columnar_export.py [文章数] [parquet|npz]
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.columnar_export import export_records, read_columns
+from newsletter_system.crawler.newsletter_crawler import RECOMMENDATION_FIELDS
+
+REPEATS = 3
+
+
+def synthetic_article(i: int):
+    return {
+        'id': 100_000_000 + i,
+        'title': f'Top ML Papers of the Week #{i}',
+        'subtitle': 'The top ML papers of the week',
+        'post_date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}T12:00:00.000Z',
+        'audience': 'everyone' if i % 3 else 'only_paid',
+        'type': 'newsletter',
+        'reactions': {'❤': i % 97},
+        'wordcount': 1200 + i % 800,
+        'postTags': [{'id': t, 'name': f'Tag {t}', 'slug': f'tag-{t}'} for t in range(i % 4)],
+        'cover_image': f'https://substackcdn.com/image/{i}.png',
+        'description': 'A weekly summary of the most important ML papers. ' * 3,
+        'canonical_url': f'https://nlp.elvissaravia.com/p/top-ml-papers-{i}',
+        'slug': f'top-ml-papers-{i}',
+        'content_html': '<p>' + 'lorem ipsum dolor sit amet ' * 400 + '</p>',
+        'content_markdown': 'lorem ipsum dolor sit amet ' * 400,
+        'local_images': [f'images/img_{k}.png' for k in range(i % 6)],
+    }
+
+
+def best_of(func):
+    elapsed = None
+    result = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - started
+        elapsed = seconds if elapsed is None else min(elapsed, seconds)
+    return result, elapsed
+
+
+def legacy_features(processed_file: Path):
+    """原先的方式：加载整个 JSON 并逐篇解析嵌套字段"""
+    with open(processed_file, 'r', encoding='utf-8') as f:
+        articles = json.load(f)
+    return {
+        'id': [article['id'] for article in articles],
+        'reaction_count': [sum(article.get('reactions', {}).values()) for article in articles],
+        'tag_count': [len(article.get('postTags', [])) for article in articles],
+    }
+
+
+def main():
+    """主函数"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    export_format = sys.argv[2] if len(sys.argv) > 2 else 'auto'
+    work_dir = Path(tempfile.mkdtemp(prefix='columnar_bench_'))
+    try:
+        articles = [synthetic_article(i) for i in range(count)]
+        processed_file = work_dir / 'processed_articles.json'
+        with open(processed_file, 'w', encoding='utf-8') as f:
+            json.dump(articles, f, ensure_ascii=False, indent=2)
+        features_dir = work_dir / 'features'
+        started = time.perf_counter()
+        stats = export_records(articles, features_dir, RECOMMENDATION_FIELDS, export_format=export_format)
+        export_seconds = time.perf_counter() - started
+        del articles
+
+        print("📊 推荐特征读取基准")
+        print("=" * 50)
+        print(f"文章数: {count}，processed_articles.json {processed_file.stat().st_size / 1024 / 1024:.1f}MB")
+        print(f"列式导出: {stats['format']}，{stats['parts']} 个分片，{stats['bytes'] / 1024 / 1024:.1f}MB，"
+              f"导出 {export_seconds * 1000:.0f}ms")
+
+        columns = ['id', 'reaction_count', 'tag_count']
+        legacy, legacy_seconds = best_of(lambda: legacy_features(processed_file))
+        columnar, columnar_seconds = best_of(lambda: read_columns(features_dir, columns))
+        _, single_seconds = best_of(lambda: read_columns(features_dir, ['reaction_count'], latest_only=False))
+        _, all_seconds = best_of(lambda: read_columns(features_dir))
+
+        print("\n📈 读取耗时:")
+        print(f"   - JSON 整文件 + 解析嵌套字段: {legacy_seconds * 1000:.0f}ms")
+        print(f"   - 列式 {'/'.join(columns)}:   {columnar_seconds * 1000:.0f}ms")
+        print(f"   - 列式单列 reaction_count:     {single_seconds * 1000:.0f}ms")
+        print(f"   - 列式全部列（含文本列）:      {all_seconds * 1000:.0f}ms")
+        print(f"\n   - 结果一致: {'✅' if legacy == columnar else '❌'}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+文章发现基准：遍历文章目录 + 逐个读取 metadata.json vs SQLite 清单
+
+生成 N 个文章目录（每个带 metadata.json），其中最近处理的 1% 视为“有变化”。比较三种下游常见操作：
+列出全部文章 id 与目录、按 id 找目录（原先靠拆分目录名）、列出某时间之后有变化的文章。
+最后核对两种方式的结果一致。
+
+用法:
+    python src/tests/benchmark_corpus_manifest.py [文章数]
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.corpus_manifest import CorpusManifest
+
+IMAGES_PER_ARTICLE = 6
+
+
+def scan_metadata(articles_dir: Path):
+    """原先的方式：遍历文章目录并读取每个 metadata.json"""
+    articles = []
+    for article_dir in articles_dir.iterdir():
+        metadata_path = article_dir / 'metadata.json'
+        if metadata_path.exists():
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                articles.append(json.load(f))
+    return articles
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    """主函数"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    work_dir = Path(tempfile.mkdtemp(prefix='manifest_bench_'))
+    try:
+        output_dir = work_dir / 'crawled_data'
+        articles_dir = output_dir / 'articles'
+        base = datetime(2024, 1, 1)
+        for i in range(count):
+            article_id = 100_000_000 + i
+            article_dir = articles_dir / f'{article_id}_Top-ML-Papers-of-the-Week-{i}'
+            article_dir.mkdir(parents=True)
+            directory = str(article_dir.relative_to(output_dir))
+            metadata = {
+                'id': article_id, 'title': f'Top ML Papers of the Week #{i}', 'slug': f'top-ml-papers-{i}',
+                'post_date': (base + timedelta(days=i)).isoformat(),
+                'description': 'A weekly summary of the most important ML papers. ' * 3,
+                'reactions': {'❤': i % 97}, 'postTags': [{'id': 1, 'name': 'AI', 'slug': 'ai'}],
+                'cover_image': {'path': f'{directory}/images/cover.jpg', 'hash': f'{i:064x}', 'size': 120_000},
+                'local_images': [{'original_url': f'https://substackcdn.com/image/{i}/{k}.png',
+                                  'local_path': f'{directory}/images/img_{k}.png',
+                                  'hash': f'{i * 100 + k:064x}', 'size': 80_000}
+                                 for k in range(IMAGES_PER_ARTICLE)],
+                'article_directory': directory, 'content_hash': f'{i:032x}',
+                'processed_date': (base + timedelta(minutes=i)).isoformat(),
+            }
+            with open(article_dir / 'metadata.json', 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        manifest = CorpusManifest(output_dir / 'data' / 'manifest.sqlite3')
+        _, backfill_ms = timed(lambda: manifest.rebuild_from_disk(output_dir, articles_dir))
+        # 让最近 1% 的文章成为“有变化”：改写其 content_hash
+        marker = time.time()
+        changed_ids = set()
+        for i in range(count - max(1, count // 100), count):
+            article = manifest.get(100_000_000 + i)
+            manifest.record_article(article['id'], article['directory'], 'changed',
+                                    article['images'], article['processed_date'])
+            changed_ids.add(article['id'])
+        cutoff = (base + timedelta(minutes=count - max(1, count // 100))).isoformat()
+
+        print("📊 文章发现基准")
+        print("=" * 50)
+        print(f"文章数: {count}，回填清单 {backfill_ms:.0f}ms，"
+              f"清单文件 {manifest.path.stat().st_size / 1024 / 1024:.1f}MB")
+
+        scanned, scan_ms = timed(lambda: scan_metadata(articles_dir))
+        listed, list_ms = timed(lambda: manifest.list_changed_since(0))
+        target = 100_000_000 + count // 2
+        _, lookup_scan_ms = timed(lambda: next(d for d in articles_dir.iterdir() if d.name.split('_')[0] == str(target)))
+        _, lookup_ms = timed(lambda: manifest.get(target))
+        scan_changed = {a['id'] for a in scanned if a['processed_date'] >= cutoff}
+        changed, changed_ms = timed(lambda: manifest.list_changed_since(marker))
+
+        print("\n📈 耗时:")
+        print(f"   - 全部文章: 遍历 + metadata.json {scan_ms:.0f}ms，清单 {list_ms:.0f}ms")
+        print(f"   - 按 id 找目录: 遍历拆目录名 {lookup_scan_ms:.2f}ms，清单 {lookup_ms:.2f}ms")
+        print(f"   - 有变化的文章（{len(changed_ids)} 篇）: 遍历后按 processed_date 过滤 {scan_ms:.0f}ms，"
+              f"清单 {changed_ms:.2f}ms")
+
+        consistent = ({a['id'] for a in scanned} == {a['id'] for a in listed}
+                      and {a['id'] for a in changed} == changed_ids == scan_changed)
+        print(f"\n   - 结果一致: {'✅' if consistent else '❌'}")
+        manifest.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
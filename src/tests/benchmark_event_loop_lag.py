@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+转换步骤对事件循环延迟的影响
+
+用合成的大篇幅文章 HTML 分别以 inline / thread / process 三种执行方式跑转换，
+同时用一个固定间隔的 ticker 测量事件循环的调度延迟（实际唤醒时间 - 预期唤醒时间）。
+不需要浏览器与网络。
+"""
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler import transform
+from newsletter_system.crawler.newsletter_crawler import NewsletterCrawler, CrawlerConfig
+
+TICK_INTERVAL = 0.01  # ticker 间隔（秒）
+ARTICLE_COUNT = 24    # 每种模式转换的文章数
+PARAGRAPHS = 1500     # 每篇文章的段落数
+
+
+def build_synthetic_html(paragraphs: int = PARAGRAPHS) -> str:
+    """生成类似 Substack 正文结构的大篇幅 HTML"""
+    parts = ['<div class="available-content"><p>Share this post</p><h2>Top ML Papers</h2>']
+    for i in range(paragraphs):
+        parts.append(
+            f'<p>Paragraph {i}: <strong>model</strong> results on <a href="https://arxiv.org/abs/{i}">paper {i}</a> '
+            + 'lorem ipsum dolor sit amet ' * 8 + '</p>'
+        )
+        if i % 25 == 0:
+            parts.append(f'<figure><img src="https://substackcdn.com/image/fetch/img_{i}.png"></figure>'
+                         '<ul><li>point one</li><li>point two</li></ul><blockquote>quote</blockquote>')
+    parts.append('</div>')
+    return ''.join(parts)
+
+
+async def _ticker(lags, stop: asyncio.Event):
+    """按固定间隔 sleep，记录每次唤醒相对预期时间的延迟"""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_INTERVAL
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def benchmark_mode(mode: str, html: str):
+    """以指定执行方式转换 ARTICLE_COUNT 篇文章，返回耗时与事件循环延迟统计"""
+    config = CrawlerConfig(output_dir=tempfile.mkdtemp(), transform_executor=mode, enable_resume=False)
+    crawler = NewsletterCrawler(config)
+    await crawler._start_transform_executor()
+
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(TICK_INTERVAL * 5)  # 先采几次空闲基线
+
+    start_time = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(
+            crawler._run_transform(transform.convert_article, html, f'Article {i}', None, True)
+            for i in range(ARTICLE_COUNT)
+        ))
+        elapsed = time.perf_counter() - start_time
+    finally:
+        stop.set()
+        await ticker
+        if crawler.transform_executor:
+            crawler.transform_executor.shutdown(wait=True)
+
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    return {
+        'name': mode,
+        'workers': crawler.transform_stats['workers'],
+        'total_time': elapsed,
+        'content_hash': results[0]['content_hash'],
+        'ticks': len(lags_ms),
+        'lag_p50_ms': statistics.median(lags_ms) if lags_ms else 0.0,
+        'lag_p99_ms': lags_ms[int(len(lags_ms) * 0.99) - 1] if lags_ms else 0.0,
+        'lag_max_ms': lags_ms[-1] if lags_ms else 0.0,
+    }
+
+
+async def main():
+    """主函数"""
+    print("📊 转换步骤事件循环延迟测试")
+    print("=" * 50)
+
+    html = build_synthetic_html()
+    print(f"合成文章: {len(html) / 1024:.0f}KB × {ARTICLE_COUNT} 篇")
+
+    results = []
+    for mode in ('inline', 'thread', 'process'):
+        print(f"\n⏱️ 测试 {mode} 模式...")
+        results.append(await benchmark_mode(mode, html))
+
+    print("\n" + "=" * 50)
+    print("📈 对比结果:")
+    print("=" * 50)
+    for result in results:
+        print(f"🔧 {result['name']}（workers={result['workers']}）:")
+        print(f"   - 总耗时: {result['total_time']:.2f}秒")
+        print(f"   - ticker 次数: {result['ticks']}")
+        print(f"   - 事件循环延迟 p50/p99/max: {result['lag_p50_ms']:.1f} / "
+              f"{result['lag_p99_ms']:.1f} / {result['lag_max_ms']:.1f} ms")
+
+    if len({result['content_hash'] for result in results}) == 1:
+        print("\n✅ 三种模式输出一致")
+    else:
+        print("\n❌ 不同模式的输出不一致")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Markdown 正文清理基准：逐行 any(word in line) vs 编译后的规则集
+
+语料取自爬取结果 `<data_dir>/data/processed_articles.jsonl`（或 .jsonl.gz / .json）中每篇文章的 content_markdown
+（清理前的 Markdown）；找不到时用合成文章代替。对每篇文章比较两种实现的 CPU 时间，
+并逐字节核对输出。
+
+用法:
+    python src/tests/benchmark_markdown_rules.py [crawled_data]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler import transform
+from newsletter_system.crawler.markdown_rules import get_ruleset
+from newsletter_system.utils.file_utils import iter_json_records
+
+REPEATS = 5
+
+# 规则集引入之前的清理实现（对照组）
+_LEADING_SKIP_WORDS = ['Share this post', 'Copy link', 'Facebook', 'Email', 'Discover more from',
+                       'Subscribe', 'Notes', 'More', 'Already have an account']
+_SHARE_WORDS = ['Share this post', 'Copy link', 'Facebook', 'Email']
+_SUBSCRIBE_WORDS = ['Discover more from', 'Subscribe', 'Already have an account']
+_NAV_LINES = ['Notes', 'More', 'Share', '[Share](javascript:void(0))']
+_FALLBACK_SKIP_WORDS = ['Share this post', 'Copy link', 'Facebook', 'Email',
+                        'Discover more from', 'Subscribe', 'Notes', 'More',
+                        'Already have an account', '[Share](javascript:void(0))']
+
+
+def legacy_clean(content_markdown: str) -> str:
+    lines = content_markdown.split('\n')
+    cleaned_lines = []
+    skip_until_main_content = True
+
+    for line in lines:
+        if skip_until_main_content:
+            stripped_line = line.strip()
+            if len(stripped_line) > 20 and not any(skip_word in stripped_line for skip_word in _LEADING_SKIP_WORDS):
+                skip_until_main_content = False
+                cleaned_lines.append(line)
+            elif stripped_line.startswith('## ') and 'Share this post' not in stripped_line:
+                skip_until_main_content = False
+                cleaned_lines.append(line)
+            elif stripped_line.startswith('1).') or stripped_line.startswith('1.'):
+                skip_until_main_content = False
+                cleaned_lines.append(line)
+        else:
+            if any(skip_word in line for skip_word in _SHARE_WORDS):
+                continue
+            if any(skip_word in line for skip_word in _SUBSCRIBE_WORDS):
+                continue
+            if line.strip() in _NAV_LINES:
+                continue
+            cleaned_lines.append(line)
+
+    if not cleaned_lines and content_markdown:
+        for line in lines:
+            if not any(skip_word in line for skip_word in _FALLBACK_SKIP_WORDS):
+                if line.strip():
+                    cleaned_lines.append(line)
+
+    return '\n'.join(cleaned_lines).strip()
+
+
+def load_corpus(data_dir: Path):
+    """读取爬取结果中的 content_markdown；没有语料时生成合成文章"""
+    for name in ("processed_articles.jsonl", "processed_articles.jsonl.gz", "processed_articles.json"):
+        processed_file = data_dir / "data" / name
+        if not processed_file.exists():
+            continue
+        corpus = [article['content_markdown'] for article in iter_json_records(processed_file)
+                  if article.get('content_markdown')]
+        if corpus:
+            return corpus, str(processed_file)
+
+    corpus = []
+    for n in range(60):
+        parts = ['<div><p>Share this post</p><p>Copy link</p><p>Facebook</p><p>Email</p>',
+                 f'<p>Discover more from AI Newsletter</p><h2>Top ML Papers of the Week #{n}</h2>']
+        for i in range(40 + n * 5):
+            parts.append(f'<p>{i + 1}). <strong>Paper {i}</strong> - results on benchmark {i} '
+                         + 'lorem ipsum dolor sit amet ' * 6 + f'<a href="https://arxiv.org/abs/{i}">Paper</a></p>')
+            if i % 10 == 0:
+                parts.append('<p>Share</p><p>Subscribe now</p><ul><li>point</li><li>More</li></ul>')
+        parts.append('<p>Share this post</p><p>Already have an account? Sign in</p></div>')
+        corpus.append(transform.html_to_markdown(''.join(parts)))
+    return corpus, '合成文章（未找到 processed_articles.json）'
+
+
+def cpu_time(func, corpus):
+    """最少一次的总 CPU 时间（秒）"""
+    best = None
+    for _ in range(REPEATS):
+        started = time.process_time()
+        for content in corpus:
+            func(content)
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """主函数"""
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("crawled_data")
+    ruleset = get_ruleset('substack')
+
+    print("📊 Markdown 正文清理基准")
+    print("=" * 50)
+    corpus, source = load_corpus(data_dir)
+    total_kb = sum(len(content) for content in corpus) / 1024
+    print(f"语料: {source}，{len(corpus)} 篇，共 {total_kb:.0f}KB")
+
+    mismatches = sum(1 for content in corpus if legacy_clean(content) != ruleset.clean(content))
+    legacy_time = cpu_time(legacy_clean, corpus)
+    ruleset_time = cpu_time(ruleset.clean, corpus)
+
+    print("\n📈 每篇文章 CPU 时间:")
+    print(f"   - 逐行检查: {legacy_time / len(corpus) * 1000:.3f}ms")
+    print(f"   - 规则集:   {ruleset_time / len(corpus) * 1000:.3f}ms "
+          f"({legacy_time / ruleset_time:.1f}x)")
+    print(f"   - 输出一致: {'✅' if mismatches == 0 else f'❌ {mismatches} 篇不一致'}")
+
+
+if __name__ == "__main__":
+    main()
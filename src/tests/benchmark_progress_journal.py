@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+断点续传进度写入基准：每篇文章整文件保存 vs 追加式日志
+
+模拟 AntiDetectCrawler 的写法（每处理完一篇文章保存一次进度），每篇文章附带若干张图片记录。
+整文件保存的单次代价随已处理文章数线性增长；日志每次只追加本篇的事件。
+最后比较两种方式加载得到的进度是否一致。
+
+用法:
+    python src/tests/benchmark_progress_journal.py [文章数]
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.newsletter_crawler import ProgressTracker
+
+IMAGES_PER_ARTICLE = 8
+
+
+def simulate(tracker: ProgressTracker, articles: int, image_file: Path, save):
+    """依次处理文章并在每篇之后保存，返回每篇保存耗时（秒）"""
+    timings = []
+    for article_id in range(articles):
+        for i in range(IMAGES_PER_ARTICLE):
+            url = f"https://substackcdn.com/image/fetch/w_1456/https%3A%2F%2Fpost-{article_id}%2Fimg_{i}.png"
+            tracker.record_image(url, image_file, f"articles/{article_id}_post/images/img_{i}.png", 'f' * 64, 123456)
+        if article_id % 50 == 49:
+            tracker.mark_failed(article_id, 'Processing failed')
+        else:
+            tracker.mark_processed(article_id)
+        started = time.perf_counter()
+        save(tracker)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def describe(name: str, timings, tail: int):
+    last = timings[-tail:]
+    print(f"   - {name}: 总计 {sum(timings):.2f}s，前 {tail} 篇平均 {sum(timings[:tail]) / tail * 1000:.2f}ms，"
+          f"最后 {tail} 篇平均 {sum(last) / tail * 1000:.2f}ms")
+
+
+def main():
+    """主函数"""
+    articles = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    tail = max(1, articles // 10)
+    work_dir = Path(tempfile.mkdtemp(prefix='progress_bench_'))
+    try:
+        image_file = work_dir / 'img.png'
+        image_file.write_bytes(b'0' * 16)
+
+        print("📊 断点续传进度写入基准")
+        print("=" * 50)
+        print(f"文章数: {articles}，每篇 {IMAGES_PER_ARTICLE} 张图片")
+
+        legacy_file = work_dir / 'legacy' / 'crawler_progress.json'
+        legacy_file.parent.mkdir()
+        legacy = ProgressTracker()
+        legacy_timings = simulate(legacy, articles, image_file, lambda t: t.save(legacy_file))
+
+        journal_file = work_dir / 'journal' / 'crawler_progress.json'
+        journal_file.parent.mkdir()
+        journaled = ProgressTracker.open(journal_file)
+        journal_timings = simulate(journaled, articles, image_file, lambda t: t.checkpoint())
+        journal_stats = journaled.journal.stats()
+        journaled.journal.close()
+
+        print("\n📈 每篇文章保存进度的耗时:")
+        describe('整文件保存', legacy_timings, tail)
+        describe('追加日志', journal_timings, tail)
+        print(f"   - 日志: {journal_stats['events']} 条事件未压缩，{journal_stats['bytes'] / 1024:.0f}KB，"
+              f"{journal_stats['flushes']} 次 fsync")
+
+        started = time.perf_counter()
+        reloaded = ProgressTracker.open(journal_file)
+        load_seconds = time.perf_counter() - started
+        expected = ProgressTracker.load(legacy_file)
+        same = (reloaded.processed_articles == expected.processed_articles
+                and reloaded.failed_articles == expected.failed_articles
+                and reloaded.image_index == expected.image_index)
+        print(f"   - 重新加载（快照 + 重放日志）: {load_seconds * 1000:.0f}ms，与整文件保存一致: {'✅' if same else '❌'}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
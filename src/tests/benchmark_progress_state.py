@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+断点续传进度状态基准：Python set / dict vs 紧凑集合
+
+生成 N 个图片 URL（每张带索引记录：路径、hash、大小、mtime 与 ETag）与 M 个文章 ID，分别以原先的格式
+（JSON 列表加载为 set，image_index 为以 URL 为键的字典）和现在的格式（ID 有序数组、URL 64 位摘要、
+按摘要分列存放的图片索引）保存，比较加载耗时、加载后状态占用的内存（tracemalloc，与计时分开测量）
+以及命中/未命中查找的耗时。
+
+用法:
+    python src/tests/benchmark_progress_state.py [图片URL数] [文章数]
+"""
+
+import gc
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.compact_sets import CompactIdSet, ImageIndex, UrlDigestSet
+from newsletter_system.crawler.newsletter_crawler import ProgressTracker
+
+LOOKUPS = 100_000
+REPEATS = 3
+IMAGES_PER_ARTICLE = 6
+
+
+def image_url(i: int) -> str:
+    return (f"https://substackcdn.com/image/fetch/w_1456,c_limit,f_auto,q_auto:good/"
+            f"https%3A%2F%2Fsubstack-post-media.s3.amazonaws.com%2Fpublic%2Fimages%2F{i:08x}-1456x816.png")
+
+
+def image_entry(i: int, article_ids):
+    article_id = article_ids[i // IMAGES_PER_ARTICLE % len(article_ids)]
+    return {
+        'path': f"articles/{article_id}_Top-ML-Papers-of-the-Week/images/img_{i % IMAGES_PER_ARTICLE}.png",
+        'hash': f"{i * 2654435761:064x}"[-64:],
+        'size': 80_000 + i % 50_000,
+        'mtime_ns': 1_700_000_000_000_000_000 + i * 1_000_003,
+        'etag': f'"{i * 40503:032x}"',
+        'last_modified': None,
+        'elapsed': 0.125,
+    }
+
+
+def legacy_load(filepath: Path):
+    """原先的加载方式：JSON 列表转为 set，image_index 保持以 URL 为键的字典"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return set(data['processed_articles']), set(data['downloaded_images']), data['image_index']
+
+
+def measure_load(load):
+    """返回 (加载结果, 最快一次的秒数, 加载后仍占用的字节数)"""
+    elapsed = None
+    for _ in range(REPEATS):
+        gc.collect()
+        started = time.perf_counter()
+        load()
+        seconds = time.perf_counter() - started
+        elapsed = seconds if elapsed is None else min(elapsed, seconds)
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current
+
+
+def lookup_time(contains, keys):
+    started = time.perf_counter()
+    for key in keys:
+        contains(key)
+    return (time.perf_counter() - started) / len(keys) * 1e9
+
+
+def main():
+    """主函数"""
+    url_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    article_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    work_dir = Path(tempfile.mkdtemp(prefix='progress_state_bench_'))
+    try:
+        urls = [image_url(i) for i in range(url_count)]
+        article_ids = list(range(100_000_000, 100_000_000 + article_count * 7, 7))
+        hits = urls[::max(1, url_count // LOOKUPS)][:LOOKUPS]
+        misses = [image_url(url_count + i) for i in range(len(hits))]
+        entries = {url: image_entry(i, article_ids) for i, url in enumerate(urls)}
+
+        legacy_file = work_dir / 'legacy.json'
+        with open(legacy_file, 'w', encoding='utf-8') as f:
+            json.dump({'processed_articles': article_ids, 'failed_articles': {},
+                       'downloaded_images': urls, 'image_index': entries}, f, ensure_ascii=False, indent=2)
+        compact_file = work_dir / 'compact.json'
+        ProgressTracker(processed_articles=CompactIdSet(article_ids),
+                        downloaded_images=UrlDigestSet.from_urls(urls),
+                        image_index=ImageIndex.from_entries(entries)).save(compact_file)
+
+        print("📊 断点续传进度状态基准")
+        print("=" * 50)
+        print(f"图片 URL: {url_count}，文章: {article_count}")
+        print(f"进度文件: 原格式 {legacy_file.stat().st_size / 1024 / 1024:.1f}MB，"
+              f"紧凑格式 {compact_file.stat().st_size / 1024 / 1024:.1f}MB")
+
+        (legacy_ids, legacy_urls, legacy_index), legacy_seconds, legacy_bytes = measure_load(
+            lambda: legacy_load(legacy_file))
+        compact, compact_seconds, compact_bytes = measure_load(lambda: ProgressTracker.load(compact_file))
+        converted, convert_seconds, _ = measure_load(lambda: ProgressTracker.load(legacy_file))
+
+        print("\n📈 加载:")
+        print(f"   - set + dict（原实现）:   {legacy_seconds * 1000:.0f}ms，{legacy_bytes / 1024 / 1024:.1f}MB")
+        print(f"   - 紧凑集合:               {compact_seconds * 1000:.0f}ms，{compact_bytes / 1024 / 1024:.1f}MB")
+        print(f"   - 旧格式文件转为紧凑集合: {convert_seconds * 1000:.0f}ms")
+
+        print("\n🔍 每次查找（ns）:")
+        print(f"   - set:              命中 {lookup_time(legacy_urls.__contains__, hits):.0f}，"
+              f"未命中 {lookup_time(legacy_urls.__contains__, misses):.0f}")
+        images = compact.downloaded_images
+        print(f"   - 摘要集合:         命中 {lookup_time(images.__contains__, hits):.0f}，"
+              f"未命中 {lookup_time(images.__contains__, misses):.0f}")
+        index = compact.image_index
+        print(f"   - 图片索引（dict / 摘要分列）: 命中 {lookup_time(legacy_index.get, hits):.0f} / "
+              f"{lookup_time(index.get, hits):.0f}，未命中 {lookup_time(legacy_index.get, misses):.0f} / "
+              f"{lookup_time(index.get, misses):.0f}")
+        ids = compact.processed_articles
+        print(f"   - 文章 ID（set / 有序数组）: {lookup_time(legacy_ids.__contains__, article_ids[:LOOKUPS]):.0f} / "
+              f"{lookup_time(ids.__contains__, article_ids[:LOOKUPS]):.0f}")
+
+        consistent = (all(url in compact.downloaded_images for url in hits)
+                      and not any(url in compact.downloaded_images for url in misses)
+                      and all(url in converted.downloaded_images for url in hits)
+                      and all(index.get(url) == entries[url] == converted.image_index.get(url) for url in hits)
+                      and not any(url in index for url in misses)
+                      and set(compact.processed_articles) == legacy_ids)
+        print(f"\n   - 结果一致: {'✅' if consistent else '❌'}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
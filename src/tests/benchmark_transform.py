@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+文章转换微基准：逐图 replace + markdownify vs 单遍改写 + 单次解析
+
+旧流程对每张下载成功的图片做一次 `html.replace(url, path)` 全文扫描，再交给 markdownify 解析；
+新流程（transform.convert_article）按图片 URL 公共前缀单遍改写，再解析一次生成 Markdown。
+两者输出必须逐字节一致。不需要浏览器与网络。
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from bs4 import BeautifulSoup
+from markdownify import markdownify as md
+
+from newsletter_system.crawler import transform
+
+REPEATS = 5
+CASES = [  # (段落数, 图片数)
+    (300, 20),
+    (1500, 100),
+    (3000, 300),
+]
+
+
+def build_post(paragraphs: int, images: int):
+    """生成 Substack 风格的大篇幅正文与图片替换表"""
+    every = max(1, paragraphs // images)
+    parts = ['<div class="available-content"><p>Share this post</p><h2>Top ML Papers of the Week</h2>']
+    replacements = []
+    for i in range(paragraphs):
+        parts.append(f'<p>Paragraph {i}: <strong>results</strong> in <a href="https://arxiv.org/abs/2401.{i:05d}">'
+                     f'paper {i}</a> ' + 'lorem ipsum dolor sit amet ' * 8 + '</p>')
+        index = i // every
+        if i % every == 0 and index < images:
+            url = f'https://substackcdn.com/image/fetch/w_1456,c_limit,f_auto/https%3A%2F%2Fpost-media%2Fimg_{index}.png'
+            parts.append(f'<figure><a class="image-link" href="{url}"><img src="{url}" '
+                         f'srcset="{url} 1456w" alt="figure {index}"></a></figure>')
+            replacements.append((url, f'images/img_{index}.png'))
+    parts.append('</div>')
+    return ''.join(parts), replacements
+
+
+def legacy_rewrite(html_content: str, replacements):
+    """旧流程的链接改写：每张图片一次全文 replace"""
+    for url, path in replacements:
+        html_content = html_content.replace(url, path)
+    return html_content
+
+
+def legacy_extract(html_content: str):
+    """旧流程的图片抽取：完整解析后 find_all('img')"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    return [transform.normalize_image_url(img.get('src') or img.get('data-src'), 'https://example.com')
+            for img in soup.find_all('img') if img.get('src') or img.get('data-src')]
+
+
+def legacy_convert(html_content: str, replacements):
+    """旧流程：逐图全文 replace，再由 markdownify 重新解析"""
+    html_content = legacy_rewrite(html_content, replacements)
+    markdown = md(html_content, heading_style="ATX", strip=['script', 'style'])
+    return transform.build_markdown_document({'title': 'Post', 'content_markdown': markdown})
+
+
+def onepass_convert(html_content: str, replacements):
+    return transform.convert_article(html_content, 'Post', None, True, replacements)['md_content']
+
+
+def best_of(func, *args):
+    timings = []
+    result = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return result, min(timings), statistics.median(timings)
+
+
+def main():
+    """主函数"""
+    print("📊 文章转换微基准")
+    print("=" * 50)
+    transform.warm_up()
+
+    for paragraphs, images in CASES:
+        html_content, replacements = build_post(paragraphs, images)
+
+        _, rewrite_legacy, _ = best_of(legacy_rewrite, html_content, replacements)
+        _, rewrite_onepass, _ = best_of(transform.rewrite_image_references, html_content, replacements)
+
+        legacy_images, extract_legacy, _ = best_of(legacy_extract, html_content)
+        images_now, extract_now, _ = best_of(transform.extract_image_urls, html_content, 'https://example.com')
+
+        legacy_md, legacy_best, legacy_median = best_of(legacy_convert, html_content, replacements)
+        onepass_md, onepass_best, onepass_median = best_of(onepass_convert, html_content, replacements)
+
+        print(f"\n📄 {len(html_content) / 1024:.0f}KB，{len(replacements)} 张图片:")
+        print(f"   - 链接改写: 逐图 replace {rewrite_legacy * 1000:.1f}ms → 单遍 {rewrite_onepass * 1000:.1f}ms "
+              f"({rewrite_legacy / rewrite_onepass:.1f}x)")
+        print(f"   - 图片抽取（HTTP 直取路径）: 完整解析 {extract_legacy * 1000:.1f}ms → 只建 <img> 节点 "
+              f"{extract_now * 1000:.1f}ms ({extract_legacy / extract_now:.1f}x)，"
+              f"结果一致: {'✅' if legacy_images == images_now else '❌'}")
+        print(f"   - 完整转换: 旧 {legacy_best * 1000:.0f}ms (中位 {legacy_median * 1000:.0f}ms) → "
+              f"新 {onepass_best * 1000:.0f}ms (中位 {onepass_median * 1000:.0f}ms)")
+        print(f"   - 输出一致: {'✅' if legacy_md == onepass_md else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式导出测试：.npy 编解码往返、派生特征、分片追加、列裁剪读取与重复 id 去重
+"""
+
+import io
+import math
+import struct
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler import columnar_export
+from newsletter_system.crawler.columnar_export import (ColumnarExporter, _decode_npy, _encode_npy, article_features,
+                                                       export_records, list_parts, read_columns)
+
+FIELDS = ['id', 'title', 'slug', 'post_date', 'wordcount', 'reactions', 'postTags']
+
+
+def article(article_id, title='标题', **extra):
+    data = {
+        'id': article_id, 'title': title, 'slug': f'post-{article_id}', 'post_date': '2024-01-02T03:04:05.000Z',
+        'wordcount': '1200', 'reactions': {'❤': 3, 'other': 2}, 'postTags': [{'slug': 'ai'}, {'slug': 'ml'}],
+        'local_images': ['images/img_0.png'], 'cover_image': 'https://x/cover.png', 'content_markdown': 'abc',
+    }
+    data.update(extra)
+    return data
+
+
+@pytest.mark.parametrize('values, kind', [
+    ([1, -1, 2 ** 62, 0], 'int64'),
+    ([0.5, -1e300, math.inf], 'float64'),
+    ([True, False, True], 'bool'),
+    (['', 'ascii', '中文 🚀', 'x' * 300], 'string'),
+    ([], 'string'),
+    ([], 'int64'),
+])
+def test_npy_round_trip(values, kind):
+    data = _encode_npy(values, kind)
+    header_length = struct.unpack('<H', data[8:10])[0]
+    # 数据起始位置按 64 字节对齐
+    assert (10 + header_length) % 64 == 0
+    assert _decode_npy(data) == values
+
+
+def test_npy_round_trip_keeps_nan():
+    decoded = _decode_npy(_encode_npy([math.nan, 1.0], 'float64'))
+    assert math.isnan(decoded[0]) and decoded[1] == 1.0
+
+
+def test_npy_is_readable_by_numpy():
+    numpy = pytest.importorskip('numpy')
+    assert numpy.load(io.BytesIO(_encode_npy(['a', '中文'], 'string'))).tolist() == ['a', '中文']
+    assert numpy.load(io.BytesIO(_encode_npy([3, -1], 'int64'))).dtype == numpy.int64
+
+
+def test_decode_rejects_non_npy():
+    with pytest.raises(ValueError):
+        _decode_npy(b'PK\x03\x04 not npy')
+
+
+def test_article_features_derives_columns():
+    row = article_features(article(7, reactions=None, postTags='bad', wordcount=None,
+                                   post_date='not a date'), FIELDS)
+    assert row['id'] == 7 and row['wordcount'] == -1
+    assert math.isnan(row['post_timestamp'])
+    assert (row['reaction_count'], row['tag_count'], row['tag_slugs']) == (0, 0, '')
+
+    row = article_features(article(8), FIELDS)
+    assert row['wordcount'] == 1200
+    assert row['post_timestamp'] == 1704164645.0
+    assert row['reaction_count'] == 5
+    assert (row['tag_count'], row['tag_slugs']) == (2, 'ai,ml')
+    assert row['reactions'] == '{"❤":3,"other":2}'
+    assert (row['image_count'], row['has_cover'], row['title_length'], row['markdown_length']) == (1, True, 2, 3)
+
+
+def test_exporter_writes_parts_and_reads_pruned_columns(tmp_path):
+    directory = tmp_path / 'features'
+    exporter = ColumnarExporter(directory, FIELDS, export_format='npz', part_rows=2)
+    exporter.extend(article_features(article(article_id), FIELDS) for article_id in range(5))
+    assert len(list_parts(directory)) == 2
+    exporter.close()
+    assert [path.name for path in list_parts(directory)] == ['part-00001.npz', 'part-00002.npz', 'part-00003.npz']
+    assert exporter.stats()['rows'] == 5 and exporter.stats()['parts'] == 3
+
+    with zipfile.ZipFile(list_parts(directory)[0]) as archive:
+        assert 'reaction_count.npy' in archive.namelist()
+
+    columns = read_columns(directory, ['reaction_count', 'slug'])
+    assert list(columns) == ['reaction_count', 'slug']
+    assert columns['reaction_count'] == [5] * 5
+    assert columns['slug'] == [f'post-{article_id}' for article_id in range(5)]
+    assert read_columns(directory, ['missing_column'])['missing_column'] == [None] * 5
+
+    # 再次打开时从下一个分片编号继续，重复 id 默认只保留最后一次
+    exporter = ColumnarExporter(directory, FIELDS, export_format='npz')
+    exporter.append(article_features(article(1, title='更新'), FIELDS))
+    exporter.close()
+    assert list_parts(directory)[-1].name == 'part-00004.npz'
+    latest = read_columns(directory, ['id', 'title'])
+    assert latest == {'id': [0, 2, 3, 4, 1], 'title': ['标题'] * 4 + ['更新']}
+    assert len(read_columns(directory, ['id'], latest_only=False)['id']) == 6
+
+
+def test_export_records_replaces_existing_parts(tmp_path):
+    directory = tmp_path / 'features'
+    export_records([article(1), article(2)], directory, FIELDS, export_format='npz', part_rows=1)
+    stats = export_records([article(3)], directory, FIELDS, export_format='npz')
+    assert stats['rows'] == 1
+    assert read_columns(directory, ['id']) == {'id': [3]}
+
+
+def test_parquet_requires_pyarrow(tmp_path):
+    if columnar_export.PYARROW_AVAILABLE:
+        export_records([article(1)], tmp_path, FIELDS, export_format='parquet')
+        assert read_columns(tmp_path, ['tag_slugs']) == {'tag_slugs': ['ai,ml']}
+    else:
+        assert columnar_export.resolve_format('auto') == 'npz'
+        with pytest.raises(RuntimeError):
+            columnar_export.resolve_format('parquet')
+    with pytest.raises(ValueError):
+        columnar_export.resolve_format('csv')
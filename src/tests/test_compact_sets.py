@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+紧凑集合测试：与内置 set/dict 的行为对照（跨越多次合并）、序列化往返与旧格式转换
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.compact_sets import MIN_PENDING, CompactIdSet, ImageIndex, UrlDigestSet
+from newsletter_system.crawler.newsletter_crawler import ProgressTracker
+
+
+def image_url(number: int) -> str:
+    return f'https://substackcdn.com/image/fetch/w_1456/{number:x}.png'
+
+
+def image_entry(number: int, version: int = 0):
+    entry = {'path': f'articles/{number // 7}_post/images/img_{number % 7}.png',
+             'hash': f'{number * 31 + version:064x}', 'size': 1000 + number + version, 'mtime_ns': number * 10 ** 9}
+    if number % 3 == 0:
+        entry.update(etag=f'"{number}-{version}"', last_modified=None, elapsed=0.125)
+    elif number % 3 == 1:
+        entry.update(etag=None, last_modified='Mon, 01 Jan 2024 00:00:00 GMT', elapsed=1.5)
+    return entry
+
+
+def test_compact_id_set_matches_builtin_set():
+    rng = random.Random(1)
+    compact, model = CompactIdSet([5, 3, 'legacy-id']), {5, 3, 'legacy-id'}
+    for _ in range(MIN_PENDING * 4):
+        value = rng.randrange(10 ** 6)
+        if rng.random() < 0.8:
+            compact.add(value)
+            model.add(value)
+        else:
+            compact.discard(value)
+            model.discard(value)
+    assert len(compact) == len(model)
+    assert all(value in compact for value in model)
+    assert 10 ** 7 not in compact
+    listed = compact.to_list()
+    assert listed[:-1] == sorted(value for value in model if isinstance(value, int))
+    assert listed[-1] == 'legacy-id'
+    assert set(CompactIdSet(json.loads(json.dumps(listed)))) == model
+
+
+def test_url_digest_set_matches_builtin_set_and_round_trips():
+    rng = random.Random(2)
+    digests, model = UrlDigestSet(), set()
+    for _ in range(MIN_PENDING * 4):
+        url = image_url(rng.randrange(6000))
+        if rng.random() < 0.75:
+            digests.add(url)
+            model.add(url)
+        else:
+            digests.discard(url)
+            model.discard(url)
+        # 移除后再加入（墓碑撤销）
+        if rng.random() < 0.01 and model:
+            again = next(iter(model))
+            digests.discard(again)
+            digests.add(again)
+    assert len(digests) == len(model)
+    assert all(url in digests for url in model)
+    assert not any(image_url(number) in digests for number in range(6000, 6100))
+
+    restored = UrlDigestSet.from_base64(digests.to_base64())
+    assert len(restored) == len(model)
+    assert all(url in restored for url in model)
+    assert UrlDigestSet.from_urls(sorted(model)).to_base64() == digests.to_base64()
+
+
+def test_image_index_matches_dict_across_merges():
+    rng = random.Random(3)
+    index, model = ImageIndex(), {}
+    for step in range(MIN_PENDING * 5):
+        number = rng.randrange(3000)
+        if rng.random() < 0.8:
+            entry = image_entry(number, version=step)
+            index.put(image_url(number), entry)
+            model[number] = entry
+        else:
+            index.discard(image_url(number))
+            model.pop(number, None)
+        # 热点缓存不会返回被覆盖或移除前的记录
+        probe = rng.randrange(3000)
+        expected = model.get(probe)
+        assert index.get(image_url(probe)) == (ImageIndex._normalize(expected) if expected else None)
+
+    assert len(index) == len(model)
+    assert sorted(index.digests()) == index.digests()
+    assert len(index.digests()) == len(model)
+    for number, entry in model.items():
+        assert index.get(image_url(number)) == ImageIndex._normalize(entry)
+        assert index.get(ImageIndex.key(image_url(number))) == index.get(image_url(number))
+
+
+def test_image_index_get_returns_copies():
+    index = ImageIndex.from_entries({image_url(1): image_entry(1)})
+    entry = index.get(image_url(1))
+    entry['path'] = 'elsewhere.png'
+    assert index.get(image_url(1))['path'] == image_entry(1)['path']
+
+
+def test_image_index_snapshot_round_trip_through_json():
+    entries = {image_url(number): image_entry(number) for number in range(500)}
+    entries[image_url(999)] = dict(image_entry(999), path='top-level.png', etag='"ünïcode"')
+    index = ImageIndex.from_entries(entries)
+    for number in range(0, 500, 5):
+        index.discard(image_url(number))
+
+    snapshot = json.loads(json.dumps(index.to_snapshot()))
+    restored = ImageIndex.from_snapshot(snapshot)
+    assert restored == index
+    assert len(restored) == 401
+    assert restored.get(image_url(999))['path'] == 'top-level.png'
+    assert restored.get(image_url(999))['etag'] == '"ünïcode"'
+    assert restored.get(image_url(0)) is None
+    # 恢复后继续修改、再次序列化
+    restored.put(image_url(0), image_entry(0, version=1))
+    assert ImageIndex.from_snapshot(restored.to_snapshot()).get(image_url(0))['hash'] == image_entry(0, 1)['hash']
+
+
+def test_image_index_rewrites_compact_text_buffer():
+    """反复覆盖同一批记录后，失效文本被整理，内存不随覆盖次数增长"""
+    index = ImageIndex()
+    for version in range(12):
+        for number in range(MIN_PENDING):
+            index.put(image_url(number), image_entry(number, version))
+        index.digests()
+    assert index._garbage * 2 <= len(index._text)
+    assert index.get(image_url(3)) == ImageIndex._normalize(image_entry(3, 11))
+
+
+def test_progress_tracker_converts_legacy_snapshot(tmp_path):
+    """URL 列表形式的 downloaded_images 与以 URL 为键的 image_index 在加载时转换为摘要形式"""
+    legacy = {
+        'processed_articles': [3, 1, 2],
+        'failed_articles': {'4': 'timeout'},
+        'downloaded_images': [image_url(1), image_url(2)],
+        'image_index': {image_url(1): image_entry(1), image_url(2): image_entry(2)},
+        'last_updated': '2024-01-01T00:00:00',
+    }
+    path = tmp_path / 'crawler_progress.json'
+    path.write_text(json.dumps(legacy), encoding='utf-8')
+
+    tracker = ProgressTracker.load(path)
+    assert list(tracker.processed_articles) == [1, 2, 3]
+    assert tracker.failed_articles == {4: 'timeout'}
+    assert image_url(1) in tracker.downloaded_images and image_url(2) in tracker.downloaded_images
+    assert tracker.image_index.get(image_url(2)) == ImageIndex._normalize(image_entry(2))
+
+    tracker.save(path)
+    saved = json.loads(path.read_text(encoding='utf-8'))
+    assert 'image_index' not in saved and 'downloaded_images' not in saved
+    reloaded = ProgressTracker.load(path)
+    assert reloaded.image_index == tracker.image_index
+    assert len(reloaded.downloaded_images) == 2
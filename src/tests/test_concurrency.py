@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应并发控制测试：上限约束、加性增/乘性减、冷却期、共享退避与延迟信号
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.concurrency import AdaptiveConcurrencyController
+
+
+def test_slot_never_exceeds_limit():
+    async def scenario():
+        controller = AdaptiveConcurrencyController(initial=2, max_limit=5)
+        peak = 0
+
+        async def task():
+            nonlocal peak
+            async with controller.slot():
+                peak = max(peak, controller.in_flight)
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(*(task() for _ in range(10)))
+        return peak, controller.in_flight
+
+    peak, in_flight = asyncio.run(scenario())
+    assert peak == 2
+    assert in_flight == 0
+
+
+def test_additive_increase_up_to_max_limit():
+    """每累计 limit 次成功上限 +1，不超过 max_limit"""
+    controller = AdaptiveConcurrencyController(initial=1, max_limit=3)
+    controller.record_success()
+    assert controller.limit == 2
+    controller.record_success()
+    assert controller.limit == 2
+    controller.record_success()
+    assert controller.limit == 3
+    for _ in range(10):
+        controller.record_success()
+    assert controller.limit == 3
+    assert controller.counters['increases'] == 2
+
+
+def test_multiplicative_decrease_with_cooldown_and_backoff():
+    """限流信号把上限减半；冷却期内的重复信号只计数；退避截止时间按连续信号指数增长"""
+    controller = AdaptiveConcurrencyController(initial=8, max_limit=8, cooldown=60.0,
+                                               base_backoff=0.5, max_backoff=30.0)
+    before = time.monotonic()
+    controller.record_throttle('http_429')
+    assert controller.limit == 4
+    first_pause = controller.pause_until - before
+    assert 0.9 <= first_pause <= 1.1
+
+    controller.record_throttle('challenge')
+    assert controller.limit == 4
+    assert controller.pause_until - before >= 1.9
+    assert controller.counters['signals'] == {'http_429': 1, 'challenge': 1}
+    assert controller.counters['decreases'] == 1
+    assert [entry['reason'] for entry in controller.history] == ['start', 'http_429']
+
+    # 成功响应清零连续限流计数
+    controller.record_success()
+    assert controller._consecutive_throttles == 0
+
+
+def test_decrease_respects_min_limit():
+    controller = AdaptiveConcurrencyController(initial=2, max_limit=4, min_limit=1, cooldown=0.0,
+                                               base_backoff=0.0)
+    for _ in range(5):
+        controller.record_throttle('rate_limit_page')
+    assert controller.limit == 1
+
+
+def test_latency_degradation_decreases_limit():
+    """延迟 EWMA 超过基线 latency_factor 倍时按延迟信号下调"""
+    controller = AdaptiveConcurrencyController(initial=4, max_limit=4, cooldown=0.0)
+    for _ in range(6):
+        controller.record_success(latency=0.1)
+    assert controller.limit == 4
+    while not controller.counters['signals'].get('latency'):
+        controller.record_success(latency=1.0)
+        assert controller.counters['successes'] < 50
+    assert controller.limit == 2
+    assert controller.history[-1]['reason'] == 'latency'
+
+
+def test_wait_backoff_and_set_max_limit():
+    async def scenario():
+        controller = AdaptiveConcurrencyController(initial=5, max_limit=5)
+        controller.pause_until = time.monotonic() + 0.05
+        started = time.monotonic()
+        await controller.wait_backoff()
+        return controller, time.monotonic() - started
+
+    controller, waited = asyncio.run(scenario())
+    assert waited >= 0.04
+    controller.set_max_limit(2)
+    assert controller.limit == 2
+    assert controller.history[-1]['reason'] == 'max_limit'
+
+
+def test_increase_wakes_waiters_immediately():
+    """上限提高后，等待中的任务不必等到名额释放"""
+    async def scenario():
+        controller = AdaptiveConcurrencyController(initial=1, max_limit=2)
+        release = asyncio.Event()
+        entered = []
+
+        async def holder():
+            async with controller.slot():
+                entered.append('holder')
+                await release.wait()
+
+        async def waiter():
+            async with controller.slot():
+                entered.append('waiter')
+
+        holding = asyncio.ensure_future(holder())
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(waiter())
+        await asyncio.sleep(0.01)
+        assert entered == ['holder']
+        controller.record_success()
+        await asyncio.wait_for(waiting, 1.0)
+        release.set()
+        await holding
+        return entered
+
+    assert asyncio.run(scenario()) == ['holder', 'waiter']
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章清单测试：变化检测与 updated_at、上传状态流转、按目录/图片 hash 查询与由 metadata.json 回填
+"""
+
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.corpus_manifest import SCHEMA_VERSION, CorpusManifest, article_images
+
+IMAGES = [
+    {'path': 'articles/1_a/images/img_1.png', 'role': 'content', 'url': 'https://cdn/1.png', 'sha256': 'b' * 64,
+     'size': 20},
+    {'path': 'articles/1_a/images/cover.png', 'role': 'cover', 'url': 'https://cdn/c.png', 'sha256': 'a' * 64,
+     'size': 10},
+]
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = CorpusManifest(tmp_path / 'manifest.sqlite3')
+    yield manifest
+    manifest.close()
+
+
+def test_record_and_query(manifest):
+    assert manifest.created
+    assert manifest.record_article(1, 'articles/1_a', 'h1', IMAGES, '2024-01-01T00:00:00', title='A', slug='a')
+    assert 1 in manifest and 2 not in manifest and len(manifest) == 1
+
+    article = manifest.get(1)
+    assert (article['image_count'], article['image_bytes'], article['upload_state']) == (2, 30, 'pending')
+    assert [image['path'] for image in article['images']] == sorted(image['path'] for image in IMAGES)
+    assert manifest.find_by_directory('articles/1_a', with_images=False)['id'] == 1
+    assert 'images' not in manifest.get(1, with_images=False)
+    assert [row['article_id'] for row in manifest.find_images_by_hash('a' * 64)] == [1]
+    assert manifest.get(99) is None
+
+
+def test_unchanged_content_keeps_updated_at_and_upload_state(manifest):
+    manifest.record_article(1, 'articles/1_a', 'h1', IMAGES, '2024-01-01')
+    before = manifest.get(1)
+    manifest.mark_uploaded([1])
+    time.sleep(0.01)
+
+    # 图片顺序不同、内容相同：只刷新 processed_date
+    assert not manifest.record_article(1, 'articles/1_a', 'h1', IMAGES[::-1], '2024-02-01')
+    after = manifest.get(1)
+    assert after['updated_at'] == before['updated_at']
+    assert after['processed_date'] == '2024-02-01'
+    assert after['upload_state'] == 'uploaded' and after['uploaded_hash'] == 'h1'
+
+    # 图片 hash 变化：回到 pending，updated_at 前进
+    changed_images = [dict(IMAGES[0], sha256='c' * 64), IMAGES[1]]
+    assert manifest.record_article(1, 'articles/1_a', 'h1', changed_images, '2024-03-01')
+    changed = manifest.get(1)
+    assert changed['updated_at'] > before['updated_at']
+    assert changed['upload_state'] == 'pending'
+    assert manifest.find_images_by_hash('b' * 64) == []
+    assert manifest.stats()['changed'] == 2 and manifest.stats()['unchanged'] == 1
+
+
+def test_list_changed_since_and_by_upload_state(manifest):
+    manifest.record_article(1, 'articles/1_a', 'h1', [])
+    checkpoint = time.time()
+    time.sleep(0.01)
+    manifest.record_article(2, 'articles/2_b', 'h2', [])
+    manifest.record_article(3, 'articles/3_c', 'h3', [])
+
+    assert [row['id'] for row in manifest.list_changed_since(checkpoint)] == [2, 3]
+    assert [row['id'] for row in manifest.list_changed_since(0, limit=1)] == [1]
+    assert manifest.list_changed_since('2100-01-01T00:00:00Z') == []
+
+    manifest.mark_uploaded([1, 2])
+    manifest.mark_upload_failed([3], 'timeout')
+    assert [row['id'] for row in manifest.list_by_upload_state('uploaded')] == [1, 2]
+    failed = manifest.list_by_upload_state('failed')
+    assert [(row['id'], row['upload_error']) for row in failed] == [(3, 'timeout')]
+    assert manifest.stats()['upload_states'] == {'pending': 0, 'uploaded': 2, 'failed': 1}
+
+
+def test_directory_moves_to_new_owner_and_remove_cascades(manifest):
+    manifest.record_article(1, 'articles/x', 'h1', IMAGES)
+    # 另一篇文章接管同一目录时，旧记录被删除
+    manifest.record_article(2, 'articles/x', 'h2', [])
+    assert 1 not in manifest
+    assert manifest.find_by_directory('articles/x')['id'] == 2
+    assert manifest.find_images_by_hash('a' * 64) == []
+
+    manifest.record_article(3, 'articles/y', 'h3', IMAGES)
+    manifest.remove(3)
+    assert manifest.stats()['images'] == 0
+
+
+def test_failed_transaction_rolls_back(manifest):
+    manifest.record_article(1, 'articles/1_a', 'h1', IMAGES)
+    with pytest.raises(KeyError):
+        manifest.record_article(1, 'articles/1_a', 'h2', [{'sha256': 'd' * 64}])
+    article = manifest.get(1)
+    assert article['content_hash'] == 'h1' and len(article['images']) == 2
+
+
+def test_rebuild_from_disk(tmp_path, manifest):
+    articles_dir = tmp_path / 'articles'
+    (articles_dir / '5_post').mkdir(parents=True)
+    (articles_dir / 'broken').mkdir()
+    metadata = {
+        'id': 5, 'title': 'Post', 'slug': 'post', 'content_hash': 'h5', 'processed_date': '2024-01-01',
+        'cover_image': {'path': 'articles/5_post/images/cover.png', 'hash': 'a' * 64, 'size': 10},
+        'local_images': [{'local_path': 'articles/5_post/images/img_1.png', 'original_url': 'https://cdn/1.png',
+                          'hash': 'b' * 64, 'size': 20}, {'original_url': 'https://cdn/missing.png'}],
+    }
+    (articles_dir / '5_post' / 'metadata.json').write_text(json.dumps(metadata), encoding='utf-8')
+    (articles_dir / 'broken' / 'metadata.json').write_text('{"title": "no id"}', encoding='utf-8')
+
+    assert manifest.rebuild_from_disk(tmp_path, articles_dir) == 1
+    article = manifest.get(5)
+    assert article['directory'] == str(Path('articles') / '5_post')
+    assert {(image['role'], image['sha256']) for image in article['images']} == {('cover', 'a' * 64),
+                                                                                ('content', 'b' * 64)}
+    assert manifest.rebuild_from_disk(tmp_path, tmp_path / 'missing') == 0
+
+
+def test_article_images_and_schema_version(tmp_path):
+    images = article_images({'path': 'c.png', 'hash': 'a', 'size': 1},
+                            [{'local_path': 'i.png', 'original_url': 'u', 'hash': 'b', 'size': 2}], 'cover-url')
+    assert images == [{'path': 'c.png', 'role': 'cover', 'url': 'cover-url', 'sha256': 'a', 'size': 1},
+                      {'path': 'i.png', 'role': 'content', 'url': 'u', 'sha256': 'b', 'size': 2}]
+
+    path = tmp_path / 'manifest.sqlite3'
+    CorpusManifest(path).close()
+    reopened = CorpusManifest(path)
+    assert not reopened.created
+    reopened.close()
+    conn = sqlite3.connect(str(path))
+    conn.execute(f'PRAGMA user_version={SCHEMA_VERSION + 1}')
+    conn.close()
+    with pytest.raises(RuntimeError):
+        CorpusManifest(path)
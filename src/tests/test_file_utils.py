@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件工具测试：JSON Lines 的追加与崩溃后修复、流式导出 JSON 数组
+"""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.utils.file_utils import (JsonlWriter, iter_json_records, iter_jsonl,
+                                                write_json_array_from_jsonl)
+
+RECORDS = [
+    {'id': 1, 'title': '第一篇', 'tags': ['ai', 'ml'], 'nested': {'a': [1, {'b': None}]}},
+    {'id': 2, 'title': 'quote " and \\ backslash', 'body': 'line\nbreak\ttab', 'empty': {}, 'list': []},
+    {'id': 3, 'title': 'emoji 🚀', 'score': 1.5, 'ok': True},
+]
+
+
+@pytest.mark.parametrize('name', ['articles.jsonl', 'articles.jsonl.gz'])
+def test_writer_appends_and_reader_round_trips(tmp_path, name):
+    path = tmp_path / name
+    with JsonlWriter(path) as writer:
+        writer.write(RECORDS[0])
+    with JsonlWriter(path) as writer:
+        for record in RECORDS[1:]:
+            writer.write(record)
+        assert writer.records == 2
+    assert list(iter_jsonl(path)) == RECORDS
+    with JsonlWriter(path, append=False) as writer:
+        writer.write(RECORDS[2])
+    assert list(iter_jsonl(path)) == RECORDS[2:]
+
+
+def test_writer_repairs_torn_tail(tmp_path):
+    path = tmp_path / 'articles.jsonl'
+    path.write_text(json.dumps(RECORDS[0]) + '\n{"id": 2, "tit', encoding='utf-8')
+    assert list(iter_jsonl(path)) == RECORDS[:1]
+
+    with JsonlWriter(path) as writer:
+        writer.write(RECORDS[2])
+    assert list(iter_jsonl(path)) == [RECORDS[0], RECORDS[2]]
+
+    # 没有任何完整行时整个文件被清空
+    path.write_text('{"id": 1', encoding='utf-8')
+    with JsonlWriter(path) as writer:
+        writer.write(RECORDS[1])
+    assert list(iter_jsonl(path)) == [RECORDS[1]]
+
+
+def test_writer_repairs_truncated_gzip(tmp_path):
+    path = tmp_path / 'articles.jsonl.gz'
+    with JsonlWriter(path) as writer:
+        for record in RECORDS[:2]:
+            writer.write(record)
+    data = path.read_bytes()
+    path.write_bytes(data[:-6])
+
+    with JsonlWriter(path) as writer:
+        writer.write(RECORDS[2])
+    records = list(iter_jsonl(path))
+    # 截断的 gzip 流里可能只保留了部分记录，但之后追加的记录必须可读
+    assert records[-1] == RECORDS[2]
+    assert records[:-1] == RECORDS[:len(records) - 1]
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        assert f.read().endswith('\n')
+
+
+@pytest.mark.parametrize('indent', [2, 4])
+@pytest.mark.parametrize('count', [0, 1, 3])
+def test_json_array_export_matches_json_dump(tmp_path, indent, count):
+    source = tmp_path / 'articles.jsonl'
+    with JsonlWriter(source) as writer:
+        for record in RECORDS[:count]:
+            writer.write(record)
+    destination = tmp_path / 'articles.json'
+
+    assert write_json_array_from_jsonl(source, destination, indent=indent) == count
+    expected = json.dumps(RECORDS[:count], ensure_ascii=False, indent=indent)
+    assert destination.read_text(encoding='utf-8') == expected
+    assert not destination.with_name('articles.json.tmp').exists()
+    assert list(iter_json_records(destination)) == RECORDS[:count]
+
+
+def test_json_array_export_keeps_last_record_per_key(tmp_path):
+    source = tmp_path / 'articles.jsonl'
+    updated = dict(RECORDS[0], title='更新后')
+    with JsonlWriter(source) as writer:
+        for record in RECORDS + [updated]:
+            writer.write(record)
+    destination = tmp_path / 'articles.json'
+
+    assert write_json_array_from_jsonl(source, destination, unique_key='id') == 3
+    assert json.loads(destination.read_text(encoding='utf-8')) == [RECORDS[1], RECORDS[2], updated]
+
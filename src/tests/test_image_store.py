@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容寻址图片库测试：入库去重、硬链接放置、硬链接失败时退回复制与损坏文件的移除
+"""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler import image_store
+from newsletter_system.crawler.image_store import ContentAddressedImageStore
+
+
+def download(directory: Path, name: str, content: bytes):
+    """模拟下载完成的临时文件，返回 (路径, sha256)"""
+    path = directory / name
+    path.write_bytes(content)
+    return path, hashlib.sha256(content).hexdigest()
+
+
+def test_adopt_deduplicates_same_content(tmp_path):
+    store = ContentAddressedImageStore(tmp_path / 'by-hash')
+    first, file_hash = download(tmp_path, 'a.tmp', b'png bytes')
+    second, same_hash = download(tmp_path, 'b.tmp', b'png bytes')
+    assert file_hash == same_hash
+
+    blob = store.adopt(first, file_hash)
+    assert blob == tmp_path / 'by-hash' / file_hash[:2] / file_hash
+    assert blob.read_bytes() == b'png bytes' and not first.exists()
+    assert store.contains(file_hash)
+
+    assert store.adopt(second, file_hash) == blob
+    assert not second.exists()
+    assert store.stats()['blobs_added'] == 1
+    assert store.stats()['dedup_hits'] == 1
+    assert store.stats()['bytes_deduplicated'] == len(b'png bytes')
+
+
+def test_link_places_hardlinks_and_replaces_existing(tmp_path):
+    store = ContentAddressedImageStore(tmp_path / 'by-hash')
+    blob = store.adopt(*download(tmp_path, 'a.tmp', b'new content'))
+
+    dest = tmp_path / 'articles' / '1_post' / 'images' / 'img_0.png'
+    dest.parent.mkdir(parents=True)
+    dest.write_bytes(b'stale content')
+    store.link(blob, dest)
+    assert dest.read_bytes() == b'new content'
+    assert os.path.samefile(blob, dest)
+    # 再次放置同一文件不做任何事
+    store.link(blob, dest)
+    assert store.stats()['hardlinks'] == 1
+    assert not list(dest.parent.glob('*.link'))
+
+
+def test_link_falls_back_to_copy(tmp_path, monkeypatch):
+    store = ContentAddressedImageStore(tmp_path / 'by-hash')
+    blob = store.adopt(*download(tmp_path, 'a.tmp', b'content'))
+    os.utime(blob, ns=(1_000_000_000, 1_000_000_000))
+
+    def cross_device(source, dest):
+        raise OSError(18, 'Invalid cross-device link')
+
+    monkeypatch.setattr(image_store.os, 'link', cross_device)
+    dest = tmp_path / 'other' / 'img_0.png'
+    store.link(blob, dest)
+    assert dest.read_bytes() == b'content'
+    assert not os.path.samefile(blob, dest)
+    # 复制保留 mtime，图片索引的 mtime 校验仍然有效
+    assert dest.stat().st_mtime_ns == blob.stat().st_mtime_ns
+    assert store.stats()['copies'] == 1 and store.stats()['hardlinks'] == 0
+
+
+def test_discard_removes_blob_for_redownload(tmp_path):
+    store = ContentAddressedImageStore(tmp_path / 'by-hash')
+    path, file_hash = download(tmp_path, 'a.tmp', b'content')
+    store.adopt(path, file_hash)
+    store.discard(file_hash)
+    assert not store.contains(file_hash)
+    store.discard(file_hash)
+
+    path, file_hash = download(tmp_path, 'b.tmp', b'content')
+    store.adopt(path, file_hash)
+    assert store.contains(file_hash)
+    assert store.stats()['blobs_added'] == 2
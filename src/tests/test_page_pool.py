@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面池测试：独占借还、按需扩容与等待、按导航次数/JS 堆回收、崩溃页面替换、分片负载
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.page_pool import PagePool, ShardedPagePool
+
+
+class FakePage:
+    """只实现页面池用到的接口：is_closed / evaluate（JS 堆大小）"""
+
+    def __init__(self, number: int, heap_bytes: int = 0):
+        self.number = number
+        self.heap_bytes = heap_bytes
+        self.closed = False
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def evaluate(self, script):
+        return self.heap_bytes
+
+
+def make_pool(**kwargs):
+    created, closed = [], []
+
+    async def factory():
+        page = FakePage(len(created))
+        created.append(page)
+        return page
+
+    async def closer(page):
+        page.closed = True
+        closed.append(page)
+
+    return PagePool(factory, closer, **kwargs), created, closed
+
+
+def test_checkout_is_exclusive_and_waits_at_max_size():
+    """同一页面不会同时借给两个任务；达到上限时借用方等待归还"""
+    async def scenario():
+        pool, created, _ = make_pool(min_size=1, max_size=2)
+        await pool.start()
+        in_use = set()
+        overlaps = []
+
+        async def task():
+            async with pool.checkout() as page:
+                if page in in_use:
+                    overlaps.append(page)
+                in_use.add(page)
+                await asyncio.sleep(0.01)
+                in_use.discard(page)
+
+        await asyncio.gather(*(task() for _ in range(8)))
+        stats = pool.stats()
+        await pool.close()
+        return overlaps, created, stats
+
+    overlaps, created, stats = asyncio.run(scenario())
+    assert overlaps == []
+    assert len(created) == 2
+    assert stats['peak_size'] == 2
+    assert stats['checkouts'] == 8
+    assert stats['waits'] > 0
+
+
+def test_recycles_after_max_navigations():
+    """导航次数达到上限的页面归还时被关闭并补足到 min_size"""
+    async def scenario():
+        pool, created, closed = make_pool(min_size=1, max_size=1, max_navigations=3)
+        await pool.start()
+        for _ in range(7):
+            async with pool.checkout():
+                pass
+        stats = pool.stats()
+        await pool.close()
+        return created, closed, stats
+
+    created, closed, stats = asyncio.run(scenario())
+    assert stats['recycled_navigations'] == 2
+    assert len(created) == 3
+    assert created[0] in closed and created[1] in closed
+
+
+def test_recycles_on_js_heap_and_replaces_crashed_pages():
+    """JS 堆超过阈值时回收；借出前已关闭的页面被透明替换"""
+    async def scenario():
+        pool, created, closed = make_pool(min_size=1, max_size=1, max_heap_mb=100)
+        await pool.start()
+
+        page = await pool.acquire()
+        page.heap_bytes = 200 * 1024 * 1024
+        await pool.release(page)
+        assert page in closed
+
+        replacement = await pool.acquire()
+        assert replacement is not page
+        await pool.release(replacement)
+
+        # 空闲期间页面被关闭（例如渲染进程崩溃），下次借出时换成新页面
+        replacement.closed = True
+        fresh = await pool.acquire()
+        assert fresh is not replacement
+        await pool.release(fresh)
+        stats = pool.stats()
+        await pool.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats['recycled_heap'] == 1
+    assert stats['replaced_crashed'] == 1
+    assert stats['peak_heap_mb'] == 200
+
+
+def test_closed_pool_rejects_acquire():
+    async def scenario():
+        pool, _, closed = make_pool(min_size=2, max_size=2)
+        await pool.start()
+        await pool.close()
+        try:
+            await pool.acquire()
+        except RuntimeError:
+            return len(closed)
+        raise AssertionError('acquire on a closed pool should fail')
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_sharded_pool_balances_checkouts():
+    """分片池按借出比例选择分片，归还给原分片"""
+    async def scenario():
+        shards = [make_pool(min_size=1, max_size=2)[0] for _ in range(2)]
+        pool = ShardedPagePool(shards)
+        await pool.start()
+        pages = [await pool.acquire() for _ in range(4)]
+        loads = list(pool._load)
+        for page in pages:
+            await pool.release(page)
+        stats = pool.stats()
+        await pool.close()
+        return loads, pool._load, stats
+
+    loads, after, stats = asyncio.run(scenario())
+    assert loads == [2, 2]
+    assert after == [0, 0]
+    assert stats['checkouts'] == 4
+    assert stats['max_size'] == 4
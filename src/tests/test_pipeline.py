@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段流水线测试：背压、各阶段队列深度与计数、条目结束/失败的约定
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.pipeline import PipelineStage, StagedPipeline
+
+
+def test_bounded_queues_apply_backpressure():
+    """下游阻塞时，上游 put 在队列满后等待，在途条目数不超过各阶段队列与 worker 之和"""
+    async def scenario():
+        gate = asyncio.Event()
+        started = []
+
+        async def render(item):
+            return item
+
+        async def write(item):
+            started.append(item)
+            await gate.wait()
+            return item
+
+        pipeline = StagedPipeline([
+            PipelineStage('render', render, concurrency=1, queue_size=2),
+            PipelineStage('write', write, concurrency=1, queue_size=2),
+        ])
+        runner = asyncio.ensure_future(pipeline.run())
+
+        accepted = 0
+
+        async def produce():
+            nonlocal accepted
+            for item in range(20):
+                await pipeline.put(item)
+                accepted += 1
+
+        producer = asyncio.ensure_future(produce())
+        await asyncio.sleep(0.05)
+
+        # write 队列 2 条 + write worker 1 条 + render worker 手里 1 条 + render 队列 2 条
+        assert accepted <= 6
+        assert not producer.done()
+        depths = pipeline.queue_depths()
+        assert depths['render'] <= 2 and depths['write'] <= 2
+        assert started == [0]
+
+        gate.set()
+        await producer
+        await pipeline.close()
+        await runner
+
+        stats = pipeline.stats()
+        assert stats['render']['processed'] == 20
+        assert stats['write']['processed'] == 20
+        assert stats['render']['max_queue_depth'] <= 2
+        assert stats['write']['max_queue_depth'] == 2
+        assert pipeline.queue_depths() == {'render': 0, 'write': 0}
+
+    asyncio.run(scenario())
+
+
+def test_stage_concurrency_is_per_stage():
+    """各阶段的并发上限相互独立"""
+    async def scenario():
+        active = {'slow': 0, 'fast': 0}
+        peak = {'slow': 0, 'fast': 0}
+
+        def tracked(name, delay):
+            async def handler(item):
+                active[name] += 1
+                peak[name] = max(peak[name], active[name])
+                await asyncio.sleep(delay)
+                active[name] -= 1
+                return item
+            return handler
+
+        pipeline = StagedPipeline([
+            PipelineStage('slow', tracked('slow', 0.01), concurrency=3, queue_size=4),
+            PipelineStage('fast', tracked('fast', 0.001), concurrency=1, queue_size=4),
+        ])
+        runner = asyncio.ensure_future(pipeline.run())
+        for item in range(12):
+            await pipeline.put(item)
+        await pipeline.close()
+        await runner
+        return peak
+
+    peak = asyncio.run(scenario())
+    assert peak['slow'] == 3
+    assert peak['fast'] == 1
+
+
+def test_none_ends_item_and_errors_are_isolated():
+    """handler 返回 None 的条目不再下传；抛出异常的条目交给 on_error，其他条目照常处理"""
+    async def scenario():
+        written = []
+        errors = []
+
+        async def parse(item):
+            if item == 3:
+                raise ValueError('bad item')
+            return None if item % 2 else item
+
+        async def write(item):
+            written.append(item)
+            return item
+
+        pipeline = StagedPipeline(
+            [PipelineStage('parse', parse, concurrency=2), PipelineStage('write', write)],
+            on_error=lambda stage, item, error: errors.append((stage, item, str(error))),
+        )
+        runner = asyncio.ensure_future(pipeline.run())
+        for item in range(6):
+            await pipeline.put(item)
+        await pipeline.close()
+        await runner
+        return pipeline, sorted(written), errors
+
+    pipeline, written, errors = asyncio.run(scenario())
+    assert written == [0, 2, 4]
+    assert errors == [('parse', 3, 'bad item')]
+    stats = pipeline.stats()
+    assert stats['parse']['processed'] == 5
+    assert stats['parse']['failed'] == 1
+    assert stats['write']['processed'] == 3
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度日志测试：批量落盘、末尾半行的重放、快照 + 日志的恢复与压缩
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.newsletter_crawler import ProgressTracker
+from newsletter_system.crawler.progress_journal import ProgressJournal
+
+
+def touch(path: Path) -> Path:
+    """record_image 会读取文件的 mtime，测试图片只需存在"""
+    path.write_bytes(b'image')
+    return path
+
+
+def test_append_is_buffered_until_fsync_every(tmp_path):
+    journal = ProgressJournal(tmp_path / 'p.journal', fsync_every=3)
+    journal.append({'op': 'processed', 'id': 1})
+    journal.append({'op': 'processed', 'id': 2})
+    assert not journal.path.exists()
+    journal.append({'op': 'processed', 'id': 3})
+    assert journal.flushes == 1
+    assert len(journal.path.read_text(encoding='utf-8').splitlines()) == 3
+    journal.append({'op': 'failed', 'id': 4, 'reason': 'x'})
+    journal.close()
+    assert journal.stats() == {'events': 4, 'bytes': journal.path.stat().st_size, 'flushes': 2}
+
+
+def test_replay_skips_torn_last_line_and_appends_on_a_new_line(tmp_path):
+    path = tmp_path / 'p.journal'
+    path.write_text('{"op":"processed","id":1}\n{"op":"processed","id":2}\n{"op":"proc', encoding='utf-8')
+
+    journal = ProgressJournal(path)
+    assert [event['id'] for event in journal.replay()] == [1, 2]
+    assert journal.events == 2
+
+    journal.append({'op': 'processed', 'id': 3})
+    journal.close()
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert lines[2] == '{"op":"proc'
+    assert json.loads(lines[3]) == {'op': 'processed', 'id': 3}
+    assert [event['id'] for event in ProgressJournal(path).replay()] == [1, 2, 3]
+
+
+def test_tracker_recovers_from_snapshot_plus_journal(tmp_path):
+    """未正常关闭（只 checkpoint）时，重新打开可由快照 + 日志恢复全部状态"""
+    path = tmp_path / 'crawler_progress.json'
+    tracker = ProgressTracker.open(path, fsync_every=100)
+    tracker.mark_processed(1)
+    tracker.mark_failed(2, 'timeout')
+    tracker.record_image('https://cdn.example.com/a.png', touch(tmp_path / 'a.png'), 'articles/a/images/img_1.png',
+                         '1' * 64, 10, {'etag': '"v1"', 'elapsed': 0.5})
+    tracker.record_image('https://cdn.example.com/b.png', touch(tmp_path / 'b.png'), 'articles/a/images/img_2.png',
+                         '2' * 64, 20)
+    tracker.forget_image('https://cdn.example.com/b.png')
+    tracker.checkpoint()
+    assert not path.exists()
+
+    recovered = ProgressTracker.open(path)
+    assert 1 in recovered.processed_articles
+    assert recovered.failed_articles == {2: 'timeout'}
+    assert 'https://cdn.example.com/a.png' in recovered.downloaded_images
+    assert 'https://cdn.example.com/b.png' not in recovered.downloaded_images
+    entry = recovered.image_index.get('https://cdn.example.com/a.png')
+    assert entry['etag'] == '"v1"' and entry['hash'] == '1' * 64
+    assert recovered.image_index == tracker.image_index
+
+
+def test_compaction_writes_snapshot_and_clears_journal(tmp_path):
+    path = tmp_path / 'crawler_progress.json'
+    tracker = ProgressTracker.open(path, fsync_every=1, compact_min_events=5)
+    for article_id in range(4):
+        tracker.mark_processed(article_id)
+    tracker.checkpoint()
+    assert tracker.journal.path.exists() and not path.exists()
+
+    tracker.mark_processed(4)
+    tracker.checkpoint()
+    assert path.exists()
+    assert not tracker.journal.path.exists()
+    assert tracker.journal.events == 0
+    assert json.loads(path.read_text(encoding='utf-8'))['processed_articles'] == [0, 1, 2, 3, 4]
+
+    # 压缩后继续追加，重新打开时快照与日志合并
+    tracker.mark_processed(5)
+    tracker.journal.flush()
+    assert sorted(ProgressTracker.open(path).processed_articles) == list(range(6))
+
+
+def test_replay_is_idempotent_when_journal_survives_compaction(tmp_path):
+    """快照替换后、日志清空前崩溃：重放已包含在快照中的事件不改变结果"""
+    path = tmp_path / 'crawler_progress.json'
+    tracker = ProgressTracker.open(path, fsync_every=1)
+    tracker.mark_processed(7)
+    tracker.record_image(42, touch(tmp_path / 'x.png'), 'articles/a/images/img_0.png', '3' * 64, 30)
+    tracker.save(path)
+
+    recovered = ProgressTracker.open(path)
+    assert list(recovered.processed_articles) == [7]
+    assert len(recovered.image_index) == 1
+    assert len(recovered.downloaded_images) == 1
+
+
+def test_close_compacts_and_start_over_keeps_image_index(tmp_path):
+    path = tmp_path / 'crawler_progress.json'
+    tracker = ProgressTracker.open(path)
+    tracker.mark_processed(1)
+    tracker.record_image('https://cdn.example.com/a.png', touch(tmp_path / 'a.png'), 'articles/a/images/img_1.png',
+                         '1' * 64, 10, {'etag': '"v1"'})
+    tracker.close()
+    assert not tracker.journal.path.exists()
+
+    fresh = ProgressTracker.open(path)
+    fresh.start_over()
+    assert len(fresh.processed_articles) == 0
+    assert 'https://cdn.example.com/a.png' not in fresh.downloaded_images
+    assert fresh.image_index.get('https://cdn.example.com/a.png')['etag'] == '"v1"'
+    fresh.mark_processed(2)
+    fresh.close()
+
+    reopened = ProgressTracker.open(path)
+    assert list(reopened.processed_articles) == [2]
+    assert reopened.image_index.get('https://cdn.example.com/a.png')['etag'] == '"v1"'
+
+
+def test_record_image_keeps_validators_for_same_content(tmp_path):
+    tracker = ProgressTracker()
+    url = 'https://cdn.example.com/a.png'
+    tracker.record_image(url, touch(tmp_path / 'a.png'), 'articles/a/images/img_1.png', '1' * 64, 10,
+                         {'etag': '"v1"', 'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT', 'elapsed': 0.2})
+    # 同一内容（例如复用到另一篇文章）未给出校验信息时沿用原有记录
+    tracker.record_image(url, touch(tmp_path / 'a.png'), 'articles/b/images/img_1.png', '1' * 64, 10)
+    entry = tracker.image_index.get(url)
+    assert entry['path'] == 'articles/b/images/img_1.png'
+    assert entry['etag'] == '"v1"'
+    # 内容变化后不再沿用
+    tracker.record_image(url, touch(tmp_path / 'a.png'), 'articles/b/images/img_1.png', '2' * 64, 11)
+    assert 'etag' not in tracker.image_index.get(url)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按主机令牌桶测试：突发容量、稳态速率、按主机/子域名匹配与不限速
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler.rate_limit import HostRateLimiter, TokenBucket
+
+
+def test_bucket_allows_burst_then_paces_at_rate():
+    """容量内的请求立即放行，之后按 1/rate 的间隔发放"""
+    async def scenario():
+        bucket = TokenBucket(rate=50.0, burst=3)
+        started = time.monotonic()
+        stamps = []
+        for _ in range(8):
+            await bucket.acquire()
+            stamps.append(time.monotonic() - started)
+        return bucket, stamps
+
+    bucket, stamps = asyncio.run(scenario())
+    assert stamps[2] < 0.01
+    # 其余 5 个请求每 20ms 一个
+    assert 0.09 <= stamps[-1] <= 0.2
+    assert bucket.requests == 8
+    assert bucket.waited > 0.09
+    assert bucket.stats()['burst'] == 3
+
+
+def test_concurrent_waiters_are_spaced_not_starved():
+    """并发等待者预约各自的时间片，总耗时与串行发放一致"""
+    async def scenario():
+        bucket = TokenBucket(rate=100.0, burst=1)
+        started = time.monotonic()
+        stamps = []
+
+        async def request():
+            await bucket.acquire()
+            stamps.append(time.monotonic() - started)
+
+        await asyncio.gather(*(request() for _ in range(6)))
+        return sorted(stamps)
+
+    stamps = asyncio.run(scenario())
+    assert stamps[0] < 0.01
+    assert 0.045 <= stamps[-1] <= 0.15
+    gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+    assert min(gaps) >= 0.005
+
+
+def test_unlimited_bucket_never_waits():
+    async def scenario():
+        bucket = TokenBucket(rate=None)
+        return [await bucket.acquire() for _ in range(100)], bucket
+
+    waits, bucket = asyncio.run(scenario())
+    assert set(waits) == {0.0}
+    assert bucket.requests == 100
+
+
+def test_host_rules_match_subdomains_and_fall_back_to_default():
+    limiter = HostRateLimiter(default_rate=10.0, default_burst=4,
+                              host_limits={'substackcdn.com': {'rate': 50.0, 'burst': 20},
+                                           'img.substackcdn.com': {'rate': 5.0, 'burst': 1}})
+    assert limiter.bucket_for('https://substackcdn.com/a.png').rate == 50.0
+    assert limiter.bucket_for('https://www.substackcdn.com/a.png').rate == 50.0
+    # 最具体的规则优先
+    assert limiter.bucket_for('https://img.substackcdn.com/a.png').rate == 5.0
+    other = limiter.bucket_for('https://example.com/x')
+    assert (other.rate, other.burst) == (10.0, 4)
+    # 同一主机共享一个桶
+    assert limiter.bucket_for('https://example.com/y') is other
+
+    limiter.set_host_limit('example.com', None)
+    assert limiter.bucket_for('https://example.com/x').rate is None
+    assert set(limiter.stats()) == {'substackcdn.com', 'www.substackcdn.com', 'img.substackcdn.com', 'example.com'}
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重试策略测试：错误分类、按类别的规则、Retry-After、全局预算与 retry_async 装饰器
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import pytest
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler import retry as retry_module
+from newsletter_system.crawler.retry import (RetryBudget, RetryPolicy, RetryRule, RetryableError,
+                                             classify_error, parse_retry_after, retry_async)
+
+aiohttp = pytest.importorskip('aiohttp')
+yarl = pytest.importorskip('yarl')
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """记录重试等待时间而不真正等待"""
+    recorded = []
+
+    async def fake_sleep(seconds):
+        recorded.append(seconds)
+
+    monkeypatch.setattr(retry_module.asyncio, 'sleep', fake_sleep)
+    return recorded
+
+
+def response_error(status, headers=None):
+    url = yarl.URL('https://example.com/api')
+    request_info = aiohttp.RequestInfo(url, 'GET', {}, url)
+    return aiohttp.ClientResponseError(request_info, (), status=status, headers=headers)
+
+
+def failing(errors, result='ok'):
+    """依次抛出 errors 中的异常，之后返回 result；calls 记录调用次数"""
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return attempt, calls
+
+
+def test_classify_error():
+    assert classify_error(RetryableError('x', 'challenge')) == 'challenge'
+    assert classify_error(response_error(429)) == 'throttled'
+    assert classify_error(response_error(503)) == 'server_error'
+    assert classify_error(response_error(404)) == 'client_error'
+    assert classify_error(asyncio.TimeoutError()) == 'timeout'
+    assert classify_error(aiohttp.ClientConnectionError('reset')) == 'connection'
+    assert classify_error(ConnectionResetError()) == 'connection'
+    assert classify_error(Exception('net::ERR_CONNECTION_CLOSED')) == 'connection'
+    assert classify_error(ValueError('bad json')) == 'other'
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 <= parse_retry_after(format_datetime(when, usegmt=True)) <= 31
+    past = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
+
+
+def test_retries_transient_errors_until_success(sleeps):
+    policy = RetryPolicy()
+    attempt, calls = failing([asyncio.TimeoutError(), aiohttp.ClientConnectionError('reset')])
+    assert asyncio.run(policy.run(attempt, stage='fetch')) == 'ok'
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+    stats = policy.stats()['fetch']
+    assert stats['retries'] == 2
+    assert stats['errors'] == {'timeout': 1, 'connection': 1}
+    assert stats['gave_up'] == 0
+
+
+def test_client_errors_and_unknown_errors_are_not_retried(sleeps):
+    policy = RetryPolicy()
+    for error in (response_error(404), ValueError('bad json')):
+        attempt, calls = failing([error])
+        with pytest.raises(type(error)):
+            asyncio.run(policy.run(attempt, stage='fetch'))
+        assert len(calls) == 1
+    assert sleeps == []
+    assert policy.stats()['fetch']['gave_up'] == 2
+
+
+def test_rule_overrides_and_max_attempts(sleeps):
+    policy = RetryPolicy()
+    rules = {'no_content': RetryRule(max_attempts=2, base_delay=1.0, max_delay=1.0)}
+    attempt, calls = failing([RetryableError('empty', 'no_content')] * 5)
+    with pytest.raises(RetryableError):
+        asyncio.run(policy.run(attempt, stage='render', rules=rules))
+    assert len(calls) == 2
+    assert sleeps == [1.0]
+
+
+def test_jitter_stays_within_rule_bounds(sleeps):
+    policy = RetryPolicy(rules={'timeout': RetryRule(max_attempts=6, base_delay=1.0, max_delay=4.0)})
+    attempt, _ = failing([asyncio.TimeoutError()] * 5)
+    asyncio.run(policy.run(attempt))
+    assert len(sleeps) == 5
+    assert all(1.0 <= seconds <= 4.0 for seconds in sleeps)
+
+
+def test_retry_after_extends_sleep_and_is_capped(sleeps):
+    policy = RetryPolicy(max_retry_after=20.0)
+    attempt, _ = failing([RetryableError('slow down', 'throttled', retry_after=90.0),
+                          response_error(429, headers={'Retry-After': '15'})])
+    asyncio.run(policy.run(attempt, rules={'throttled': RetryRule(max_attempts=4, base_delay=0.1, max_delay=0.1)}))
+    assert sleeps == [20.0, 15.0]
+
+
+def test_budget_denies_retries_when_exhausted(sleeps):
+    budget = RetryBudget(ratio=0.0, reserve=1)
+    policy = RetryPolicy(budget=budget)
+    attempt, calls = failing([asyncio.TimeoutError()] * 3)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(policy.run(attempt, stage='fetch'))
+    # 预算只够一次重试
+    assert len(calls) == 2
+    assert budget.denied == 1
+    stats = policy.stats()
+    assert stats['fetch']['budget_denied'] == 1
+    assert stats['_budget'] == {'tokens': 0.0, 'denied': 1}
+
+
+def test_budget_deposits_on_first_attempts():
+    budget = RetryBudget(ratio=0.5, reserve=0, max_tokens=1.0)
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    budget.deposit()
+    assert budget.tokens == 1.0
+    assert budget.withdraw()
+
+
+def test_retry_async_keeps_non_retryable_defaults(sleeps):
+    """装饰器的统一规则只作用于默认可重试的类别"""
+    class Client:
+        retry_policy = RetryPolicy()
+
+        def __init__(self, errors):
+            self.errors = list(errors)
+            self.calls = 0
+
+        @retry_async(max_retries=3, delay=0.5)
+        async def fetch(self):
+            self.calls += 1
+            if self.errors:
+                raise self.errors.pop(0)
+            return 'page'
+
+    client = Client([asyncio.TimeoutError(), response_error(502)])
+    assert asyncio.run(client.fetch()) == 'page'
+    assert client.calls == 3
+
+    for error in (response_error(403), KeyError('offset')):
+        client = Client([error])
+        with pytest.raises(type(error)):
+            asyncio.run(client.fetch())
+        assert client.calls == 1
+    assert Client.retry_policy.stats()['fetch']['calls'] == 3
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文章转换测试：图片链接单遍改写与顺序 str.replace 的等价性（含退回逐个替换的情形）、convert_article 输出
+"""
+
+import hashlib
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加 src 到 Python 路径
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # 指向 src 目录
+
+from newsletter_system.crawler import transform
+from newsletter_system.crawler.transform import (NO_CONTENT_MARKDOWN, convert_article, extract_image_urls,
+                                                 rewrite_image_references)
+
+pytest.importorskip('bs4')
+markdownify = pytest.importorskip('markdownify')
+
+CDN = 'https://substackcdn.com/image/fetch/w_1456,c_limit/https%3A%2F%2Fbucket.s3.amazonaws.com%2F'
+
+
+def sequential(html, replacements):
+    for url, path in replacements:
+        if url:
+            html = html.replace(url, path)
+    return html
+
+
+def article_html(urls, extra=''):
+    figures = ''.join(f'<figure><a href="{url}"><img src="{url}" srcset="{url} 424w, {url} 848w" '
+                      f'data-src="{url}"></a></figure><p>段落 {index}</p>' for index, url in enumerate(urls))
+    return f'<div class="body markup"><h2>标题</h2>{figures}{extra}</div>'
+
+
+def test_single_pass_matches_sequential_replace():
+    urls = [f'{CDN}{name}.png' for name in ('a1', 'b22', 'c333', 'd4444')]
+    replacements = [(url, f'images/img_{index}.png') for index, url in enumerate(urls)]
+    html = article_html(urls, extra=f'<p>{CDN}unknown.png {CDN}</p>')
+    # 前提：这组 URL 走单遍扫描
+    assert transform._scan_anchor(dict(replacements)) is not None
+    rewritten = rewrite_image_references(html, replacements)
+    assert rewritten == sequential(html, replacements)
+    assert all(url not in rewritten for url in urls)
+    assert f'{CDN}unknown.png' in rewritten
+
+
+@pytest.mark.parametrize('replacements', [
+    # URL 互为前缀
+    [(CDN + 'a.png', 'images/img_0.png'), (CDN + 'a.png?w=2', 'images/img_1.png')],
+    # 替换路径包含公共前缀
+    [(CDN + 'a.png', CDN + 'b.png'), (CDN + 'b.png', 'images/img_1.png')],
+    # 公共前缀太短
+    [('https://a.com/x.png', 'images/img_0.png'), ('https://b.com/y.png', 'images/img_1.png')],
+    # URL 以公共前缀的前段结尾
+    [(CDN + 'a.png#https://sub', 'images/img_0.png'), (CDN + 'b.png', 'images/img_1.png')],
+    # URL 中包含替换路径
+    [(CDN + 'images/img_1.png', 'images/img_0.png'), (CDN + 'b.png', 'images/img_1.png')],
+    # 同一 URL 重复出现、空 URL
+    [(CDN + 'a.png', 'images/img_0.png'), ('', 'images/img_x.png'), (CDN + 'a.png', 'images/img_1.png')],
+])
+def test_overlapping_urls_fall_back_to_sequential_replace(replacements):
+    urls = [url for url, _ in replacements if url]
+    html = article_html(urls, extra=f'<p>{CDN}a.png?w=2 {CDN}b.png</p>')
+    assert rewrite_image_references(html, replacements) == sequential(html, replacements)
+
+
+def test_randomized_replacements_match_sequential_replace():
+    rng = random.Random(15)
+    alphabet = 'ab/_.%'
+    for _ in range(300):
+        count = rng.randint(1, 5)
+        urls = [CDN[:rng.choice([4, 12, len(CDN)])] + ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+                for _ in range(count)]
+        paths = [rng.choice(['images/img_%d.png' % index, CDN[:6] + 'x', 'a', '']) for index in range(count)]
+        replacements = list(zip(urls, paths))
+        pieces = urls + paths + [CDN, CDN[:9], '<img src="', '">', 'ab']
+        html = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+        assert rewrite_image_references(html, replacements) == sequential(html, replacements), replacements
+
+
+def test_rewrite_without_work_returns_input():
+    html = article_html([CDN + 'a.png'])
+    assert rewrite_image_references(html, []) is html
+    assert rewrite_image_references('', [(CDN + 'a.png', 'images/img_0.png')]) == ''
+
+
+def test_extract_image_urls_normalizes_sources():
+    html = ('<p><img src="//cdn.example.com/a.png"><img data-src="/b.png"><img src="c.png">'
+            '<img src="https://x.com/d.png"><img alt="no source"></p>')
+    assert extract_image_urls(html, 'https://blog.example.com/p/post') == [
+        'https://cdn.example.com/a.png', 'https://blog.example.com/b.png',
+        'https://blog.example.com/p/c.png', 'https://x.com/d.png']
+
+
+def test_convert_article_rewrites_images_and_hashes_document():
+    urls = [CDN + 'a.png', CDN + 'b.png']
+    html = article_html(urls)
+    replacements = [(url, f'images/img_{index}.png') for index, url in enumerate(urls)]
+
+    result = convert_article(html, 'Title', 'Subtitle', True, replacements)
+    assert result['warning'] is None
+    assert result['content_html'] == sequential(html, replacements)
+    expected = markdownify.markdownify(result['content_html'], heading_style='ATX', strip=['script', 'style'])
+    assert result['markdown_content'] == expected
+    assert '![](images/img_0.png)' in result['markdown_content']
+    assert result['md_content'].startswith('# Title\n\n### Subtitle\n\n')
+    assert result['content_hash'] == hashlib.sha256(result['md_content'].encode('utf-8')).hexdigest()
+
+    untitled = convert_article(html, 'Title', None, False, replacements)
+    assert untitled['md_content'].startswith('# Untitled\n\n')
+
+
+def test_convert_article_reports_empty_and_short_content():
+    empty = convert_article(None, 'Title')
+    assert empty['warning'] == 'empty'
+    assert empty['markdown_content'] == NO_CONTENT_MARKDOWN
+    assert empty['content_html'] is None
+
+    short = convert_article('<div> </div>', 'Title')
+    assert short['warning'] == 'short'
+    assert short['markdown_content'] == transform.SHORT_CONTENT_MARKDOWN